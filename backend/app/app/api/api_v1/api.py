@@ -10,6 +10,7 @@ from app.api.api_v1.endpoints import (
     instructions,
     login,
     meta,
+    metrics,
     oligos,
     parts,
     pcrs,
@@ -39,6 +40,7 @@ api_router.include_router(synths.router, tags=["synths"])
 api_router.include_router(standalone.router, tags=["standalone"])
 api_router.include_router(workflow.router, tags=["workflow"])
 api_router.include_router(meta.router, tags=["meta"])
+api_router.include_router(metrics.router, tags=["metrics"])
 api_router.include_router(instructions.router, tags=["instructions"])
 api_router.include_router(banner.router, tags=["banner"])
 api_router.include_router(validate.router, tags=["validate"])
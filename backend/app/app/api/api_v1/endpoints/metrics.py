@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app import models
+from app.api import deps
+from app.core.instrumentation import METRICS
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics(
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> str:
+    """
+    Per-stage time and memory totals in Prometheus text format
+    """
+    return METRICS.to_prometheus()
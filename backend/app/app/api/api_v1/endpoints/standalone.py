@@ -1,10 +1,11 @@
 import datetime
 import io
 import json
-from typing import Any, Dict, List, Union
+import zipfile
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
 
 from app import models
 from app.api import deps
@@ -20,11 +21,28 @@ from app.api.utils.post_automation import (
     read_construct_dataframe,
 )
 from app.api.utils.results_toolbox import condense_plate_reader_data
-from app.core.colony_pcr import create_colony_pcr_instructions
+from app.core.assembly import ECHO_DROPLET_VOLUME, EchoTransferConstraints
+from app.core.colony_pcr import (
+    PrimerAnnealsMultipleTimes,
+    PrimerWillNotAnneal,
+    create_colony_pcr_instructions,
+    create_multi_primer_colony_pcr_instructions,
+)
 from app.core.condense_designs import condense_designs
-from app.core.j5_to_echo import create_plating_instructions, j5_to_echo
+from app.core.j5_to_echo import (
+    AutomationParameters,
+    create_plating_instructions,
+    j5_to_echo,
+)
+from app.core.picking import plate_wells
 from app.core.process_design import process_j5_zip_upload
 from app.core import j5
+from app.core.j5_archive import (
+    J5_ARCHIVE_MEDIA_TYPE,
+    dump_j5_design,
+    is_j5_archive,
+    load_j5_design,
+)
 
 router = APIRouter()
 
@@ -41,25 +59,55 @@ async def async_read_csv_file(upload_file: UploadFile) -> str:
         return file_read.decode("utf-16") if isinstance(file_read, bytes) else file_read
 
 
-@router.post("/parsej5")
-def parse_j5_zip(*, upload_file: UploadFile = File(...)) -> str:
+def j5_design_response(
+    j5_design: j5.J5Design, output_format: str
+) -> Union[str, Response]:
+    """J5 Design as JSON or, with output_format "arrow", as an archive"""
+    if output_format == "json":
+        return j5_design.to_json()
+    if output_format != "arrow":
+        raise HTTPException(
+            status_code=400, detail="output_format must be 'json' or 'arrow'"
+        )
+    try:
+        archive: bytes = dump_j5_design(j5_design)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return Response(
+        content=archive,
+        media_type=J5_ARCHIVE_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{j5_design.zip_file_name}.j5design.zip"'
+            )
+        },
+    )
+
+
+@router.post("/parsej5", response_model=None)
+def parse_j5_zip(
+    *, upload_file: UploadFile = File(...), output_format: str = Form("json")
+) -> Union[str, Response]:
     """
-    Parse J5 Results File to JSON
+    Parse J5 Results File to JSON, or to a binary archive with
+    output_format "arrow"
     """
     try:
         j5_design: j5.J5Design = process_j5_zip_upload(upload_file)
     finally:
         upload_file.file.close()
-    return j5_design.to_json()
+    return j5_design_response(j5_design, output_format)
 
 
-@router.post("/condensej5")
+@router.post("/condensej5", response_model=None)
 def condense_j5_designs(
     *,
     upload_files: List[UploadFile] = File(...),
-) -> str:
+    output_format: str = Form("json"),
+) -> Union[str, Response]:
     """
-    Condense j5 design zip files into single design
+    Condense j5 design zip files into single design, returned as JSON
+    or, with output_format "arrow", as a binary archive
     """
     try:
         designs: List[j5.J5Design] = [
@@ -69,23 +117,79 @@ def condense_j5_designs(
     finally:
         for upload_file in upload_files:
             upload_file.file.close()
-    return condensed_j5_design.to_json()
+    return j5_design_response(condensed_j5_design, output_format)
+
+
+def automation_parameters(
+    glycerol_plate_format: int = Form(96),
+    glycerol_plate_fill: str = Form("column"),
+    optimize_echo_transfers: bool = Form(False),
+    track_source_volumes: bool = Form(False),
+    quantize_to_droplets: bool = Form(False),
+    droplet_volume: float = Form(ECHO_DROPLET_VOLUME),
+    min_transfer_volume: float = Form(ECHO_DROPLET_VOLUME),
+    max_source_well_volume: Optional[float] = Form(None),
+) -> AutomationParameters:
+    """
+    AutomationParameters of j5 automation endpoints. Glycerol stock
+    plates hold glycerol_plate_format (96 or 384) wells filled in
+    "column" or "row" order. With quantize_to_droplets, echo volumes are
+    quantized as in the equimolar assembly endpoint.
+    """
+    try:
+        plate_wells(plate_format=glycerol_plate_format, fill=glycerol_plate_fill)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    echo_constraints: Optional[EchoTransferConstraints] = None
+    if quantize_to_droplets:
+        echo_constraints = EchoTransferConstraints(
+            droplet_volume=droplet_volume,
+            min_transfer_volume=min_transfer_volume,
+            max_source_well_volume=max_source_well_volume,
+        )
+    return AutomationParameters(
+        glycerol_plate_format=glycerol_plate_format,
+        glycerol_plate_fill=glycerol_plate_fill,
+        optimize_echo_transfers=optimize_echo_transfers,
+        track_source_volumes=track_source_volumes,
+        echo_constraints=echo_constraints,
+    )
 
 
 @router.post("/automatej5")
 async def automate_j5(
     *,
     upload_file: UploadFile = File(...),
+    use_cache: bool = Form(True),
+    include_timings: bool = Form(False),
+    parameters: AutomationParameters = Depends(automation_parameters),
 ) -> StreamingResponse:
     """
-    Create customized automation instructions for J5 Design JSON
+    Create customized automation instructions for J5 Design JSON or
+    binary archive
     """
     results_file = io.BytesIO()
     try:
-        design_json: str = await async_read_csv_file(upload_file=upload_file)
-        j5_design: j5.J5Design = j5.J5Design.parse_raw(design_json)
+        contents: Union[str, bytes] = await upload_file.read()
+        j5_design: j5.J5Design
+        if isinstance(contents, bytes) and is_j5_archive(contents):
+            try:
+                j5_design = load_j5_design(contents)
+            except RuntimeError as e:
+                raise HTTPException(status_code=501, detail=str(e))
+            except (KeyError, ValueError, zipfile.BadZipFile) as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Invalid J5Design archive: {e}"
+                )
+        else:
+            await upload_file.seek(0)
+            design_json: str = await async_read_csv_file(upload_file=upload_file)
+            j5_design = j5.J5Design.parse_raw(design_json)
         _, results_file = j5_to_echo(
             j5_design=j5_design,
+            parameters=parameters,
+            use_cache=use_cache,
+            include_timings=include_timings,
         )
     finally:
         upload_file.file.close()
@@ -96,6 +200,9 @@ async def automate_j5(
 async def condense_and_automate_j5(
     *,
     upload_files: List[UploadFile] = File(...),
+    use_cache: bool = Form(True),
+    include_timings: bool = Form(False),
+    parameters: AutomationParameters = Depends(automation_parameters),
 ) -> StreamingResponse:
     """
     Condense j5 design zip files into single design then
@@ -109,6 +216,9 @@ async def condense_and_automate_j5(
         condensed_j5_design: j5.J5Design = condense_designs(designs)
         _, results_file = j5_to_echo(
             j5_design=condensed_j5_design,
+            parameters=parameters,
+            use_cache=use_cache,
+            include_timings=include_timings,
         )
     finally:
         for upload_file in upload_files:
@@ -225,12 +335,25 @@ async def standalone_equimolar_assembly_and_water_transfer(
     max_fmol: float = Form(...),
     max_vol: float = Form(...),
     max_part_percentage: float = Form(...),
+    quantize_to_droplets: bool = Form(False),
+    droplet_volume: float = Form(ECHO_DROPLET_VOLUME),
+    min_transfer_volume: float = Form(ECHO_DROPLET_VOLUME),
+    max_source_well_volume: Optional[float] = Form(None),
 ) -> StreamingResponse:
     """
     Take in worksheets and create equimolar assembly instructions.
     Equimolar assembly instructions automatically calculates water
-    transfer instructions
+    transfer instructions. With quantize_to_droplets, volumes are
+    multiples of the droplet volume (nL), at least min_transfer_volume
+    (nL), and draw at most max_source_well_volume (uL) from each well.
     """
+    constraints: Optional[EchoTransferConstraints] = None
+    if quantize_to_droplets:
+        constraints = EchoTransferConstraints(
+            droplet_volume=droplet_volume,
+            min_transfer_volume=min_transfer_volume,
+            max_source_well_volume=max_source_well_volume,
+        )
     results_file: io.BytesIO = io.BytesIO()
     try:
         assembly_read: str = await async_read_csv_file(upload_file=assembly_worksheet)
@@ -241,6 +364,7 @@ async def standalone_equimolar_assembly_and_water_transfer(
             max_fmol=max_fmol,
             max_vol=max_vol,
             max_part_percentage=max_part_percentage,
+            constraints=constraints,
         )
     finally:
         assembly_worksheet.file.close()
@@ -304,10 +428,11 @@ async def standalone_create_colony_pcr_instructions(
     forward_primer: str = Form(...),
     reverse_primer: str = Form(...),
     reaction_volume: int = Form(...),
+    max_mismatches: int = Form(0),
 ) -> StreamingResponse:
     """
     Create colony PCR instructions using 1 set of forward and reverse
-    primers
+    primers, allowing max_mismatches outside the 3' end of each primer
     """
     results_file: io.BytesIO
     try:
@@ -322,17 +447,75 @@ async def standalone_create_colony_pcr_instructions(
             if current_user.email
             else str(current_user.id)
         )
-        results_file = create_colony_pcr_instructions(
-            glycerol_file=io.StringIO(glycerol_worksheet_read),
-            plasmid_sequences_file=io.StringIO(plasmids_sequences_read),
-            forward_primer=forward_primer,
-            reverse_primer=reverse_primer,
-            username=username,
-            reaction_volume=reaction_volume,
+        try:
+            results_file = create_colony_pcr_instructions(
+                glycerol_file=io.StringIO(glycerol_worksheet_read),
+                plasmid_sequences_file=io.StringIO(plasmids_sequences_read),
+                forward_primer=forward_primer,
+                reverse_primer=reverse_primer,
+                username=username,
+                reaction_volume=reaction_volume,
+                max_mismatches=max_mismatches,
+            )
+        except (ValueError, PrimerWillNotAnneal, PrimerAnnealsMultipleTimes) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        glycerol_file.file.close()
+        plasmid_sequences_file.file.close()
+    return StreamingResponse(results_file, media_type="application/zip")
+
+
+@router.post("/createmultiprimercolonypcrinstructions")
+async def standalone_create_multi_primer_colony_pcr_instructions(
+    *,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    glycerol_file: UploadFile = File(...),
+    plasmid_sequences_file: UploadFile = File(...),
+    primer_pairs_file: UploadFile = File(...),
+    reaction_volume: int = Form(...),
+    min_length: int = Form(100),
+    max_length: int = Form(5000),
+    max_mismatches: int = Form(0),
+) -> StreamingResponse:
+    """
+    Create colony PCR instructions choosing, for each construct, the
+    primer pair of primer_pairs_file (NAME, FORWARD_PRIMER,
+    REVERSE_PRIMER) whose product is best told apart from those of the
+    other constructs
+    """
+    results_file: io.BytesIO
+    try:
+        glycerol_worksheet_read: str = await async_read_csv_file(
+            upload_file=glycerol_file
+        )
+        plasmids_sequences_read: str = await async_read_csv_file(
+            upload_file=plasmid_sequences_file
+        )
+        primer_pairs_read: str = await async_read_csv_file(
+            upload_file=primer_pairs_file
+        )
+        username: str = (
+            current_user.email.split("@")[0]
+            if current_user.email
+            else str(current_user.id)
         )
+        try:
+            results_file = create_multi_primer_colony_pcr_instructions(
+                glycerol_file=io.StringIO(glycerol_worksheet_read),
+                plasmid_sequences_file=io.StringIO(plasmids_sequences_read),
+                primer_pairs_file=io.StringIO(primer_pairs_read),
+                username=username,
+                reaction_volume=reaction_volume,
+                min_length=min_length,
+                max_length=max_length,
+                max_mismatches=max_mismatches,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     finally:
         glycerol_file.file.close()
         plasmid_sequences_file.file.close()
+        primer_pairs_file.file.close()
     return StreamingResponse(results_file, media_type="application/zip")
 
 
@@ -1,15 +1,121 @@
+import concurrent.futures
+import contextlib
 import io
+import logging
+import multiprocessing
 import os
+import threading
 from datetime import datetime
+from typing import Iterator, Optional
 import pandas as pd
 import openpyxl
 
 from app.core.j5_to_echo_utils import stamp
 
+logger = logging.getLogger(__name__)
+
 NGS_TEMPLATE_FILE: str = os.path.join(
     os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__))),
     "ngs_form_empty_template_v2.xlsx",
 )
+# First row and column (AK) of the sample table of the template
+NGS_FORM_FIRST_ROW: int = 34
+NGS_FORM_FIRST_COLUMN: int = 37
+# Number of plates from which forms are rendered in a process pool.
+# Spawned workers take seconds to import the app, about the time to
+# render four plates.
+PARALLEL_PLATES_MIN: int = 16
+
+
+# Parsed NGS form templates not in use, see ngs_template_workbook
+NGS_TEMPLATE_POOL: list[openpyxl.Workbook] = []
+NGS_TEMPLATE_POOL_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def ngs_template_workbook() -> Iterator[openpyxl.Workbook]:
+    """Borrow a parsed NGS form template from NGS_TEMPLATE_POOL
+
+    The template is only parsed when none is free. Whoever borrows it
+    must restore every cell they change before it goes back.
+    """
+    with NGS_TEMPLATE_POOL_LOCK:
+        workbook: Optional[openpyxl.Workbook] = (
+            NGS_TEMPLATE_POOL.pop() if NGS_TEMPLATE_POOL else None
+        )
+    if workbook is None:
+        workbook = openpyxl.load_workbook(filename=NGS_TEMPLATE_FILE)
+    try:
+        yield workbook
+    finally:
+        with NGS_TEMPLATE_POOL_LOCK:
+            NGS_TEMPLATE_POOL.append(workbook)
+
+
+def render_ngs_submission_excel(samples: list[tuple[str, str]]) -> bytes:
+    """NGS form of one plate from the (Sample_Name, Part ID) of its wells"""
+    with ngs_template_workbook() as workbook:
+        worksheet = workbook.active
+        cells = [worksheet["AI33"]] + [
+            cell
+            for row in worksheet.iter_rows(
+                min_row=NGS_FORM_FIRST_ROW,
+                max_row=NGS_FORM_FIRST_ROW + len(samples) - 1,
+                min_col=NGS_FORM_FIRST_COLUMN,
+                max_col=NGS_FORM_FIRST_COLUMN + 2,
+            )
+            for cell in row
+        ]
+        template_values = [cell.value for cell in cells]
+        try:
+            cells[0].value = "Rows, Quads"
+            for i, (name, part_id) in enumerate(samples):
+                cells[1 + 3 * i].value = name
+                cells[2 + 3 * i].value = part_id
+                cells[3 + 3 * i].value = "Plasmid__purified"
+            submission_excel = io.BytesIO()
+            workbook.save(submission_excel)
+        finally:
+            for cell, value in zip(cells, template_values):
+                cell.value = value
+    return submission_excel.getvalue()
+
+
+def render_ngs_submission_excels(
+    plate_samples: dict[str, list[tuple[str, str]]],
+    max_workers: Optional[int] = None,
+) -> dict[str, io.BytesIO]:
+    """NGS forms of each plate, rendered in a process pool when there are
+    at least PARALLEL_PLATES_MIN plates and more than one CPU
+
+    Workers are spawned rather than forked, as forking the threaded
+    server is unsafe. Forms are rendered serially when no pool can be
+    started, e.g. in daemonic Celery workers, which cannot have
+    children.
+    """
+    rendered: Optional[list[bytes]] = None
+    if len(plate_samples) >= PARALLEL_PLATES_MIN and (os.cpu_count() or 1) > 1:
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                rendered = list(
+                    pool.map(render_ngs_submission_excel, plate_samples.values())
+                )
+        except (
+            AssertionError,
+            OSError,
+            concurrent.futures.process.BrokenProcessPool,
+        ) as e:
+            logger.warning(f"Rendering NGS forms serially: {e}")
+    if rendered is None:
+        rendered = [
+            render_ngs_submission_excel(samples) for samples in plate_samples.values()
+        ]
+    return {
+        plate: io.BytesIO(submission_excel)
+        for plate, submission_excel in zip(plate_samples, rendered)
+    }
 
 
 def setup_ngs_worksheets(
@@ -54,24 +160,11 @@ def setup_ngs_worksheets(
         axis=1,
     )
 
-    submission_excels: dict[str, io.BytesIO] = {}
-    submission_excel: io.BytesIO
-    for plate in ngs_worksheet["NGS_PLATE"].unique():
-        submission_excel = io.BytesIO()
-        workbook = openpyxl.load_workbook(filename=NGS_TEMPLATE_FILE)
-        worksheet = workbook.active
-        worksheet["AI33"] = "Rows, Quads"
-        for i, value in enumerate(
-            ngs_worksheet.loc[ngs_worksheet["NGS_PLATE"] == plate, "Sample_Name"].values
-        ):
-            worksheet[f"AK{34 + i}"] = value
-            worksheet[f"AM{34 + i}"] = "Plasmid__purified"
-        for i, value in enumerate(
-            ngs_worksheet.loc[ngs_worksheet["NGS_PLATE"] == plate, "Part ID"].values
-        ):
-            worksheet[f"AL{34 + i}"] = value
-        workbook.save(submission_excel)
-        submission_excel.seek(0)
-        submission_excels[plate] = submission_excel
+    submission_excels: dict[str, io.BytesIO] = render_ngs_submission_excels(
+        {
+            plate: list(zip(samples["Sample_Name"], samples["Part ID"]))
+            for plate, samples in ngs_worksheet.groupby("NGS_PLATE", sort=False)
+        }
+    )
 
     return ngs_worksheet, submission_excels
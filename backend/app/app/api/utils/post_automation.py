@@ -3,13 +3,17 @@
 import io
 import itertools
 import zipfile
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 from app.core.echo import create_echo_instructions
-from app.core.assembly import create_equimolar_assembly_instructions
+from app.core.assembly import (
+    EchoTransferConstraints,
+    create_equimolar_assembly_instructions,
+)
+from app.core.instrumentation import instrumented
 from app.core.plating_utils import create_plating_instructions
 from app.core.j5_to_echo_utils import (
     convert2WellTo3Well,
@@ -19,6 +23,7 @@ from app.core.j5_to_echo_utils import (
 from app.api.utils.ngs import setup_ngs_worksheets
 
 
+@instrumented()
 def analyze_zag(peak_files: list, size_file: io.StringIO, settings: dict) -> str:
     expected_size_worksheet = pd.read_csv(size_file, index_col=0)
     plate_names = expected_size_worksheet[settings["zagColumnPlate"]].unique()
@@ -43,6 +48,7 @@ def analyze_zag(peak_files: list, size_file: io.StringIO, settings: dict) -> str
     return pcr_results.to_csv()
 
 
+@instrumented()
 def analyze_manual_pcr_results(result_file: io.StringIO, settings: dict) -> str:
     plateColumns: Tuple[str, str, str] = (
         settings["zagColumnPlate"],
@@ -63,6 +69,7 @@ def analyze_manual_pcr_results(result_file: io.StringIO, settings: dict) -> str:
     return result_df.to_csv()
 
 
+@instrumented()
 def create_pcr_redo(pcr_results_file: io.StringIO, settings: dict) -> Dict[str, str]:
     redo_pcr_worksheet = create_pcr_redo_worksheet(pcr_results_file, settings)
     redo_pcr_echo_instructions = create_echo_instructions(
@@ -160,6 +167,7 @@ def create_plate_column(
     return plate_column
 
 
+@instrumented()
 def consolidate_pcr_trials_main(pcr_trial_files_dict: dict) -> io.BytesIO:
     results_df = consolidate_pcr_trials(pcr_trial_files=pcr_trial_files_dict)
     (
@@ -253,40 +261,61 @@ def consolidate_pcr_trials(pcr_trial_files: dict) -> pd.DataFrame:
         for trial in pcr_trial_files
     }
     for trial in trialSheets:
-        trialSheets[trial] = trialSheets[trial].loc[
+        sheet = trialSheets[trial].loc[
             :, ~trialSheets[trial].columns.str.match("Unnamed")
         ]
-        trialSheets[trial]["REDO_PLATE"] = trialSheets[trial]["OUTPUT_LOCATION"].apply(
-            lambda location: location.split("#")[0]
-        )
-        trialSheets[trial]["REDO_WELL"] = trialSheets[trial]["OUTPUT_LOCATION"].apply(
-            lambda location: location.split("#")[1]
+        location = sheet["OUTPUT_LOCATION"].str.split("#", n=2, expand=True)
+        sheet = sheet.assign(REDO_PLATE=location[0], REDO_WELL=location[1])
+        trialSheets[trial] = sheet.assign(
+            trial=trial,
+            src_plate=sheet["REDO_PLATE"],
+            src_well=sheet["REDO_WELL"],
+            src_location=trial + "#" + sheet["REDO_PLATE"] + "#" + sheet["REDO_WELL"],
         )
-        trialSheets[trial]["trial"] = trial
-        trialSheets[trial]["src_plate"] = trialSheets[trial]["REDO_PLATE"]
-        trialSheets[trial]["src_well"] = trialSheets[trial]["REDO_WELL"]
-        trialSheets[trial]["src_location"] = trialSheets[trial].apply(
-            lambda row: "{}#{}#{}".format(
-                row["trial"], row["src_plate"], row["src_well"]
-            ),
-            axis=1,
-        )
-    consolidatedRxns = trialSheets["trial_1"].copy()
-    for trial in trialSheets:
-        for entry in trialSheets[trial].loc[trialSheets[trial]["GOOD"]].iterrows():
-            # If there isn't a successful reaction in consolidated rxns
-            # dataframe Then update the consolidated dataframe with the
-            # rxn from the new trial
-            if not consolidatedRxns.loc[
-                (consolidatedRxns["OUTPUT_PLATE"] == entry[1]["OUTPUT_PLATE"])
-                & (consolidatedRxns["OUTPUT_WELL"] == entry[1]["OUTPUT_WELL"]),
-                "GOOD",
-            ].values[0]:
-                consolidatedRxns.loc[
-                    (consolidatedRxns["OUTPUT_PLATE"] == entry[1]["OUTPUT_PLATE"])
-                    & (consolidatedRxns["OUTPUT_WELL"] == entry[1]["OUTPUT_WELL"])
-                ] = entry[1].values
-    return consolidatedRxns
+    return first_successful_trials(trialSheets)
+
+
+def first_successful_trials(trialSheets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Pick the reaction to use for each well of the first trial
+
+    A reaction of trial_1 is kept if it is GOOD. Otherwise it is
+    replaced by the first GOOD reaction with the same OUTPUT_PLATE and
+    OUTPUT_WELL in the trials, in the order given. Reactions of other
+    trials in wells not used by trial_1 are ignored.
+
+    Arguments
+    ---------
+    trialSheets : Dict[str, pd.DataFrame]
+        PCR worksheets with results of each trial, by trial name
+
+    Returns
+    -------
+    consolidatedRxns : pd.DataFrame
+        trial_1 with its failed reactions replaced
+    """
+    key: List[str] = ["OUTPUT_PLATE", "OUTPUT_WELL"]
+    firstTrial: pd.DataFrame = trialSheets["trial_1"]
+    # trial_1 wins whenever it worked, and is the fallback when no trial did
+    candidates: pd.DataFrame = pd.concat(
+        [
+            sheet.loc[sheet["GOOD"], firstTrial.columns].assign(
+                PRIORITY=-1 if trial == "trial_1" else position
+            )
+            for position, (trial, sheet) in enumerate(trialSheets.items())
+        ]
+        + [firstTrial.assign(PRIORITY=len(trialSheets))],
+        ignore_index=True,
+    )
+    consolidatedRxns: pd.DataFrame = (
+        candidates.sort_values("PRIORITY", kind="stable")
+        .drop_duplicates(subset=key)
+        .set_index(key)
+        .reindex(pd.MultiIndex.from_frame(firstTrial.loc[:, key]))
+        .reset_index()
+        .loc[:, firstTrial.columns]
+        .set_axis(firstTrial.index)
+    )
+    return consolidatedRxns.astype(firstTrial.dtypes.to_dict())
 
 
 def generate_consolidation_instructions(
@@ -385,6 +414,7 @@ def generate_consolidation_instructions(
     return templateDF, plateMaps, biomekInstructions
 
 
+@instrumented()
 def create_equivolume_assembly(
     pcr_results_file: io.StringIO,
     assembly_worksheet_file: io.StringIO,
@@ -568,12 +598,14 @@ def find_possible_constructs(
     )
 
 
+@instrumented()
 def prepare_standalone_equimolar_assembly_and_water(
     skinny_assembly: io.StringIO,
     quant_worksheet: io.StringIO,
     max_fmol: float = 100.0,
     max_vol: float = 5.0,
     max_part_percentage: float = 1.0,
+    constraints: Optional[EchoTransferConstraints] = None,
 ) -> io.BytesIO:
     skinny_assembly_df: pd.DataFrame = pd.read_csv(skinny_assembly)
     quant_worksheet_df: pd.DataFrame = pd.read_csv(quant_worksheet)
@@ -583,6 +615,7 @@ def prepare_standalone_equimolar_assembly_and_water(
         max_fmol=max_fmol,
         max_vol=max_vol,
         max_part_percentage=max_part_percentage,
+        constraints=constraints,
     )
     equimolar_echo_instructions: pd.DataFrame = create_echo_instructions(
         worksheet=equimolar_df, method="equimolar"
@@ -605,6 +638,7 @@ def prepare_standalone_equimolar_assembly_and_water(
     return zip_results
 
 
+@instrumented()
 def analyze_qpix(qpix_file: io.StringIO, plating_file: io.StringIO) -> str:
     skip_qpix_header: bool = qpix_file.readline().startswith("Run")
     qpix_file.seek(0)
@@ -667,6 +701,7 @@ def read_construct_dataframe(construct_file: io.StringIO) -> pd.DataFrame:
     return pd.read_csv(construct_file)
 
 
+@instrumented()
 def create_ngs_submission_form(
     glycerol_stock_file: io.StringIO,
     registry_file: io.StringIO,
@@ -693,6 +728,7 @@ def create_ngs_submission_form(
     return zip_results
 
 
+@instrumented()
 def analyze_sequencing_results(
     sample_file: io.StringIO, sequencing_results_file: io.StringIO
 ) -> io.BytesIO:
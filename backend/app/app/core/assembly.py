@@ -1,23 +1,135 @@
 import numpy as np
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional
 from scipy.optimize import OptimizeResult, linprog
 import pandas as pd
 from pandera.typing import DataFrame
 import itertools
+import logging
+from dataclasses import dataclass
+from fractions import Fraction
 from app import schemas
 
+logger = logging.getLogger(__name__)
+
+# Volume of a single Echo acoustic droplet (in nL)
+ECHO_DROPLET_VOLUME: float = 2.5
+# Rounds of source well depletion rescaling before giving up
+MAX_DEPLETION_ROUNDS: int = 20
+# Water drawn from each well of a water plate (in uL)
+WATER_WELL_CAPACITY: float = 45.0
+# Water each well of a water plate is filled with (in uL)
+WATER_WELL_VOLUME: float = 65.0
+# Wells of a 384 well plate in row major order
+WELLS_384: Tuple[str, ...] = tuple(
+    f"{row}{column}"
+    for row, column in itertools.product("ABCDEFGHIJKLMNOP", range(1, 25))
+)
+
 
 def index_to_384_well(index: int) -> str:
-    index = int(index % 384)
-    possible_wells: List[str] = [
-        f"{row}{column}"
-        for row, column in itertools.product("ABCDEFGHIJKLMNOP", range(1, 25))
-    ]
-    index_well_map = {
-        biomek_index: letter_number
-        for letter_number, biomek_index in zip(possible_wells, range(1, 385))
-    }
-    return index_well_map[index]
+    """Row major 384 well name of 1-based index, wrapping every plate"""
+    return WELLS_384[int(index % 384) - 1]
+
+
+def assign_water_wells(
+    volumes: np.ndarray,
+    capacity: float = WATER_WELL_CAPACITY,
+    plate_prefix: str = "water_plate",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Water plate and well for each of a sequence of water transfers
+
+    Consecutive transfers share a water well until the next one would
+    take more than capacity from it, then move on to the next well in
+    row major order. After 384 wells, a new water plate is started.
+    Boundaries are found with a binary search on the cumulative volume,
+    so the work grows with the number of wells rather than transfers.
+
+    Arguments
+    ---------
+    volumes : np.ndarray
+        Volume of each transfer, in the order they are made
+
+    capacity : float
+        Volume that can be drawn from a single water well, in the units
+        of volumes
+
+    plate_prefix : str
+        Water plates are named {plate_prefix}_1, {plate_prefix}_2, ...
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Source plate and source well of each transfer
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    if (volumes > capacity).any():
+        raise ValueError(
+            f"Water transfer of {volumes.max()} exceeds the water well"
+            f" capacity of {capacity}"
+        )
+    cumulative: np.ndarray = np.concatenate([[0.0], np.cumsum(volumes)])
+    well_numbers: np.ndarray = np.zeros(volumes.size, dtype=int)
+    start: int = 0
+    well_number: int = 0
+    while start < volumes.size:
+        end: int = int(
+            np.searchsorted(
+                cumulative, cumulative[start] + capacity + 1e-9, side="right"
+            )
+            - 1
+        )
+        well_numbers[start:end] = well_number
+        start = end
+        well_number += 1
+    plates: np.ndarray = np.char.add(
+        f"{plate_prefix}_", (well_numbers // len(WELLS_384) + 1).astype(str)
+    )
+    wells: np.ndarray = np.asarray(WELLS_384)[well_numbers % len(WELLS_384)]
+    return plates, wells
+
+
+@dataclass(frozen=True)
+class EchoTransferConstraints:
+    """Liquid handling limits applied to equimolar assembly volumes
+
+    Transfer Volume is a whole number of nL, so volumes are quantized
+    to the smallest multiple of the droplet volume that is a whole
+    number of nL (5 nL for 2.5 nL droplets).
+
+    Arguments
+    ---------
+    droplet_volume : float
+        Volume of a single droplet (in nL)
+
+    min_transfer_volume : float
+        Smallest volume transferred for a part (in nL). Parts whose
+        equimolar volume is smaller use this volume instead.
+
+    max_source_well_volume : float, optional
+        Volume that may be drawn from a single source well across all
+        reactions (in uL). Reactions using a well that would be
+        overdrawn use less of every part.
+    """
+
+    droplet_volume: float = ECHO_DROPLET_VOLUME
+    min_transfer_volume: float = ECHO_DROPLET_VOLUME
+    max_source_well_volume: Optional[float] = None
+
+    @property
+    def quantum(self) -> float:
+        """Volume every transfer is a multiple of (in uL)"""
+        droplet: Fraction = Fraction(str(self.droplet_volume)).limit_denominator(1000)
+        return droplet.numerator / 1000
+
+    @property
+    def min_volume(self) -> float:
+        """Smallest transfer that is a multiple of quantum (in uL)"""
+        quanta: float = np.ceil(self.min_transfer_volume / 1000 / self.quantum - 1e-9)
+        return max(quanta, 1.0) * self.quantum
+
+    def quantize(self, volumes: np.ndarray) -> np.ndarray:
+        """Round volumes (in uL) down to multiples of quantum"""
+        return np.floor(np.asarray(volumes) / self.quantum + 1e-6) * self.quantum
 
 
 def optimize_equimolar_assembly_rxn(
@@ -71,35 +183,207 @@ def optimize_equimolar_assembly_rxn(
     return volumes
 
 
+def solve_equimolar_assembly_rxns(
+    conc: pd.Series, rxn: pd.Series, max_vol: float, max_fmol: float
+) -> np.ndarray:
+    """Equimolar part volumes for many reactions at once
+
+    Solves the same problem as optimize_equimolar_assembly_rxn for
+    every reaction. Using the same fmol of every part means part i
+    takes fmol / conc_i uL, so the volume constraint gives
+    fmol = min(max_fmol, max_vol / sum(1 / conc)). Reactions with a
+    part whose concentration is not a positive finite number have no
+    such closed form and are solved with the LP.
+
+    Arguments
+    ---------
+    conc: pd.Series
+        Concentration of each part (in fmol/uL)
+
+    rxn: pd.Series
+        Reaction each part belongs to, aligned with conc
+
+    max_vol: float
+        Max total volume allowed for each reaction (in uL)
+
+    max_fmol: float
+        Max amount of part used for each reaction (in fmols)
+
+    Returns
+    -------
+    np.ndarray
+        Volume of each part (in uL), in the order of conc
+    """
+    conc = conc.astype(float)
+    valid_conc: pd.Series = np.isfinite(conc) & (conc > 0)
+    inverse_conc: pd.Series = (1.0 / conc).where(valid_conc, 0.0)
+    fmol: pd.Series = (
+        max_vol / inverse_conc.groupby(rxn.values).transform("sum")
+    ).clip(upper=max_fmol, lower=0.0)
+    volumes: np.ndarray = (fmol * inverse_conc).to_numpy()
+    degenerate: np.ndarray = ~valid_conc.groupby(rxn.values).transform("all").to_numpy()
+    if degenerate.any():
+        for degenerate_rxn in pd.unique(rxn.values[degenerate]):
+            in_rxn: np.ndarray = rxn.values == degenerate_rxn
+            volumes[in_rxn] = optimize_equimolar_assembly_rxn(
+                conc=conc.values[in_rxn], max_vol=max_vol, max_fmol=max_fmol
+            )
+    return volumes
+
+
+def solve_constrained_equimolar_assembly_rxns(
+    conc: pd.Series,
+    rxn: pd.Series,
+    source: pd.Series,
+    max_vol: float,
+    max_fmol: float,
+    constraints: EchoTransferConstraints,
+) -> np.ndarray:
+    """Equimolar part volumes for many reactions under Echo constraints
+
+    Starts from the closed form of solve_equimolar_assembly_rxns. Parts
+    needing less than the minimum transfer volume are pinned to it and
+    the fmol of the rest of the reaction is recomputed with the
+    remaining volume, until no more parts are pinned. If source wells
+    are overdrawn, every reaction using them is capped at the fmol that
+    fits the well and the volumes are solved again. Finally volumes are
+    rounded down to droplet multiples, which keeps both the reaction
+    volume and the source well limits satisfied. Every step works on
+    all reactions at once.
+
+    Reactions with a part whose concentration is not a positive finite
+    number are solved with the LP and only quantized.
+
+    Arguments
+    ---------
+    conc: pd.Series
+        Concentration of each part (in fmol/uL)
+
+    rxn: pd.Series
+        Reaction each part belongs to, aligned with conc
+
+    source: pd.Series
+        Source well each part is drawn from, aligned with conc
+
+    max_vol: float
+        Max total volume allowed for each reaction (in uL)
+
+    max_fmol: float
+        Max amount of part used for each reaction (in fmols)
+
+    constraints: EchoTransferConstraints
+        Droplet size, minimum transfer and source well limits
+
+    Returns
+    -------
+    np.ndarray
+        Volume of each part (in uL), in the order of conc
+    """
+    conc_values: np.ndarray = conc.astype(float).to_numpy()
+    rxn_codes, rxn_labels = pd.factorize(rxn)
+    source_codes, _ = pd.factorize(source)
+    n_rxns: int = len(rxn_labels)
+    valid_conc: np.ndarray = np.isfinite(conc_values) & (conc_values > 0)
+    inverse_conc: np.ndarray = np.where(valid_conc, 1.0 / conc_values, 0.0)
+    degenerate: np.ndarray = (
+        np.bincount(rxn_codes, weights=~valid_conc, minlength=n_rxns) > 0
+    )[rxn_codes]
+    min_volume: float = constraints.min_volume
+
+    fmol_limit: np.ndarray = np.full(n_rxns, max_fmol)
+    volumes: np.ndarray = np.zeros(conc_values.size)
+    for _ in range(MAX_DEPLETION_ROUNDS):
+        pinned: np.ndarray = np.zeros(conc_values.size, dtype=bool)
+        while True:
+            free_inverse_conc: np.ndarray = np.bincount(
+                rxn_codes, weights=np.where(pinned, 0.0, inverse_conc), minlength=n_rxns
+            )
+            free_vol: np.ndarray = max_vol - min_volume * np.bincount(
+                rxn_codes, weights=pinned, minlength=n_rxns
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fmol: np.ndarray = np.clip(
+                    free_vol / free_inverse_conc, 0.0, fmol_limit
+                )
+            fmol = np.where(np.isfinite(fmol), fmol, fmol_limit)
+            newly_pinned: np.ndarray = (
+                valid_conc & ~pinned & (fmol[rxn_codes] * inverse_conc < min_volume)
+            )
+            if not newly_pinned.any():
+                break
+            pinned |= newly_pinned
+        volumes = np.where(pinned, min_volume, fmol[rxn_codes] * inverse_conc)
+        if constraints.max_source_well_volume is None:
+            break
+        usage: np.ndarray = np.bincount(source_codes, weights=volumes)[source_codes]
+        overdrawn: np.ndarray = ~degenerate & (
+            usage > constraints.max_source_well_volume + 1e-9
+        )
+        if not overdrawn.any():
+            break
+        scale: np.ndarray = np.where(
+            overdrawn, constraints.max_source_well_volume / usage, 1.0
+        )
+        rxn_scale: np.ndarray = (
+            pd.Series(scale).groupby(rxn_codes).min().reindex(range(n_rxns)).to_numpy()
+        )
+        fmol_limit = np.minimum(fmol_limit, fmol * rxn_scale)
+    else:
+        logger.warning(
+            "Source wells are overdrawn by minimum volume transfers alone,"
+            f" capacity {constraints.max_source_well_volume} uL"
+        )
+
+    if degenerate.any():
+        volumes[degenerate] = solve_equimolar_assembly_rxns(
+            conc=conc[degenerate],
+            rxn=rxn[degenerate],
+            max_vol=max_vol,
+            max_fmol=max_fmol,
+        )
+    volumes = np.where(
+        valid_conc & ~degenerate, np.maximum(volumes, min_volume), volumes
+    )
+    volumes = constraints.quantize(volumes)
+    overfilled: np.ndarray = (
+        np.bincount(rxn_codes, weights=volumes, minlength=n_rxns) > max_vol + 1e-9
+    )
+    if overfilled.any():
+        logger.warning(
+            f"{overfilled.sum()} reactions exceed {max_vol} uL since they have"
+            f" too many parts for a minimum transfer of {min_volume} uL each"
+        )
+    return volumes
+
+
 def add_water_to_assembly(
     assembly_worksheet: pd.DataFrame,
     max_vol: float = 5.0,  # uL
     volume_column: str = "EQUIMOLAR_VOLUME",
+    water_well_capacity: float = WATER_WELL_CAPACITY,  # uL
 ) -> pd.DataFrame:
-    water_required = (
-        max_vol - assembly_worksheet.groupby("Number").agg({volume_column: "sum"})
+    """Append water transfers bringing every reaction up to max_vol
+
+    The destination of each reaction is taken from its first part.
+    Water wells are assigned with assign_water_wells, filling each
+    with at most water_well_capacity uL.
+    """
+    reactions: pd.DataFrame = assembly_worksheet.groupby("Number", sort=True).agg(
+        {
+            volume_column: "sum",
+            "Destination Plate": "first",
+            "Destination Well": "first",
+        }
+    )
+    water_required: pd.DataFrame = reactions.assign(
+        **{volume_column: max_vol - reactions[volume_column]}
     ).reset_index()
     water_required["Part Name"] = "water"
-    water_required["Destination Plate"] = water_required["Number"].apply(
-        lambda number: assembly_worksheet.loc[
-            assembly_worksheet["Number"] == number, "Destination Plate"
-        ].values[0]
-    )
-    water_required["Destination Well"] = water_required["Number"].apply(
-        lambda number: assembly_worksheet.loc[
-            assembly_worksheet["Number"] == number, "Destination Well"
-        ].values[0]
-    )
     water_required = water_required.loc[
         ~np.isclose(water_required[volume_column], 0.0, atol=1e-3), :
     ]
-    water_required["Source Plate"] = "water_plate"
-    water_required["Source Well"] = (water_required[volume_column].cumsum() // 45) + 1
-    water_required["Source Plate"] = water_required["Source Well"].apply(
-        lambda well: f"water_plate_{int(well//384)+1}"
-    )
-    water_required["Source Well"] = water_required["Source Well"].apply(
-        index_to_384_well
+    water_required["Source Plate"], water_required["Source Well"] = assign_water_wells(
+        water_required[volume_column].to_numpy(), capacity=water_well_capacity
     )
     return pd.concat([assembly_worksheet, water_required])
 
@@ -110,7 +394,16 @@ def create_equimolar_assembly_instructions(
     max_fmol: float = 100.0,
     max_vol: float = 5.0,
     max_part_percentage: float = 1.0,
+    constraints: Optional[EchoTransferConstraints] = None,
+    water_well_capacity: float = WATER_WELL_CAPACITY,
 ) -> DataFrame[schemas.EquimolarAssemblyWorksheetSchema]:
+    """Part and water transfers giving equimolar assemblies
+
+    If constraints are given, volumes are solved with
+    solve_constrained_equimolar_assembly_rxns and water transfers are
+    quantized the same way, dropping those below the minimum transfer
+    volume. Otherwise volumes are continuous and truncated to whole nL.
+    """
     equimolar_worksheet = assembly_df.merge(
         quant_df,
         left_on=["Source Plate", "Source Well"],
@@ -121,20 +414,28 @@ def create_equimolar_assembly_instructions(
         (equimolar_worksheet["Conc (ng/uL)"] * 1e-6)
         / ((equimolar_worksheet["PART_LENGTH"] * 617.96) + 36.04)
     ) * 1e12
-    equimolar_worksheet["EQUIMOLAR_VOLUME"] = 0
-
-    for rxn in equimolar_worksheet["Number"].unique():
-        conc: np.ndarray = equimolar_worksheet.loc[
-            equimolar_worksheet["Number"] == rxn, "Conc (fmol/uL)"
-        ].values
-        vol: np.ndarray = optimize_equimolar_assembly_rxn(
-            conc=conc,
+    if constraints is None:
+        equimolar_worksheet["EQUIMOLAR_VOLUME"] = solve_equimolar_assembly_rxns(
+            conc=equimolar_worksheet["Conc (fmol/uL)"],
+            rxn=equimolar_worksheet["Number"],
             max_vol=max_vol * max_part_percentage,
             max_fmol=max_fmol,
         )
-        equimolar_worksheet.loc[
-            equimolar_worksheet["Number"] == rxn, "EQUIMOLAR_VOLUME"
-        ] = vol
+    else:
+        equimolar_worksheet[
+            "EQUIMOLAR_VOLUME"
+        ] = solve_constrained_equimolar_assembly_rxns(
+            conc=equimolar_worksheet["Conc (fmol/uL)"],
+            rxn=equimolar_worksheet["Number"],
+            source=(
+                equimolar_worksheet["Source Plate"].astype(str)
+                + "/"
+                + equimolar_worksheet["Source Well"].astype(str)
+            ),
+            max_vol=max_vol * max_part_percentage,
+            max_fmol=max_fmol,
+            constraints=constraints,
+        )
     equimolar_worksheet["fmol_used"] = (
         equimolar_worksheet["Conc (fmol/uL)"] * equimolar_worksheet["EQUIMOLAR_VOLUME"]
     )
@@ -142,8 +443,21 @@ def create_equimolar_assembly_instructions(
         assembly_worksheet=equimolar_worksheet,
         max_vol=max_vol,
         volume_column="EQUIMOLAR_VOLUME",
+        water_well_capacity=water_well_capacity,
     )
+    if constraints is None:
+        equimolar_worksheet["Transfer Volume"] = (
+            equimolar_worksheet["EQUIMOLAR_VOLUME"] * 1000
+        ).map(int)
+        return equimolar_worksheet
+    volumes: np.ndarray = equimolar_worksheet["EQUIMOLAR_VOLUME"].to_numpy()
+    water: np.ndarray = (equimolar_worksheet["Part Name"] == "water").to_numpy()
+    volumes = np.where(water, constraints.quantize(volumes), volumes)
+    equimolar_worksheet = equimolar_worksheet.assign(EQUIMOLAR_VOLUME=volumes).loc[
+        ~water | (volumes >= constraints.min_volume - 1e-9), :
+    ]
+    # Volumes are multiples of whole nL, so rounding only removes float error
     equimolar_worksheet["Transfer Volume"] = (
-        equimolar_worksheet["EQUIMOLAR_VOLUME"] * 1000
-    ).map(int)
+        (equimolar_worksheet["EQUIMOLAR_VOLUME"] * 1000).round().astype(int)
+    )
     return equimolar_worksheet
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import collections
+import hashlib
+import threading
+import time
+from typing import Any, Hashable, Optional, Tuple, Union
+
+
+def content_hash(*contents: Union[str, bytes]) -> str:
+    """Hash an ordered collection of strings/bytes into a hex digest
+
+    Each item is length-prefixed so that ("ab", "c") and ("a", "bc")
+    do not collide.
+
+    Examples
+    --------
+    >>> content_hash("ab", "c") == content_hash("a", "bc")
+    False
+    """
+    digest = hashlib.sha256()
+    for content in contents:
+        encoded: bytes = content.encode("utf8") if isinstance(content, str) else content
+        digest.update(str(len(encoded)).encode("utf8") + b":")
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Thread-safe in-memory LRU cache with optional time-to-live
+
+    Arguments
+    ---------
+    max_size : int
+        Maximum number of entries kept. The least recently used entry
+        is evicted once this is exceeded. A max_size of 0 disables
+        the cache.
+
+    ttl : float, optional
+        Seconds an entry stays valid after it was stored. None means
+        entries only leave the cache through size eviction.
+    """
+
+    def __init__(self, max_size: int = 16, ttl: Optional[float] = 3600.0) -> None:
+        if max_size < 0:
+            raise ValueError(f"Cache max_size must be non-negative: {max_size}")
+        self.max_size: int = max_size
+        self.ttl: Optional[float] = ttl
+        self._entries: collections.OrderedDict[
+            Hashable, Tuple[float, Any]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _expired(self, stored_time: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_time > self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry[0])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 
 import io
+import itertools
 import zipfile
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+import pandera as pa
 
+from app import schemas
 from app.api.utils.post_automation import create_plate_column, create_well_column
 from app.core.echo import create_echo_instructions
 from app.core.j5_to_echo_utils import stamp
+from app.core.picking import plate_wells
+from app.core.validation import validate_input
+from app.core.volume_ledger import DEFAULT_DEAD_VOLUME, DEFAULT_WELL_VOLUME
 
 # From:
 # https://arep.med.harvard.edu/labgc/adnan/projects/Utilities/revcomp.html
@@ -51,38 +58,334 @@ def slice_plasmid(template: str, start: int, stop: int) -> str:
         return template[start:] + template[:stop]
 
 
-def simulate_pcr(template: str, fwd_primer: str, rev_primer: str) -> Tuple[int, str]:
-    """Calculates length of PCR"""
-    template = template.upper()
-    start: int = template.find(fwd_primer.upper())
-    if start == -1:
+# Index of each base as a 2-bit code, or 4 when it cannot be indexed
+BASE_CODES: np.ndarray = np.full(256, 4, dtype=np.uint8)
+BASE_CODES[np.frombuffer(b"ACGT", dtype=np.uint8)] = np.arange(4)
+BINDING_SITE_COLUMNS: List[str] = [
+    "TEMPLATE",
+    "PRIMER",
+    "STRAND",
+    "START",
+    "MISMATCHES",
+]
+
+
+def encode_bases(dna: str) -> np.ndarray:
+    return BASE_CODES[np.frombuffer(dna.upper().encode("ascii"), dtype=np.uint8)]
+
+
+def kmer_codes(bases: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Code of every k-mer of bases and whether it only holds A, C, G, T"""
+    n_kmers: int = max(bases.size - k + 1, 0)
+    codes: np.ndarray = np.zeros(n_kmers, dtype=np.uint32)
+    for j in range(k):
+        codes <<= 2
+        codes |= bases[j : j + n_kmers] & 3
+    n_invalid: np.ndarray = np.r_[0, np.cumsum(bases == 4, dtype=np.int64)]
+    return codes, n_invalid[k : k + n_kmers] == n_invalid[:n_kmers]
+
+
+def find_binding_sites(template: str, primer: str) -> List[Tuple[int, int]]:
+    """(STRAND, START) of the exact binding sites of a primer on a
+    circular template, as given by PrimerIndex.binding_sites
+
+    Sites are found with str.find, which is faster than building a
+    PrimerIndex for a single pair of primers. Searching stops at the
+    second site, enough to tell whether the primer binds once.
+    """
+    sites: List[Tuple[int, int]] = []
+    # Sites across the origin start in the last bases of the template
+    extended: str = template + template[: len(primer) - 1]
+    for strand, site in ((1, primer), (-1, reverse_complement(primer))):
+        start: int = extended.find(site)
+        while start != -1 and len(sites) < 2:
+            sites.append((strand, start))
+            start = extended.find(site, start + 1)
+    return sites
+
+
+def amplify_sites(
+    sequence: str,
+    fwd_primer: str,
+    rev_primer: str,
+    fwd_sites: Sequence[Tuple[int, int]],
+    rev_sites: Sequence[Tuple[int, int]],
+    circular: bool = True,
+) -> Tuple[int, str]:
+    """PCR product of a template sequence from the (STRAND, START) of
+    each primer's binding sites"""
+    if not fwd_sites:
         raise PrimerWillNotAnneal(f"Forward primer: {fwd_primer}")
-    if template.find(fwd_primer.upper(), start + 1) != -1:
+    if len(fwd_sites) > 1:
         raise PrimerAnnealsMultipleTimes(f"Forward primer: {fwd_primer}")
-    stop: int = template.find(reverse_complement(rev_primer.upper()))
-    if stop == -1:
+    if not rev_sites:
         raise PrimerWillNotAnneal(f"Reverse primer: {rev_primer}")
-    if template.find(rev_primer.upper(), stop + 1) != -1:
+    if len(rev_sites) > 1:
         raise PrimerAnnealsMultipleTimes(f"Reverse primer: {rev_primer}")
-    pcr: str = slice_plasmid(
-        template=template, start=start, stop=stop + len(rev_primer)
+    (fwd_strand, fwd_start), (rev_strand, rev_start) = fwd_sites[0], rev_sites[0]
+    if fwd_strand == rev_strand:
+        # Both primers extend the same way, so there is no product
+        raise PrimerWillNotAnneal(f"Reverse primer: {rev_primer}")
+    start, stop = (
+        (fwd_start, rev_start + len(rev_primer))
+        if fwd_strand == 1
+        else (rev_start, fwd_start + len(fwd_primer))
     )
-    length: int = len(pcr)
-    return length, pcr
+    if circular:
+        pcr: str = slice_plasmid(
+            template=sequence, start=start, stop=stop % len(sequence)
+        )
+    elif stop > start:
+        pcr = sequence[start:stop]
+    else:
+        raise PrimerWillNotAnneal(f"Reverse primer: {rev_primer}")
+    if fwd_strand == -1:
+        pcr = reverse_complement(pcr)
+    return len(pcr), pcr
 
 
-def create_colony_pcr_instructions(
-    glycerol_file: io.StringIO,
-    plasmid_sequences_file: io.StringIO,
-    forward_primer: str,
-    reverse_primer: str,
-    username: str,
-    reaction_volume: int = 10,  # uL
-) -> io.BytesIO:
-    glycerol: pd.DataFrame = pd.read_csv(glycerol_file)
-    sequences: pd.DataFrame = pd.read_csv(plasmid_sequences_file)
+class PrimerIndex:
+    """Seed table of both strands of a set of templates
 
-    # 10 uL reactions
+    The table holds the code of every k-mer of the templates and is
+    built once. Each call to binding_sites then finds every primer it
+    is given in one pass over the table. A primer is looked up by its
+    3' seed, its last seed_length bases, which must match a template
+    exactly. The rest of the primer may differ from the template in up
+    to max_mismatches bases. Circular templates are indexed across
+    their origin, so binding sites and amplicons may span it.
+
+    Arguments
+    ---------
+    templates : Mapping[str, str]
+        Template sequences by name
+
+    seed_length : int
+        Length of the indexed k-mers, at most 16 and at most the length
+        of the shortest primer looked up
+
+    circular : bool
+        Whether templates are circular, like plasmids
+    """
+
+    def __init__(
+        self, templates: Mapping[str, str], seed_length: int = 12, circular: bool = True
+    ) -> None:
+        if not 0 < seed_length <= 16:
+            raise ValueError(f"Seed length must be between 1 and 16: {seed_length}")
+        self.seed_length: int = seed_length
+        self.circular: bool = circular
+        self.names: List[str] = list(templates)
+        self.sequences: Dict[str, str] = {
+            name: templates[name].upper() for name in self.names
+        }
+        # Top strands, then bottom strands, each read 5' to 3'
+        strands: List[np.ndarray] = [encode_bases(templates[n]) for n in self.names]
+        strands += [np.where(bases == 4, 4, 3 - bases)[::-1] for bases in strands]
+        self.lengths: np.ndarray = np.array([s.size for s in strands], dtype=np.int64)
+        self.offsets: np.ndarray = np.cumsum(self.lengths) - self.lengths
+        self.bases: np.ndarray = np.concatenate([np.empty(0, np.uint8), *strands])
+
+        # Strands are separated by an invalid base, after the start of
+        # circular strands that k-mers across the origin need
+        separator: np.ndarray = np.array([4], dtype=np.uint8)
+        extended: List[np.ndarray] = [
+            np.concatenate(
+                [bases, bases[: seed_length - 1 if circular else 0], separator]
+            )
+            for bases in strands
+        ]
+        extended_lengths: np.ndarray = np.array([e.size for e in extended], np.int64)
+        self.extended_offsets: np.ndarray = (
+            np.cumsum(extended_lengths) - extended_lengths
+        )
+        self.seed_codes, self.seed_valid = kmer_codes(
+            np.concatenate([np.empty(0, np.uint8), *extended]), seed_length
+        )
+
+    def binding_sites(
+        self, primers: Iterable[str], max_mismatches: int = 0
+    ) -> pd.DataFrame:
+        """Every site of every template that the primers bind
+
+        Arguments
+        ---------
+        primers : Iterable[str]
+            Primer sequences, 5' to 3'
+
+        max_mismatches : int
+            Mismatches allowed outside the 3' seed of each primer
+
+        Returns
+        -------
+        pd.DataFrame
+            TEMPLATE and PRIMER of each site, the STRAND of the template
+            the primer sequence matches (1 for the top strand, which the
+            primer extends towards its end), the START of the site on
+            the top strand, and its number of MISMATCHES
+        """
+        encoded: Dict[str, np.ndarray] = {}
+        for primer in primers:
+            bases: np.ndarray = encode_bases(primer)
+            if bases.size < self.seed_length:
+                raise ValueError(
+                    f"Primer is shorter than the seed length {self.seed_length}:"
+                    f" {primer}"
+                )
+            if (bases == 4).any():
+                raise ValueError(f"Primer holds bases other than A, C, G, T: {primer}")
+            encoded[primer] = bases
+        seeds: Dict[str, int] = {
+            primer: int(kmer_codes(bases[-self.seed_length :], self.seed_length)[0][0])
+            for primer, bases in encoded.items()
+        }
+        hits: np.ndarray = np.flatnonzero(
+            np.isin(self.seed_codes, list(seeds.values())) & self.seed_valid
+        )
+        hit_codes: np.ndarray = self.seed_codes[hits]
+        hit_strands: np.ndarray = (
+            np.searchsorted(self.extended_offsets, hits, side="right") - 1
+        )
+        hit_starts: np.ndarray = hits - self.extended_offsets[hit_strands]
+
+        n_templates: int = len(self.names)
+        sites: List[pd.DataFrame] = []
+        for primer, bases in encoded.items():
+            length: int = bases.size
+            is_seed: np.ndarray = hit_codes == seeds[primer]
+            strands: np.ndarray = hit_strands[is_seed]
+            n: np.ndarray = self.lengths[strands]
+            starts: np.ndarray = hit_starts[is_seed] - (length - self.seed_length)
+            if self.circular:
+                starts = starts % n
+            else:
+                in_template: np.ndarray = starts >= 0
+                strands, n = strands[in_template], n[in_template]
+                starts = starts[in_template]
+            windows: np.ndarray = self.offsets[strands, np.newaxis] + (
+                (starts[:, np.newaxis] + np.arange(length)) % n[:, np.newaxis]
+            )
+            mismatches: np.ndarray = (self.bases[windows] != bases).sum(axis=1)
+            close: np.ndarray = mismatches <= max_mismatches
+            strands, n = strands[close], n[close]
+            starts, mismatches = starts[close], mismatches[close]
+            top: np.ndarray = strands < n_templates
+            sites.append(
+                pd.DataFrame(
+                    {
+                        "TEMPLATE": np.array(self.names, dtype=object)[
+                            strands % n_templates
+                        ],
+                        "PRIMER": primer,
+                        "STRAND": np.where(top, 1, -1),
+                        "START": np.where(top, starts, (n - starts - length) % n),
+                        "MISMATCHES": mismatches,
+                    }
+                )
+            )
+        if not sites:
+            return pd.DataFrame(columns=BINDING_SITE_COLUMNS)
+        return pd.concat(sites, ignore_index=True)
+
+    def amplify(
+        self,
+        template: str,
+        fwd_primer: str,
+        rev_primer: str,
+        fwd_sites: Sequence[Tuple[int, int]],
+        rev_sites: Sequence[Tuple[int, int]],
+    ) -> Tuple[int, str]:
+        """PCR product of a template from the (STRAND, START) of each
+        primer's binding sites"""
+        return amplify_sites(
+            self.sequences[template],
+            fwd_primer,
+            rev_primer,
+            fwd_sites,
+            rev_sites,
+            circular=self.circular,
+        )
+
+    def simulate_pcrs(
+        self, reactions: pd.DataFrame, max_mismatches: int = 0, errors: str = "raise"
+    ) -> pd.DataFrame:
+        """Simulate many PCRs, looking all of their primers up at once
+
+        Arguments
+        ---------
+        reactions : pd.DataFrame
+            TEMPLATE, FORWARD_PRIMER and REVERSE_PRIMER of each PCR
+
+        max_mismatches : int
+            Mismatches allowed outside the 3' seed of each primer
+
+        errors : str
+            "raise" to raise PrimerWillNotAnneal or
+            PrimerAnnealsMultipleTimes for the first PCR without a single
+            product, or "coerce" to give it a PCR_LENGTH of 0
+
+        Returns
+        -------
+        pd.DataFrame
+            reactions with the PCR_LENGTH and PCR product of each
+        """
+        if errors not in ("raise", "coerce"):
+            raise ValueError(f"errors must be 'raise' or 'coerce', not {errors}")
+        sites: pd.DataFrame = self.binding_sites(
+            itertools.chain(reactions["FORWARD_PRIMER"], reactions["REVERSE_PRIMER"]),
+            max_mismatches=max_mismatches,
+        )
+        sites_of: Dict[Tuple[str, str], List[Tuple[int, int]]] = {
+            key: list(zip(group["STRAND"], group["START"]))
+            for key, group in sites.groupby(["TEMPLATE", "PRIMER"], sort=False)
+        }
+
+        def amplify(template: str, fwd_primer: str, rev_primer: str) -> Tuple[int, str]:
+            try:
+                return self.amplify(
+                    template,
+                    fwd_primer,
+                    rev_primer,
+                    sites_of.get((template, fwd_primer), []),
+                    sites_of.get((template, rev_primer), []),
+                )
+            except (PrimerWillNotAnneal, PrimerAnnealsMultipleTimes):
+                if errors == "raise":
+                    raise
+                return 0, ""
+
+        products: List[Tuple[int, str]] = [
+            amplify(template, fwd_primer, rev_primer)
+            for template, fwd_primer, rev_primer in zip(
+                reactions["TEMPLATE"],
+                reactions["FORWARD_PRIMER"],
+                reactions["REVERSE_PRIMER"],
+            )
+        ]
+        return reactions.assign(
+            PCR_LENGTH=[length for length, _ in products],
+            PCR=[pcr for _, pcr in products],
+        )
+
+
+def simulate_pcr(template: str, fwd_primer: str, rev_primer: str) -> Tuple[int, str]:
+    """Calculates length of PCR"""
+    template, fwd_primer, rev_primer = (
+        template.upper(),
+        fwd_primer.upper(),
+        rev_primer.upper(),
+    )
+    return amplify_sites(
+        template,
+        fwd_primer,
+        rev_primer,
+        find_binding_sites(template, fwd_primer),
+        find_binding_sites(template, rev_primer),
+    )
+
+
+def assign_ngs_wells(glycerol: pd.DataFrame, username: str) -> None:
+    """Stamp four glycerol plates into each NGS plate"""
     glycerol["NGS_PLATE"] = glycerol["GLYCEROL_PLATE"].apply(
         lambda plate: "{username} {plate_number} {date}".format(
             username=username,
@@ -98,23 +401,9 @@ def create_colony_pcr_instructions(
         axis=1,
     )
     glycerol["NGS_VOLUME"] = 100
-    glycerol["PRIMER1_SEQ"] = forward_primer
-    glycerol["PRIMER1_PLATE"] = "colony_pcr_primer_plate"
-    glycerol["PRIMER1_WELL"] = "O22"
-    glycerol["PRIMER1_VOLUME"] = 4 * reaction_volume
-    glycerol["PRIMER2_SEQ"] = reverse_primer
-    glycerol["PRIMER2_PLATE"] = "colony_pcr_primer_plate"
-    glycerol["PRIMER2_WELL"] = "O24"
-    glycerol["PRIMER2_VOLUME"] = 4 * reaction_volume
-    glycerol["PCR_LENGTH"] = glycerol["name"].apply(
-        lambda plasmid: simulate_pcr(
-            template=sequences.loc[sequences.Name == plasmid, "Bases"].values[0],
-            fwd_primer=forward_primer,
-            rev_primer=reverse_primer,
-        )[0]
-        if not pd.isna(plasmid)
-        else 0
-    )
+
+
+def assign_colony_pcr_wells(glycerol: pd.DataFrame) -> None:
     glycerol["COLONY_PCR_PLATE"] = create_plate_column(
         number=glycerol.shape[0],
         template="colony_pcr_plate_{}",
@@ -123,20 +412,324 @@ def create_colony_pcr_instructions(
     glycerol["COLONY_PCR_WELL"] = create_well_column(
         number=glycerol.shape[0], plate_size=96, how="col"
     )
+
+
+def colony_pcr_zip(files: Dict[str, pd.DataFrame]) -> io.BytesIO:
+    zip_results = io.BytesIO()
+    with zipfile.ZipFile(zip_results, "w") as archive:
+        for name, df in files.items():
+            archive.writestr(f"colony_pcr/{name}.csv", df.to_csv(index=False))
+    zip_results.seek(0)
+    return zip_results
+
+
+def create_colony_pcr_instructions(
+    glycerol_file: io.StringIO,
+    plasmid_sequences_file: io.StringIO,
+    forward_primer: str,
+    reverse_primer: str,
+    username: str,
+    reaction_volume: int = 10,  # uL
+    max_mismatches: int = 0,
+) -> io.BytesIO:
+    glycerol: pd.DataFrame = pd.read_csv(glycerol_file)
+    sequences: pd.DataFrame = pd.read_csv(plasmid_sequences_file)
+
+    # 10 uL reactions
+    assign_ngs_wells(glycerol, username=username)
+    glycerol["PRIMER1_SEQ"] = forward_primer
+    glycerol["PRIMER1_PLATE"] = "colony_pcr_primer_plate"
+    glycerol["PRIMER1_WELL"] = "O22"
+    glycerol["PRIMER1_VOLUME"] = 4 * reaction_volume
+    glycerol["PRIMER2_SEQ"] = reverse_primer
+    glycerol["PRIMER2_PLATE"] = "colony_pcr_primer_plate"
+    glycerol["PRIMER2_WELL"] = "O24"
+    glycerol["PRIMER2_VOLUME"] = 4 * reaction_volume
+    plasmids: pd.Index = pd.Index(glycerol["name"].dropna().unique())
+    templates: pd.Series = sequences.drop_duplicates("Name").set_index("Name")["Bases"]
+    pcr_lengths: pd.Series
+    if max_mismatches == 0:
+        # Exact matches of one primer pair are quicker to find with
+        # str.find than with a seed table of every plasmid
+        pcr_lengths = pd.Series(
+            {
+                plasmid: simulate_pcr(
+                    templates.loc[plasmid], forward_primer, reverse_primer
+                )[0]
+                for plasmid in plasmids
+            },
+            dtype=np.int64,
+        )
+    else:
+        pcr_lengths = (
+            PrimerIndex(
+                templates.loc[plasmids].to_dict(),
+                seed_length=min(12, len(forward_primer), len(reverse_primer)),
+            )
+            .simulate_pcrs(
+                pd.DataFrame(
+                    {
+                        "TEMPLATE": plasmids,
+                        "FORWARD_PRIMER": forward_primer.upper(),
+                        "REVERSE_PRIMER": reverse_primer.upper(),
+                    }
+                ),
+                max_mismatches=max_mismatches,
+            )
+            .set_index("TEMPLATE")["PCR_LENGTH"]
+        )
+    glycerol["PCR_LENGTH"] = glycerol["name"].map(pcr_lengths).fillna(0).astype(int)
+    assign_colony_pcr_wells(glycerol)
     colony_pcr_worksheet = glycerol
     colony_pcr_echo_instructions = create_echo_instructions(
         colony_pcr_worksheet, method="colony_pcr"
     )
+    return colony_pcr_zip(
+        {
+            "colony_pcr_worksheet": colony_pcr_worksheet,
+            "colony_pcr_echo_instructions": colony_pcr_echo_instructions,
+        }
+    )
 
-    zip_results = io.BytesIO()
-    with zipfile.ZipFile(zip_results, "w") as archive:
-        archive.writestr(
-            "colony_pcr/colony_pcr_worksheet.csv",
-            colony_pcr_worksheet.to_csv(index=False),
+
+def choose_primer_pairs(
+    templates: Mapping[str, str],
+    primer_pairs: pd.DataFrame,
+    min_length: int = 100,
+    max_length: int = 5000,
+    max_mismatches: int = 0,
+) -> pd.DataFrame:
+    """Choose the primer pair to check each template with
+
+    A pair can check a template when it gives a single product there,
+    of min_length to max_length bp. Of those pairs, the one whose
+    product differs most in size from the products it gives on the
+    other templates is chosen, so that a colony of the wrong construct
+    shows up on the gel. Ties go to the pair listed first.
+
+    Arguments
+    ---------
+    templates : Mapping[str, str]
+        Sequences of the constructs by name
+
+    primer_pairs : pd.DataFrame
+        NAME, FORWARD_PRIMER and REVERSE_PRIMER of each available pair
+
+    min_length, max_length : int
+        Range of product sizes (in bp) that can be told apart on a gel
+
+    max_mismatches : int
+        Mismatches allowed outside the 3' seed of each primer
+
+    Returns
+    -------
+    pd.DataFrame
+        TEMPLATE, the chosen PRIMER_PAIR with its FORWARD_PRIMER and
+        REVERSE_PRIMER, PCR_LENGTH and SEPARATION, the smallest
+        difference in size to the product of another template (inf when
+        it amplifies no other template). Templates that no pair can
+        check have no PRIMER_PAIR and a PCR_LENGTH of 0.
+    """
+    missing: List[str] = sorted(
+        {"NAME", "FORWARD_PRIMER", "REVERSE_PRIMER"} - set(primer_pairs.columns)
+    )
+    if missing:
+        raise ValueError(f"Primer pairs are missing columns: {missing}")
+    if primer_pairs.empty:
+        raise ValueError("No primer pairs to choose from")
+    pairs: pd.DataFrame = pd.DataFrame(
+        {
+            "PRIMER_PAIR": primer_pairs["NAME"].to_numpy(),
+            "FORWARD_PRIMER": primer_pairs["FORWARD_PRIMER"].str.upper().to_numpy(),
+            "REVERSE_PRIMER": primer_pairs["REVERSE_PRIMER"].str.upper().to_numpy(),
+            "PAIR_ORDER": np.arange(primer_pairs.shape[0]),
+        }
+    )
+    seed_length: int = min(
+        12, *pairs["FORWARD_PRIMER"].str.len(), *pairs["REVERSE_PRIMER"].str.len()
+    )
+    pcrs: pd.DataFrame = PrimerIndex(templates, seed_length=seed_length).simulate_pcrs(
+        pd.DataFrame({"TEMPLATE": list(templates)}).merge(pairs, how="cross"),
+        max_mismatches=max_mismatches,
+        errors="coerce",
+    )
+    # Size difference to the nearest product of the same pair
+    pcrs = pcrs.loc[pcrs["PCR_LENGTH"] > 0].sort_values(
+        ["PAIR_ORDER", "PCR_LENGTH"], kind="stable"
+    )
+    same_pair: pd.core.groupby.SeriesGroupBy = pcrs.groupby("PAIR_ORDER")["PCR_LENGTH"]
+    pcrs["SEPARATION"] = np.fmin(
+        same_pair.diff().abs(), same_pair.diff(-1).abs()
+    ).fillna(np.inf)
+    candidates: pd.DataFrame = pcrs.loc[
+        pcrs["PCR_LENGTH"].between(min_length, max_length)
+    ].sort_values(["SEPARATION", "PAIR_ORDER"], ascending=[False, True], kind="stable")
+    chosen: pd.DataFrame = candidates.drop_duplicates("TEMPLATE").set_index("TEMPLATE")
+    return (
+        chosen.reindex(list(templates))
+        .rename_axis("TEMPLATE")
+        .reset_index()
+        .loc[
+            :,
+            [
+                "TEMPLATE",
+                "PRIMER_PAIR",
+                "FORWARD_PRIMER",
+                "REVERSE_PRIMER",
+                "PCR_LENGTH",
+                "SEPARATION",
+            ],
+        ]
+        .fillna({"PCR_LENGTH": 0})
+        .astype({"PCR_LENGTH": int})
+    )
+
+
+def assign_primer_wells(
+    primer_sequences: pd.Series,
+    volume: int,
+    plate_format: int = 384,
+    well_volume: float = DEFAULT_WELL_VOLUME,
+    dead_volume: float = DEFAULT_DEAD_VOLUME,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Source wells of the primers of a set of reactions
+
+    Each primer gets as many wells as its reactions need, and its
+    reactions draw from them in turn, one well after the other.
+
+    Arguments
+    ---------
+    primer_sequences : pd.Series
+        Primer of each transfer, in the order they are made
+
+    volume : int
+        Volume of each transfer (in nL)
+
+    plate_format : int
+        Number of wells of the primer plates
+
+    well_volume, dead_volume : float
+        Volume loaded in each well and volume that cannot be transferred
+        (in uL)
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        PLATE and WELL of each transfer, and the primer plates with the
+        PLATE, WELL, SEQUENCE and VOLUME (in uL) to load in each well
+    """
+    usable: int = int((well_volume - dead_volume) * 1000)
+    if volume > usable:
+        raise ValueError(
+            f"Primer transfers of {volume} nL do not fit in wells of {well_volume} uL"
         )
-        archive.writestr(
-            "colony_pcr/colony_pcr_echo_instructions.csv",
-            colony_pcr_echo_instructions.to_csv(index=False),
+    per_well: int = usable // volume
+    codes, sequences = pd.factorize(primer_sequences)
+    uses: np.ndarray = np.bincount(codes, minlength=sequences.size)
+    n_wells: np.ndarray = -(-uses // per_well)
+    first_well: np.ndarray = np.cumsum(n_wells) - n_wells
+    # Index of each transfer among those of its primer
+    order: np.ndarray = np.argsort(codes, kind="stable")
+    use_index: np.ndarray = np.empty_like(codes)
+    use_index[order] = np.arange(codes.size) - np.repeat(np.cumsum(uses) - uses, uses)
+    well_index: np.ndarray = first_well[codes] + use_index // per_well
+    wells: np.ndarray = plate_wells(plate_format=plate_format)
+    plate_index, plate_well = np.divmod(np.arange(n_wells.sum()), wells.size)
+    plate_names: np.ndarray = np.char.add(
+        "colony_pcr_primer_plate_", (plate_index + 1).astype(str)
+    )
+    well_names: np.ndarray = wells[plate_well]
+    well_uses: np.ndarray = np.bincount(well_index, minlength=n_wells.sum())
+    primer_plates: pd.DataFrame = pd.DataFrame(
+        {
+            "PLATE": plate_names,
+            "WELL": well_names,
+            "SEQUENCE": np.repeat(np.asarray(sequences), n_wells),
+            "VOLUME": well_uses * volume / 1000 + dead_volume,
+        }
+    )
+    transfers: pd.DataFrame = pd.DataFrame(
+        {"PLATE": plate_names[well_index], "WELL": well_names[well_index]},
+        index=primer_sequences.index,
+    )
+    return transfers, primer_plates
+
+
+def create_multi_primer_colony_pcr_instructions(
+    glycerol_file: io.StringIO,
+    plasmid_sequences_file: io.StringIO,
+    primer_pairs_file: io.StringIO,
+    username: str,
+    reaction_volume: int = 10,  # uL
+    min_length: int = 100,
+    max_length: int = 5000,
+    max_mismatches: int = 0,
+) -> io.BytesIO:
+    """Colony PCR instructions choosing a primer pair for each construct
+
+    See choose_primer_pairs for how pairs are chosen from those in
+    primer_pairs_file, and assign_primer_wells for how the primer plates
+    are laid out. Colonies of constructs no pair can check get no
+    primers. Raises ValueError when primer_pairs_file does not match
+    PrimerPairsSchema or holds no pairs.
+    """
+    glycerol: pd.DataFrame = pd.read_csv(glycerol_file)
+    sequences: pd.DataFrame = pd.read_csv(plasmid_sequences_file)
+    try:
+        primer_pairs: pd.DataFrame = validate_input(
+            schemas.PrimerPairsSchema, pd.read_csv(primer_pairs_file)
         )
-    zip_results.seek(0)
-    return zip_results
+    except (pa.errors.SchemaError, pd.errors.EmptyDataError) as e:
+        raise ValueError(f"Invalid primer pairs file: {e}") from e
+
+    assign_ngs_wells(glycerol, username=username)
+    plasmids: pd.Index = pd.Index(glycerol["name"].dropna().unique())
+    templates: pd.Series = sequences.drop_duplicates("Name").set_index("Name")["Bases"]
+    choices: pd.DataFrame = choose_primer_pairs(
+        templates.loc[plasmids].to_dict(),
+        primer_pairs,
+        min_length=min_length,
+        max_length=max_length,
+        max_mismatches=max_mismatches,
+    )
+    chosen: pd.DataFrame = choices.set_index("TEMPLATE").reindex(glycerol["name"])
+    glycerol["PRIMER_PAIR"] = chosen["PRIMER_PAIR"].to_numpy()
+    glycerol["PCR_LENGTH"] = chosen["PCR_LENGTH"].fillna(0).astype(int).to_numpy()
+    checked: pd.Series = glycerol["PRIMER_PAIR"].notna()
+
+    # Forward then reverse primer of each reaction, in reaction order
+    primer_transfers: pd.Series = pd.Series(
+        np.column_stack(
+            [
+                chosen["FORWARD_PRIMER"].to_numpy()[checked],
+                chosen["REVERSE_PRIMER"].to_numpy()[checked],
+            ]
+        ).ravel()
+    )
+    primer_volume: int = 4 * reaction_volume  # nL
+    source_wells, primer_plates = assign_primer_wells(
+        primer_transfers, volume=primer_volume
+    )
+    for i, (primer, direction) in enumerate(
+        [("PRIMER1", "FORWARD"), ("PRIMER2", "REVERSE")]
+    ):
+        glycerol[f"{primer}_SEQ"] = chosen[f"{direction}_PRIMER"].to_numpy()
+        glycerol[f"{primer}_PLATE"] = None
+        glycerol[f"{primer}_WELL"] = None
+        glycerol.loc[
+            checked, [f"{primer}_PLATE", f"{primer}_WELL"]
+        ] = source_wells.iloc[i::2].to_numpy()
+        glycerol[f"{primer}_VOLUME"] = np.where(checked, primer_volume, 0)
+    assign_colony_pcr_wells(glycerol)
+    colony_pcr_worksheet = glycerol
+    colony_pcr_echo_instructions = create_echo_instructions(
+        colony_pcr_worksheet.loc[checked], method="colony_pcr"
+    )
+    return colony_pcr_zip(
+        {
+            "colony_pcr_worksheet": colony_pcr_worksheet,
+            "colony_pcr_echo_instructions": colony_pcr_echo_instructions,
+            "colony_pcr_primer_pairs": choices,
+            "colony_pcr_primer_plates": primer_plates,
+        }
+    )
@@ -1,9 +1,101 @@
 #!/usr/bin/env python3
 
+from typing import List, Optional, Sequence
+
+import numpy as np
+from Bio.Data import CodonTable
 from Bio.Seq import Seq
 
+from app.core.cache import ResultCache, content_hash
+
+# Translations already made, by content_hash of their DNA sequence
+TRANSLATION_CACHE: ResultCache = ResultCache(max_size=65536, ttl=None)
+
+
+def codon_letters(table_id: int = 1) -> np.ndarray:
+    """Amino acid of each codon, indexed by 16 * first + 4 * second + third
+    base with A, C, G, T as 0 to 3, and * for stop codons"""
+    table = CodonTable.unambiguous_dna_by_id[table_id]
+    letters = np.full(64, ord("*"), dtype=np.uint8)
+    for codon, aa in table.forward_table.items():
+        if "U" not in codon:
+            first, second, third = ("ACGT".index(base) for base in codon)
+            letters[16 * first + 4 * second + third] = ord(aa)
+    return letters
+
+
+def base_index() -> np.ndarray:
+    """Index of each byte as a base, or 4 when it is not A, C, G or T"""
+    index = np.full(256, 4, dtype=np.uint8)
+    for i, base in enumerate("ACGT"):
+        index[ord(base)] = index[ord(base.lower())] = i
+    return index
+
+
+CODON_LETTERS: np.ndarray = codon_letters()
+BASE_INDEX: np.ndarray = base_index()
+
 
 def translate_dna_to_aa(dna: str) -> str:
     if len(dna) % 3 != 0:
         return ""
     return str(Seq(dna).translate())
+
+
+def translate_codons(dnas: Sequence[str]) -> List[Optional[str]]:
+    """Translate sequences of unambiguous codons in one pass over their bases
+
+    Sequences holding anything else are None.
+    """
+    lengths: np.ndarray = np.fromiter((len(dna) for dna in dnas), dtype=np.int64)
+    try:
+        bases: np.ndarray = BASE_INDEX[
+            np.frombuffer("".join(dnas).encode("ascii"), dtype=np.uint8)
+        ]
+    except UnicodeEncodeError:
+        return [None] * len(dnas)
+    codons: np.ndarray = bases.reshape(-1, 3)
+    invalid: np.ndarray = (codons == 4).any(axis=1)
+    codon_ends: np.ndarray = np.cumsum(lengths // 3)
+    n_invalid: np.ndarray = np.diff(np.cumsum(np.r_[0, invalid])[np.r_[0, codon_ends]])
+    # Invalid codons are masked into range and discarded below
+    aas: bytes = CODON_LETTERS[
+        (16 * codons[:, 0] + 4 * codons[:, 1] + codons[:, 2]) & 63
+    ].tobytes()
+    return [
+        None if n_invalid[i] else aas[end - length // 3 : end].decode("ascii")
+        for i, (length, end) in enumerate(zip(lengths, codon_ends))
+    ]
+
+
+def translate_dna_to_aa_batch(dnas: Sequence[str]) -> List[str]:
+    """Translate DNA sequences with the standard codon table
+
+    Gives the same result as translate_dna_to_aa for each sequence.
+    Translations are looked up in TRANSLATION_CACHE, then sequences of
+    unambiguous codons are translated together with numpy, and the rest
+    with Biopython.
+
+    Arguments
+    ---------
+    dnas : Sequence[str]
+        DNA sequences, e.g. part sequences
+
+    Returns
+    -------
+    List[str]
+        Amino acid sequences, empty for sequences whose length is not a
+        multiple of three
+    """
+    keys: List[str] = [content_hash(dna) for dna in dnas]
+    aas: List[Optional[str]] = [TRANSLATION_CACHE.get(key) for key in keys]
+    missing: List[int] = [
+        i for i, aa in enumerate(aas) if aa is None and len(dnas[i]) % 3 == 0
+    ]
+    for i in range(len(dnas)):
+        if aas[i] is None and len(dnas[i]) % 3 != 0:
+            aas[i] = ""
+    for i, aa in zip(missing, translate_codons([dnas[i] for i in missing])):
+        aas[i] = translate_dna_to_aa(dnas[i]) if aa is None else aa
+        TRANSLATION_CACHE.set(keys[i], aas[i])
+    return [str(aa) for aa in aas]
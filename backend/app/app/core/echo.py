@@ -1,12 +1,366 @@
+from dataclasses import asdict, astuple, dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
 import pandas as pd
 from app import schemas
-from pandera import check_types
+from app.core.validation import check_types
 from pandera.typing import DataFrame
 
+ECHO_COLUMNS: List[str] = [
+    "Source Plate Name",
+    "Source Well",
+    "Destination Plate Name",
+    "Destination Well",
+    "Transfer Volume",
+]
+# Rough timings of an Echo 525 used to estimate run times (in seconds)
+ECHO_PLATE_LOAD_SECONDS: float = 15.0
+ECHO_TRANSFER_SECONDS: float = 0.1
+ECHO_DROPLET_SECONDS: float = 0.002
+ECHO_WELL_MOVE_SECONDS: float = 0.02
+ECHO_DROPLET_NL: float = 2.5
+
+
+@dataclass
+class EchoRunEstimate:
+    """Estimated cost of running a set of Echo instructions
+
+    Plate loads count every time the source or destination plate has to
+    be changed, including the first load. travel_wells is the distance
+    the source plate moves between transfers, in well pitches.
+    """
+
+    transfers: int
+    source_plate_loads: int
+    destination_plate_loads: int
+    travel_wells: float
+    seconds: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def well_coordinates(wells: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Zero-based (row, column) of well names like A1, P24 or AF48
+
+    Only the distinct well names are parsed, so this is fast for long
+    lists of transfers between a few hundred wells.
+    """
+    codes, names = pd.factorize(wells.astype(str).str.upper())
+    parts: pd.DataFrame = pd.Series(names).str.extract(r"^([A-Z]{1,2})(\d+)$")
+    if parts.isna().any(axis=None):
+        raise ValueError(f"Invalid wells {sorted(names[parts[0].isna().to_numpy()])}")
+    letters: pd.Series = parts[0]
+    rows: np.ndarray = np.where(
+        letters.str.len() == 1,
+        letters.str[0].map(ord) - ord("A"),
+        26 + letters.str[-1].map(ord) - ord("A"),
+    ).astype(int)
+    columns: np.ndarray = parts[1].astype(int).to_numpy() - 1
+    return rows[codes], columns[codes]
+
+
+def plate_pair_order(pairs: pd.DataFrame) -> pd.Series:
+    """Rank of each (source plate, destination plate) pair
+
+    Source plates are visited one at a time, in natural order. Within a
+    source plate, destination plates are visited in natural order,
+    except that the destination plate loaded last for the previous
+    source plate goes first, saving a destination plate swap.
+
+    Arguments
+    ---------
+    pairs : pd.DataFrame
+        Unique Source Plate Name, Destination Plate Name pairs
+    """
+    ranks: Dict[Tuple[str, str], int] = {}
+    last_destination: Any = None
+    for source, destinations in pairs.groupby("Source Plate Name", sort=False)[
+        "Destination Plate Name"
+    ]:
+        ordered: List[str] = list(destinations)
+        if last_destination in ordered:
+            ordered.remove(last_destination)
+            ordered.insert(0, last_destination)
+        for destination in ordered:
+            ranks[(source, destination)] = len(ranks)
+        last_destination = ordered[-1]
+    return pd.Series(
+        [
+            ranks[pair]
+            for pair in zip(pairs["Source Plate Name"], pairs["Destination Plate Name"])
+        ],
+        index=pairs.index,
+    )
+
+
+def natural_key(values: pd.Series) -> pd.Series:
+    """Sort key ordering names like plate_2 before plate_10"""
+    numbers: pd.Series = (
+        values.astype(str).str.extract(r"(\d+)$", expand=False).fillna(-1).astype(int)
+    )
+    prefixes: pd.Series = values.astype(str).str.replace(r"\d+$", "", regex=True)
+    return prefixes.rank(method="dense") * (numbers.max() + 2) + numbers
+
+
+@check_types()
+def optimize_echo_instructions(
+    instructions: DataFrame[schemas.EchoInstructionsSchema],
+) -> DataFrame[schemas.EchoInstructionsSchema]:
+    """Reorder and merge Echo transfers to shorten the run
+
+    Transfers with the same source and destination wells are merged by
+    summing their volumes. Transfers are grouped by (source plate,
+    destination plate) pair in the order of plate_pair_order, so each
+    plate is loaded as few times as possible. Within a pair, source
+    wells are visited along a serpentine path: left to right on even
+    rows and right to left on odd rows, with destination wells ordered
+    the same way for a shared source well.
+
+    Arguments
+    ---------
+    instructions : pd.DataFrame
+        Echo instructions, e.g. from create_echo_instructions
+
+    Returns
+    -------
+    pd.DataFrame
+        Optimized Echo instructions
+    """
+    if instructions.empty:
+        return instructions.loc[:, ECHO_COLUMNS].reset_index(drop=True)
+    merged: pd.DataFrame = (
+        instructions.groupby(ECHO_COLUMNS[:4], sort=False)["Transfer Volume"]
+        .sum()
+        .reset_index()
+    )
+    source_rows, source_columns = well_coordinates(merged["Source Well"])
+    destination_rows, destination_columns = well_coordinates(merged["Destination Well"])
+    pairs: pd.DataFrame = (
+        merged[["Source Plate Name", "Destination Plate Name"]]
+        .drop_duplicates()
+        .assign(
+            source_key=lambda pairs: natural_key(pairs["Source Plate Name"]),
+            destination_key=lambda pairs: natural_key(pairs["Destination Plate Name"]),
+        )
+        .sort_values(["source_key", "destination_key"])
+    )
+    pairs["PAIR_ORDER"] = plate_pair_order(pairs)
+    keys: pd.DataFrame = pd.DataFrame(
+        {
+            "PAIR_ORDER": merged.merge(
+                pairs, on=["Source Plate Name", "Destination Plate Name"], how="left"
+            )["PAIR_ORDER"].to_numpy(),
+            "SOURCE_ROW": source_rows,
+            "SOURCE_COLUMN": np.where(
+                source_rows % 2 == 0, source_columns, -source_columns
+            ),
+            "DESTINATION_ROW": destination_rows,
+            "DESTINATION_COLUMN": np.where(
+                destination_rows % 2 == 0, destination_columns, -destination_columns
+            ),
+        }
+    )
+    order: np.ndarray = np.lexsort(
+        [keys[column].to_numpy() for column in reversed(keys.columns)]
+    )
+    return merged.iloc[order].reset_index(drop=True)
+
+
+def estimate_echo_run_time(instructions: pd.DataFrame) -> EchoRunEstimate:
+    """Estimate how long the Echo takes to run instructions in order
+
+    Uses ECHO_PLATE_LOAD_SECONDS per plate load, ECHO_TRANSFER_SECONDS
+    per transfer, ECHO_DROPLET_SECONDS per droplet and
+    ECHO_WELL_MOVE_SECONDS per well pitch the source plate moves (the
+    larger of the row and column distance).
+    """
+    if instructions.empty:
+        return EchoRunEstimate(0, 0, 0, 0.0, 0.0)
+    source_plates: np.ndarray = instructions["Source Plate Name"].to_numpy()
+    destination_plates: np.ndarray = instructions["Destination Plate Name"].to_numpy()
+    source_changes: np.ndarray = np.concatenate(
+        [[True], source_plates[1:] != source_plates[:-1]]
+    )
+    destination_changes: np.ndarray = np.concatenate(
+        [[True], destination_plates[1:] != destination_plates[:-1]]
+    )
+    rows, columns = well_coordinates(instructions["Source Well"])
+    moves: np.ndarray = np.maximum(
+        np.abs(np.diff(rows, prepend=rows[0])),
+        np.abs(np.diff(columns, prepend=columns[0])),
+    )
+    travel_wells: float = float(moves[~source_changes].sum())
+    droplets: float = float(
+        np.ceil(instructions["Transfer Volume"].to_numpy() / ECHO_DROPLET_NL).sum()
+    )
+    seconds: float = (
+        (source_changes.sum() + destination_changes.sum()) * ECHO_PLATE_LOAD_SECONDS
+        + instructions.shape[0] * ECHO_TRANSFER_SECONDS
+        + droplets * ECHO_DROPLET_SECONDS
+        + travel_wells * ECHO_WELL_MOVE_SECONDS
+    )
+    return EchoRunEstimate(
+        transfers=int(instructions.shape[0]),
+        source_plate_loads=int(source_changes.sum()),
+        destination_plate_loads=int(destination_changes.sum()),
+        travel_wells=travel_wells,
+        seconds=float(seconds),
+    )
+
+
+def echo_run_time_report(instruction_sets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """EchoRunEstimate of each named set of Echo instructions"""
+    return pd.DataFrame(
+        [
+            {"INSTRUCTIONS": name, **estimate_echo_run_time(instructions).to_dict()}
+            for name, instructions in instruction_sets.items()
+        ]
+    )
+
+
+@dataclass(frozen=True)
+class EchoTransferColumns:
+    """Worksheet columns describing one Echo transfer per row
+
+    volume is either the name of a column holding the transfer volumes
+    (in nL) or a volume used for every row.
+    """
+
+    source_plate: str
+    source_well: str
+    destination_plate: str
+    destination_well: str
+    volume: Union[str, int, float]
+
+
+# Transfers of a method, or a function listing them for a given worksheet
+EchoMethod = Union[
+    Sequence[EchoTransferColumns],
+    Callable[[pd.DataFrame], Sequence[EchoTransferColumns]],
+]
+
+
+def pcr_transfers(
+    destination_plate: str, destination_well: str, template: str = "TEMPLATE"
+) -> List[EchoTransferColumns]:
+    """Primer 1, primer 2 and template transfers of a PCR worksheet"""
+    return [
+        EchoTransferColumns(
+            f"{source}_PLATE",
+            f"{source}_WELL",
+            destination_plate,
+            destination_well,
+            f"{source}_VOLUME",
+        )
+        for source in ("PRIMER1", "PRIMER2", template)
+    ]
+
+
+def custom_assembly_transfers(worksheet: pd.DataFrame) -> List[EchoTransferColumns]:
+    """One transfer per Part(s) column of a custom assembly worksheet"""
+    return [
+        EchoTransferColumns(
+            f"{part} Source Plate",
+            f"{part} Well",
+            "Assembly Plate",
+            "Assembly Well",
+            2000,  # nL
+        )
+        for part in worksheet.columns
+        if part.startswith("Part(s)")
+        and not part.endswith(("ID", "Source Plate", "Well"))
+    ]
+
+
+ECHO_METHODS: Dict[str, EchoMethod] = {
+    "pcr": pcr_transfers("OUTPUT_PLATE", "OUTPUT_WELL"),
+    "redo_pcr": pcr_transfers("REDO_PLATE", "REDO_WELL"),
+    "colony_pcr": pcr_transfers("COLONY_PCR_PLATE", "COLONY_PCR_WELL", template="NGS"),
+    "assembly": [
+        EchoTransferColumns(
+            "Source Plate",
+            "Source Well",
+            "Destination Plate",
+            "Destination Well",
+            2000,  # nL
+        )
+    ],
+    "equimolar": [
+        EchoTransferColumns(
+            "Source Plate",
+            "Source Well",
+            "Destination Plate",
+            "Destination Well",
+            "Transfer Volume",
+        )
+    ],
+    "zag": [
+        EchoTransferColumns(
+            "PARTS_SOURCE_PLATE", "PARTS_WELL", "ZAG_PLATE", "ZAG_WELL", 500
+        )
+    ],
+    "quant": [
+        EchoTransferColumns(
+            "PART_PLATE", "PART_WELL", "QUANT_PLATE", "QUANT_WELL", "QUANT_VOLUME"
+        )
+    ],
+    "custom": custom_assembly_transfers,
+}
+
+
+def register_echo_method(
+    name: str, transfers: EchoMethod, replace: bool = False
+) -> None:
+    """Make a worksheet type available to create_echo_instructions
+
+    Arguments
+    ---------
+    name : str
+        Name of the method passed to create_echo_instructions
+
+    transfers : EchoMethod
+        The EchoTransferColumns of each worksheet row, or a function
+        returning them for a given worksheet
+
+    replace : bool, optional
+        Replace a method already registered under name
+    """
+    if name in ECHO_METHODS and not replace:
+        raise ValueError(f"Echo method {name} is already registered")
+    ECHO_METHODS[name] = transfers
+
+
+def stack_transfers(
+    worksheet: pd.DataFrame, transfers: Sequence[EchoTransferColumns]
+) -> pd.DataFrame:
+    """Echo instructions with the rows of each transfer one after the other
+
+    Each output column is built with a single concatenation of the
+    worksheet columns it is taken from.
+    """
+    n_rows: int = worksheet.shape[0]
+    return pd.DataFrame(
+        {
+            column: np.concatenate(
+                [
+                    worksheet[value].to_numpy()
+                    if isinstance(value, str)
+                    else np.full(n_rows, value)
+                    for value in values
+                ]
+            )
+            for column, values in zip(
+                ECHO_COLUMNS, zip(*(astuple(transfer) for transfer in transfers))
+            )
+        }
+    )
+
 
 @check_types()
 def create_echo_instructions(
-    worksheet: pd.DataFrame, method: str
+    worksheet: pd.DataFrame, method: str, optimize: bool = False
 ) -> DataFrame[schemas.EchoInstructionsSchema]:
     """Given a worksheet, create echo instructions
 
@@ -17,8 +371,12 @@ def create_echo_instructions(
         about how to set up PCR or assembly rxns
 
     method : str
-        The type of worksheet given. Can be either
-        'pcr', 'assembly', or 'zag'
+        The type of worksheet given, one of ECHO_METHODS, e.g. 'pcr',
+        'assembly' or 'zag'. More can be added with register_echo_method
+
+    optimize : bool, optional
+        Merge and reorder the transfers with optimize_echo_instructions
+        instead of sorting them by plate and well name
 
     Returns
     -------
@@ -26,240 +384,23 @@ def create_echo_instructions(
         A pandas dataframe that contains echo
         instructions
     """
-    if worksheet.empty:
-        return pd.DataFrame(
-            columns=[
-                "Source Plate Name",
-                "Source Well",
-                "Destination Plate Name",
-                "Destination Well",
-                "Transfer Volume",
-            ]
-        )
-    echoPlate = pd.DataFrame()
-    if method == "pcr":
-        echoPlate["Source Plate Name"] = pd.concat(
-            [
-                worksheet["PRIMER1_PLATE"],
-                worksheet["PRIMER2_PLATE"],
-                worksheet["TEMPLATE_PLATE"],
-            ],
-            axis=0,
-        )
-        echoPlate["Source Well"] = pd.concat(
-            [
-                worksheet["PRIMER1_WELL"],
-                worksheet["PRIMER2_WELL"],
-                worksheet["TEMPLATE_WELL"],
-            ],
-            axis=0,
-        )
-        echoPlate["Destination Plate Name"] = pd.concat(
-            [
-                worksheet["OUTPUT_PLATE"],
-                worksheet["OUTPUT_PLATE"],
-                worksheet["OUTPUT_PLATE"],
-            ],
-            axis=0,
+    if method not in ECHO_METHODS:
+        raise ValueError(
+            f"Echo method must be one of {list(ECHO_METHODS)}, not {method}"
         )
-        echoPlate["Destination Well"] = pd.concat(
-            [
-                worksheet["OUTPUT_WELL"],
-                worksheet["OUTPUT_WELL"],
-                worksheet["OUTPUT_WELL"],
-            ],
-            axis=0,
-        )
-        echoPlate["Transfer Volume"] = pd.concat(
-            [
-                worksheet["PRIMER1_VOLUME"],
-                worksheet["PRIMER2_VOLUME"],
-                worksheet["TEMPLATE_VOLUME"],
-            ],
-            axis=0,
-        )
-    elif method == "assembly":
-        echoPlate = worksheet.loc[
-            :,
-            [
-                "Source Plate",
-                "Source Well",
-                "Destination Plate",
-                "Destination Well",
-            ],
-        ]
-        echoPlate["Transfer Volume"] = 2000  # nL
-        echoPlate = echoPlate.rename(
-            columns={
-                "Source Plate": "Source Plate Name",
-                "Destination Plate": "Destination Plate Name",
-            }
-        )
-    elif method == "equimolar":
-        echoPlate = worksheet.loc[
-            :,
-            [
-                "Source Plate",
-                "Source Well",
-                "Destination Plate",
-                "Destination Well",
-                "Transfer Volume",
-            ],
-        ]
-        echoPlate = echoPlate.rename(
-            columns={
-                "Source Plate": "Source Plate Name",
-                "Destination Plate": "Destination Plate Name",
-            }
-        )
-    elif method == "zag":
-        echoPlate = worksheet.loc[
-            :,
-            ["PARTS_SOURCE_PLATE", "PARTS_WELL", "ZAG_PLATE", "ZAG_WELL"],
-        ].copy()
-        echoPlate["Transfer Volume"] = 500
-        echoPlate.columns = [
+    if worksheet.empty:
+        return pd.DataFrame(columns=ECHO_COLUMNS)
+    transfers: EchoMethod = ECHO_METHODS[method]
+    if callable(transfers):
+        transfers = transfers(worksheet)
+    echoPlate: pd.DataFrame = stack_transfers(worksheet, transfers).dropna()
+    if optimize:
+        return optimize_echo_instructions(echoPlate)
+    return echoPlate.sort_values(
+        [
             "Source Plate Name",
-            "Source Well",
             "Destination Plate Name",
-            "Destination Well",
-            "Transfer Volume",
-        ]
-    elif method == "custom":
-        partColumnHeaders = [
-            column
-            for column in worksheet.columns
-            if (column.startswith("Part(s)"))
-            and (not column.endswith(("ID", "Source Plate", "Well")))
-        ]
-        echoPlate["Source Plate Name"] = pd.concat(
-            [worksheet[f"{part} Source Plate"] for part in partColumnHeaders],
-            axis=0,
-        )
-        echoPlate["Source Well"] = pd.concat(
-            [worksheet[f"{part} Well"] for part in partColumnHeaders],
-            axis=0,
-        )
-        echoPlate["Destination Plate Name"] = pd.concat(
-            [worksheet["Assembly Plate"] for part in partColumnHeaders],
-            axis=0,
-        )
-        echoPlate["Destination Well"] = pd.concat(
-            [worksheet["Assembly Well"] for part in partColumnHeaders],
-            axis=0,
-        )
-        echoPlate["Transfer Volume"] = 2000  # nL
-    elif method == "quant":
-        echoPlate = worksheet.loc[
-            :,
-            [
-                "PART_PLATE",
-                "PART_WELL",
-                "QUANT_PLATE",
-                "QUANT_WELL",
-                "QUANT_VOLUME",
-            ],
-        ].copy()
-        echoPlate.columns = [
-            "Source Plate Name",
             "Source Well",
-            "Destination Plate Name",
             "Destination Well",
-            "Transfer Volume",
         ]
-    elif method == "redo_pcr":
-        echoPlate["Source Plate Name"] = pd.concat(
-            [
-                worksheet["PRIMER1_PLATE"],
-                worksheet["PRIMER2_PLATE"],
-                worksheet["TEMPLATE_PLATE"],
-            ],
-            axis=0,
-        )
-        echoPlate["Source Well"] = pd.concat(
-            [
-                worksheet["PRIMER1_WELL"],
-                worksheet["PRIMER2_WELL"],
-                worksheet["TEMPLATE_WELL"],
-            ],
-            axis=0,
-        )
-        echoPlate["Destination Plate Name"] = pd.concat(
-            [
-                worksheet["REDO_PLATE"],
-                worksheet["REDO_PLATE"],
-                worksheet["REDO_PLATE"],
-            ],
-            axis=0,
-        )
-        echoPlate["Destination Well"] = pd.concat(
-            [
-                worksheet["REDO_WELL"],
-                worksheet["REDO_WELL"],
-                worksheet["REDO_WELL"],
-            ],
-            axis=0,
-        )
-        echoPlate["Transfer Volume"] = pd.concat(
-            [
-                worksheet["PRIMER1_VOLUME"],
-                worksheet["PRIMER2_VOLUME"],
-                worksheet["TEMPLATE_VOLUME"],
-            ],
-            axis=0,
-        )
-    elif method == "colony_pcr":
-        echoPlate["Source Plate Name"] = pd.concat(
-            [
-                worksheet["PRIMER1_PLATE"],
-                worksheet["PRIMER2_PLATE"],
-                worksheet["NGS_PLATE"],
-            ],
-            axis=0,
-        )
-        echoPlate["Source Well"] = pd.concat(
-            [
-                worksheet["PRIMER1_WELL"],
-                worksheet["PRIMER2_WELL"],
-                worksheet["NGS_WELL"],
-            ],
-            axis=0,
-        )
-        echoPlate["Destination Plate Name"] = pd.concat(
-            [
-                worksheet["COLONY_PCR_PLATE"],
-                worksheet["COLONY_PCR_PLATE"],
-                worksheet["COLONY_PCR_PLATE"],
-            ],
-            axis=0,
-        )
-        echoPlate["Destination Well"] = pd.concat(
-            [
-                worksheet["COLONY_PCR_WELL"],
-                worksheet["COLONY_PCR_WELL"],
-                worksheet["COLONY_PCR_WELL"],
-            ],
-            axis=0,
-        )
-        echoPlate["Transfer Volume"] = pd.concat(
-            [
-                worksheet["PRIMER1_VOLUME"],
-                worksheet["PRIMER2_VOLUME"],
-                worksheet["NGS_VOLUME"],
-            ],
-            axis=0,
-        )
-    echoPlate = (
-        echoPlate.dropna()
-        .sort_values(
-            [
-                "Source Plate Name",
-                "Destination Plate Name",
-                "Source Well",
-                "Destination Well",
-            ],
-            ascending=[True, True, True, True],
-        )
-        .reset_index(drop=True)
-    )
-    return echoPlate
+    ).reset_index(drop=True)
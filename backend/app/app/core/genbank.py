@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import io
+import logging
+import re
+from typing import List, Optional
+
+from Bio import SeqIO
+
+from app.core.cache import ResultCache, content_hash
+
+logger = logging.getLogger(__name__)
+
+# Sequences already read, by content_hash of their GenBank file
+GENBANK_SEQUENCE_CACHE: ResultCache = ResultCache(max_size=4096, ttl=None)
+
+LOCUS_LENGTH = re.compile(r"LOCUS\s+\S+\s+(\d+) bp")
+# Position numbers and whitespace of ORIGIN lines
+ORIGIN_NOISE: bytes = b"0123456789 \t\r\n"
+
+
+def extract_origin_sequence(genbank: str) -> Optional[str]:
+    """Sequence of the first record from its ORIGIN block
+
+    Features and annotations are not parsed. Returns None when the
+    sequence cannot be read this way, e.g. there is no ORIGIN block, it
+    holds unexpected characters, or its length differs from the LOCUS
+    line.
+    """
+    origin: int = genbank.find("\nORIGIN")
+    if origin == -1:
+        return None
+    start: int = genbank.find("\n", origin + 1)
+    end: int = genbank.find("\n//", origin)
+    if start == -1 or end == -1:
+        return None
+    try:
+        sequence: bytes = genbank[start:end].encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    sequence = sequence.translate(None, ORIGIN_NOISE)
+    if not sequence.isalpha():
+        return None
+    locus: Optional[re.Match] = LOCUS_LENGTH.match(genbank)
+    if locus is not None and int(locus.group(1)) != len(sequence):
+        return None
+    return sequence.upper().decode("ascii")
+
+
+def parse_genbank_sequence(genbank: str) -> str:
+    """Sequence of the first record, parsed with Biopython"""
+    return str(
+        list(SeqIO.to_dict(SeqIO.parse(io.StringIO(genbank), "genbank")).values())[
+            0
+        ].seq
+    ).upper()
+
+
+def read_genbank_sequence(genbank: str) -> str:
+    """Read sequence from genbank string"""
+    return read_genbank_sequences([genbank])[0]
+
+
+def read_genbank_sequences(genbanks: List[str]) -> List[str]:
+    """Read the sequence of the first record of each GenBank file
+
+    Sequences are looked up in GENBANK_SEQUENCE_CACHE, then extracted
+    from the ORIGIN block. Files that cannot be read this way are parsed
+    with Biopython.
+
+    Arguments
+    ---------
+    genbanks : List[str]
+        Contents of the GenBank files
+    """
+    keys: List[str] = [content_hash(genbank) for genbank in genbanks]
+    sequences: List[Optional[str]] = [GENBANK_SEQUENCE_CACHE.get(key) for key in keys]
+    for i, genbank in enumerate(genbanks):
+        if sequences[i] is None:
+            sequences[i] = extract_origin_sequence(genbank)
+    fallback: List[int] = [
+        i for i, sequence in enumerate(sequences) if sequence is None
+    ]
+    if fallback:
+        logger.debug(f"Parsing {len(fallback)} GenBank files with Biopython")
+    for i in fallback:
+        sequences[i] = parse_genbank_sequence(genbanks[i])
+    for key, sequence in zip(keys, sequences):
+        GENBANK_SEQUENCE_CACHE.set(key, sequence)
+    return [str(sequence) for sequence in sequences]
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+import contextlib
+import functools
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Generator, List, Optional, TypeVar
+
+import pandas as pd
+
+INSTRUMENTATION_ENABLED: bool = os.environ.get(
+    "DNADA_INSTRUMENTATION", "1"
+).lower() not in ("0", "false", "no")
+# ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+RU_MAXRSS_BYTES: int = 1 if sys.platform == "darwin" else 1024
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class StageMetrics:
+    """Resources used by a single run of a stage
+
+    peak_rss_delta_bytes is how much the peak resident memory of the
+    whole process grew while the stage ran. Stages running at the same
+    time on other threads contribute to it as well.
+    """
+
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_delta_bytes: int
+    rows: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """Number of DataFrame rows in a stage result, if there are any"""
+    if isinstance(result, pd.DataFrame):
+        return result.shape[0]
+    if isinstance(result, tuple):
+        counts: List[int] = [
+            count for count in map(count_rows, result) if count is not None
+        ]
+        return sum(counts) if counts else None
+    return None
+
+
+def peak_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RU_MAXRSS_BYTES
+
+
+class MetricsRegistry:
+    """Thread-safe running totals of StageMetrics per stage name"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def record(self, metrics: StageMetrics) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(
+                metrics.name,
+                {
+                    "calls": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "rows": 0,
+                    "peak_rss_delta_bytes": 0,
+                },
+            )
+            totals["calls"] += 1
+            totals["wall_seconds"] += metrics.wall_seconds
+            totals["cpu_seconds"] += metrics.cpu_seconds
+            totals["rows"] += metrics.rows or 0
+            totals["peak_rss_delta_bytes"] = max(
+                totals["peak_rss_delta_bytes"], metrics.peak_rss_delta_bytes
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def to_prometheus(self) -> str:
+        """Totals in the Prometheus text exposition format"""
+        series = (
+            ("calls", "counter", "Number of runs of the stage"),
+            ("wall_seconds", "counter", "Wall time spent in the stage"),
+            ("cpu_seconds", "counter", "CPU time spent in the stage"),
+            ("rows", "counter", "DataFrame rows returned by the stage"),
+            (
+                "peak_rss_delta_bytes",
+                "gauge",
+                "Largest growth of peak resident memory during a run",
+            ),
+        )
+        with self._lock:
+            totals = {name: dict(stage) for name, stage in self._totals.items()}
+        lines: List[str] = []
+        for key, metric_type, description in series:
+            metric: str = f"dnada_stage_{key}" + (
+                "_total" if metric_type == "counter" else ""
+            )
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for name in sorted(totals):
+                lines.append(f'{metric}{{stage="{name}"}} {totals[name][key]}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS: MetricsRegistry = MetricsRegistry()
+
+
+@contextlib.contextmanager
+def measure(
+    name: str, registry: MetricsRegistry = METRICS
+) -> Generator[Dict[str, Any], None, None]:
+    """Measure the block it wraps as stage `name`
+
+    Yields a dict. Setting its "result" key lets the rows of the result
+    be counted, and its "metrics" key holds the StageMetrics once the
+    block exits. Nothing is measured if instrumentation is disabled.
+    """
+    measurement: Dict[str, Any] = {}
+    if not INSTRUMENTATION_ENABLED:
+        yield measurement
+        return
+    start_rss: int = peak_rss_bytes()
+    start_cpu: float = time.thread_time()
+    start_wall: float = time.perf_counter()
+    yield measurement
+    metrics = StageMetrics(
+        name=name,
+        wall_seconds=time.perf_counter() - start_wall,
+        cpu_seconds=time.thread_time() - start_cpu,
+        peak_rss_delta_bytes=peak_rss_bytes() - start_rss,
+        rows=count_rows(measurement.get("result")),
+    )
+    measurement["metrics"] = metrics
+    registry.record(metrics)
+    logger.debug(
+        f"stage={metrics.name} wall_s={metrics.wall_seconds:.4f}"
+        f" cpu_s={metrics.cpu_seconds:.4f}"
+        f" peak_rss_delta_bytes={metrics.peak_rss_delta_bytes}"
+        f" rows={metrics.rows}"
+    )
+
+
+def instrumented(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator measuring every call of a function with measure"""
+
+    def decorator(func: F) -> F:
+        stage_name: str = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with measure(stage_name) as measurement:
+                measurement["result"] = func(*args, **kwargs)
+            return measurement["result"]
+
+        return wrapper  # type: ignore
+
+    return decorator
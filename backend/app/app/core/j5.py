@@ -1,14 +1,19 @@
+import csv
 import io
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import re
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from pandera.typing import DataFrame
 from pydantic import BaseModel, validator
 
 from app import schemas
-from app.core.dna_utils import translate_dna_to_aa
+from app.core.dna_utils import translate_dna_to_aa_batch
+from app.core.validation import validate_input
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -33,37 +38,235 @@ def concatenate_dfs(
     return combined_df
 
 
-def make_assemblies_skinny(
-    df: "DataFrame[schemas.MasterJ5Assemblies]",
-) -> "DataFrame[schemas.MasterJ5SkinnyAssemblies]":
-    skinnyAssemblyInstructions = pd.DataFrame()
-    for i in range(int((df.shape[1] - 3) / 2)):
-        tmp = (
-            df.melt(
-                id_vars=["Number", "Name", "Assembly Method"],
-                value_vars=[f"Part(s).{i}"],
-                value_name="Part Name",
-            )
-            .drop(columns=["variable"])
-            .merge(
-                df.melt(
-                    id_vars=["Number", "Name", "Assembly Method"],
-                    value_vars=[f"Assembly Piece ID Number.{i}"],
-                    value_name="Part ID",
-                ).drop(columns=["variable"]),
-                on=["Number", "Name", "Assembly Method"],
+def append_new_rows(
+    existing: Optional[pd.DataFrame],
+    new: Optional[pd.DataFrame],
+    keys: List[str],
+    id_column_name: str = "ID Number",
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """Append the rows of new with keys not in existing
+
+    Unlike concatenate_dfs, existing rows keep their order and IDs, and
+    appended rows are numbered after the largest existing ID.
+
+    Returns
+    -------
+    Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]
+        The combined rows and the appended rows
+    """
+    if new is None:
+        return existing, None
+    if existing is None:
+        existing = new.iloc[:0]
+    added: pd.DataFrame = new.loc[
+        ~pd.MultiIndex.from_frame(new[keys]).isin(
+            pd.MultiIndex.from_frame(existing[keys])
+        )
+    ].drop_duplicates(subset=keys)
+    first_id: int = int(existing[id_column_name].max()) + 1 if existing.shape[0] else 0
+    added = added.assign(
+        **{id_column_name: np.arange(first_id, first_id + added.shape[0])}
+    ).reset_index(drop=True)
+    return pd.concat([existing, added], ignore_index=True), added
+
+
+# Blank lines separating the sections of a j5 combinatorial CSV
+SECTION_BREAK = re.compile(r"\n[ \t\r]*\n(?:[ \t\r]*\n)*")
+
+
+def iter_sections(master_j5_csv: str) -> Iterator[Tuple[str, int, int]]:
+    """Title, start and end offsets of each section of a j5 CSV
+
+    The CSV is scanned once, and sections are yielded as they are found
+    without copying them. The title is the first field of a section.
+    """
+    start: int = 0
+    for section_break in SECTION_BREAK.finditer(master_j5_csv):
+        end: int = section_break.start()
+        if master_j5_csv[end - 1 : end] == "\r":
+            end -= 1
+        if end > start:
+            yield section_title(master_j5_csv, start), start, end
+        start = section_break.end()
+    end = len(master_j5_csv.rstrip())
+    if end > start:
+        yield section_title(master_j5_csv, start), start, end
+
+
+def section_title(master_j5_csv: str, start: int) -> str:
+    line_end: int = master_j5_csv.find("\n", start)
+    first_line: str = master_j5_csv[start : line_end if line_end >= 0 else None]
+    return next(csv.reader([first_line.strip()]), [""])[0]
+
+
+def read_section(
+    section_str: str, skiprows: int, dtype: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """Read the table of a section with the C parser
+
+    Text columns are given in dtype so that pandas does not have to
+    infer their type.
+    """
+    return pd.read_csv(
+        io.StringIO(section_str), skiprows=skiprows, engine="c", dtype=dtype
+    )
+
+
+# Code of a Sequence shared by every section and design being condensed
+SEQUENCE_CODE: str = "Sequence Code"
+# Sections of a MasterJ5 with a Sequence column
+SEQUENCE_SECTIONS: List[str] = [
+    "digests",
+    "part_sources",
+    "direct_synthesis",
+    "oligos",
+    "pcr_reactions",
+    "parts",
+]
+
+
+def intern_sequences(designs: List["MasterJ5"]) -> List[Dict[str, pd.DataFrame]]:
+    """Sections of each design with the SEQUENCE_CODE of their sequences
+
+    All sequences of all designs are factorized together, once, so equal
+    sequences get equal integer codes wherever they appear. Sections a
+    design does not have are left out.
+    """
+    sections: List[Dict[str, pd.DataFrame]] = [
+        {
+            section: getattr(design, section)
+            for section in SEQUENCE_SECTIONS
+            if getattr(design, section) is not None
+        }
+        for design in designs
+    ]
+    tables: List[pd.DataFrame] = [
+        table for design in sections for table in design.values()
+    ]
+    if not tables:
+        return sections
+    codes: np.ndarray = pd.factorize(
+        np.concatenate([table["Sequence"].to_numpy() for table in tables])
+    )[0]
+    offset: int = 0
+    for design in sections:
+        for section, table in design.items():
+            design[section] = table.assign(
+                **{SEQUENCE_CODE: codes[offset : offset + table.shape[0]]}
             )
+            offset += table.shape[0]
+    return sections
+
+
+def renumber_assembly_parts(
+    assemblies: pd.DataFrame, new_ids: pd.Series
+) -> pd.DataFrame:
+    """Assemblies with the part IDs of all slots looked up in new_ids
+
+    Arguments
+    ---------
+    assemblies : pd.DataFrame
+        Assemblies with Assembly Piece ID Number.i columns
+
+    new_ids : pd.Series
+        New part ID, indexed by the old one. Missing IDs become NA.
+    """
+    id_columns: List[str] = [
+        column
+        for column in assemblies.columns
+        if column.startswith("Assembly Piece ID Number.")
+    ]
+    old_ids: np.ndarray = (
+        assemblies[id_columns].to_numpy(dtype="float64", na_value=np.nan).ravel()
+    )
+    positions: np.ndarray = new_ids.index.get_indexer(old_ids)
+    renumbered: pd.arrays.IntegerArray = new_ids.array.take(positions, allow_fill=True)
+    return assemblies.assign(
+        **{
+            column: renumbered[i :: len(id_columns)]
+            for i, column in enumerate(id_columns)
+        }
+    )
+
+
+def point_parts_to_reactions(
+    parts: pd.DataFrame, reactions: List[Optional[pd.DataFrame]]
+) -> pd.DataFrame:
+    """Parts with the Type ID Number of the reaction with their sequence
+
+    Reactions are looked up by SEQUENCE_CODE, in the order given, and
+    later reactions take precedence. Parts without a matching reaction
+    keep their Type ID Number.
+    """
+    for reaction in reactions:
+        if reaction is None:
+            continue
+        reaction_ids: pd.Series = reaction.drop_duplicates(SEQUENCE_CODE).set_index(
+            SEQUENCE_CODE
+        )["ID Number"]
+        type_ids: pd.Series = (
+            parts[SEQUENCE_CODE].map(reaction_ids).fillna(parts["Type ID Number"])
         )
-        tmp["Part Order"] = i
-        skinnyAssemblyInstructions = pd.concat(
-            [skinnyAssemblyInstructions, tmp], ignore_index=True
+        parts = parts.drop(columns="Type ID Number").assign(
+            **{"Type ID Number": type_ids}
         )
-    skinnyAssemblyInstructions = (
+    return parts
+
+
+def new_part_ids(parts: pd.DataFrame, condensed_parts: pd.DataFrame) -> pd.Series:
+    """ID in condensed_parts of each part, indexed by the part's own ID
+
+    Parts are matched on their Type and Type ID Number, as updated by
+    point_parts_to_reactions. Unmatched parts get NA.
+    """
+    key: List[str] = ["Type", "Type ID Number"]
+    condensed_parts = condensed_parts.drop_duplicates(key)
+    positions: np.ndarray = pd.MultiIndex.from_frame(condensed_parts[key]).get_indexer(
+        pd.MultiIndex.from_frame(parts[key].astype(condensed_parts[key].dtypes))
+    )
+    return pd.Series(
+        pd.array(condensed_parts["ID Number"], dtype=pd.Int64Dtype()).take(
+            positions, allow_fill=True
+        ),
+        index=parts["ID Number"].to_numpy(),
+    )
+
+
+def make_assemblies_skinny(
+    df: "DataFrame[schemas.MasterJ5Assemblies]",
+) -> "DataFrame[schemas.MasterJ5SkinnyAssemblies]":
+    """One row per part of each assembly, in part order
+
+    The Part(s).i and Assembly Piece ID Number.i columns of all part
+    slots are reshaped at once, assembly by assembly, and empty slots
+    are dropped.
+    """
+    id_columns: List[str] = ["Number", "Name", "Assembly Method"]
+    n_slots: int = (df.shape[1] - len(id_columns)) // 2
+    part_ids: pd.DataFrame = df.loc[
+        :, [f"Assembly Piece ID Number.{i}" for i in range(n_slots)]
+    ]
+    skinnyAssemblyInstructions = pd.DataFrame(
+        {
+            **{
+                column: np.repeat(df[column].to_numpy(), n_slots)
+                for column in id_columns
+            },
+            "Part Name": df.loc[:, [f"Part(s).{i}" for i in range(n_slots)]]
+            .to_numpy()
+            .ravel(),
+            # stack keeps nullable integer IDs as they are
+            "Part ID": part_ids.set_axis(range(n_slots), axis=1)
+            .stack(dropna=False)
+            .array,
+            "Part Order": np.tile(np.arange(n_slots), df.shape[0]),
+        }
+    )
+    return (
         skinnyAssemblyInstructions.dropna()
-        .sort_values(["Number", "Part Order"])
+        .sort_values(["Number", "Part Order"], kind="stable")
         .reset_index(drop=True)
     )
-    return skinnyAssemblyInstructions
 
 
 class MasterJ5(BaseModel):
@@ -81,29 +284,47 @@ class MasterJ5(BaseModel):
     skinny_assemblies: "Optional[DataFrame[schemas.MasterJ5SkinnyAssemblies]]" = None
 
     def add_digests(self, section_str: str) -> None:
-        self.digests = schemas.MasterJ5Digests.validate(
-            pd.read_csv(io.StringIO(section_str), skiprows=1)
+        self.digests = validate_input(
+            schemas.MasterJ5Digests,
+            read_section(
+                section_str, skiprows=1, dtype={"Sequence Source": str, "Sequence": str}
+            ),
         )
 
     def add_oligos(self, section_str: str) -> None:
-        self.oligos = schemas.MasterJ5Oligos.validate(
-            pd.read_csv(io.StringIO(section_str), skiprows=1)
+        self.oligos = validate_input(
+            schemas.MasterJ5Oligos,
+            read_section(
+                section_str,
+                skiprows=1,
+                dtype={"Name": str, "Sequence": str, "Sequence (3' only)": str},
+            ),
         )
 
     def add_direct_synthesis(self, section_str: str) -> None:
-        self.direct_synthesis = schemas.MasterJ5Synthesis.validate(
-            pd.read_csv(io.StringIO(section_str), skiprows=1)
+        self.direct_synthesis = validate_input(
+            schemas.MasterJ5Synthesis,
+            read_section(section_str, skiprows=1, dtype={"Name": str, "Sequence": str}),
         )
 
     def add_part_sources(self, section_str: str) -> None:
-        self.part_sources = schemas.MasterJ5PartSources.validate(
-            pd.read_csv(io.StringIO(section_str), skiprows=2).assign(
-                AA_Sequence=lambda df: df.Sequence.apply(translate_dna_to_aa)
-            )
+        self.part_sources = validate_input(
+            schemas.MasterJ5PartSources,
+            read_section(
+                section_str,
+                skiprows=2,
+                dtype={"Name": str, "Source Plasmid": str, "Sequence": str},
+            ).assign(
+                AA_Sequence=lambda df: translate_dna_to_aa_batch(df.Sequence.tolist())
+            ),
         )
 
     def add_pcr_reactions(self, section_str: str) -> None:
-        df = pd.read_csv(io.StringIO(section_str), skiprows=1)
+        df = read_section(
+            section_str,
+            skiprows=1,
+            dtype={"Primary Template": str, "Note": str, "Sequence": str},
+        )
         df = df.rename(
             columns={
                 "ID Number.1": "forward_primer_id",
@@ -112,90 +333,69 @@ class MasterJ5(BaseModel):
                 "Name.1": "reverse_primer_name",
             }
         )
-        self.pcr_reactions = schemas.MasterJ5PCRs.validate(df)
+        self.pcr_reactions = validate_input(schemas.MasterJ5PCRs, df)
 
     def add_parts(self, section_str: str, method: str) -> None:
-        df = pd.read_csv(io.StringIO(section_str), skiprows=1).assign(Method=method)
+        df = read_section(
+            section_str, skiprows=1, dtype={"Type": str, "Part(s)": str}
+        ).assign(Method=method)
         if self.parts is None:
-            self.parts = schemas.MasterJ5Parts.validate(df)
+            self.parts = validate_input(schemas.MasterJ5Parts, df)
         else:
-            self.parts = schemas.MasterJ5Parts.validate(self.parts.append(df))
+            self.parts = validate_input(
+                schemas.MasterJ5Parts, pd.concat([self.parts, df])
+            )
 
     def add_assemblies(self, section_str: str) -> None:
-        df = pd.read_csv(io.StringIO(section_str), skiprows=2)
+        df = read_section(
+            section_str, skiprows=2, dtype={"Name": str, "Assembly Method": str}
+        )
         df = df.rename(
             columns={
                 "Part(s)": "Part(s).0",
                 "Assembly Piece ID Number": "Assembly Piece ID Number.0",
             }
         )
-        self.assemblies = schemas.MasterJ5Assemblies.validate(df)
+        self.assemblies = validate_input(schemas.MasterJ5Assemblies, df)
 
-        self.skinny_assemblies = schemas.MasterJ5SkinnyAssemblies.validate(
-            make_assemblies_skinny(self.assemblies)
+        self.skinny_assemblies = validate_input(
+            schemas.MasterJ5SkinnyAssemblies,
+            make_assemblies_skinny(self.assemblies),
         )
 
     @classmethod
     def parse_csv(cls, master_j5_csv: str) -> "MasterJ5":
-        """Parse original combinatorial.csv file into MasterJ5 object"""
+        """Parse original combinatorial.csv file into MasterJ5 object
+
+        The first section is the header. Each other section is parsed by
+        its entry in SECTION_PARSERS.
+        """
         logging.debug("Beginning to parse J5 combinatorial csv")
-        section_strs: List[str] = [
-            section.strip() for section in master_j5_csv.split("\n\n")
-        ]
-        if not section_strs:
+        sections: Iterator[Tuple[str, int, int]] = iter_sections(master_j5_csv)
+        try:
+            _, header_start, header_end = next(sections)
+        except StopIteration:
             raise KeyError("There wasn't a single section found in the master_j5 file")
 
         master_j5: MasterJ5 = cls()
 
         master_j5.raw_csv = master_j5_csv
-        master_j5.header = section_strs[0]
-        for section_str in section_strs[1:]:
-            if section_str.startswith('"Digest Linearized Pieces'):
-                master_j5.add_digests(section_str)
-            elif section_str.startswith('"Non-degenerate Part IDs and Sources'):
-                master_j5.add_part_sources(section_str)
-            elif section_str.startswith('"Direct Synthesis'):
-                master_j5.add_direct_synthesis(section_str)
-            elif section_str.startswith('"Oligo Synthesis'):
-                master_j5.add_oligos(section_str)
-            elif section_str.startswith('"PCR Reactions'):
-                master_j5.add_pcr_reactions(section_str)
-            elif section_str.startswith('"Assembly Pieces (SLIC/Gibson/CPEC)'):
-                master_j5.add_parts(section_str, method="SLIC/Gibson/CPEC")
-            elif section_str.startswith('"Assembly Pieces (Golden-gate)'):
-                master_j5.add_parts(section_str, method="Golden-gate")
-            elif section_str.startswith('"Combinations of Assembly Pieces'):
-                master_j5.add_assemblies(section_str)
-            elif section_str.startswith(
-                '"Suggested Assembly Piece Contigs For Hierarchical Assembly'  # noqa: E501
-            ):
-                pass
-            elif section_str.startswith('"Assembly Parameters'):
-                pass
-            elif section_str.startswith('"Note'):
-                pass
-            elif section_str.startswith('"Combinatorial overhang/overlap design:'):
-                pass
-            elif section_str.startswith(
-                '"Target Bin Selected Relative Overlap Positions and Extra'
-            ):
-                pass
-            elif section_str.startswith(
-                '"Target Bin Selected Relative Overhang Positions'
-            ):
-                pass
-            else:
-                unexpected_title = section_str.split("\n")[0]
-                raise KeyError(
-                    f"Unexpected section with "
-                    f'title "{unexpected_title}" : {section_str}'
-                )
+        master_j5.header = master_j5_csv[header_start:header_end].strip()
+        for title, start, end in sections:
+            parser: Optional[Callable[[MasterJ5, str], None]] = section_parser(title)
+            if parser is not None:
+                parser(master_j5, master_j5_csv[start:end])
         logging.debug("Finished parsing J5 combinatorial csv")
         return master_j5
 
     @classmethod
     def condense_designs(cls, individual_designs: List["MasterJ5"]) -> "MasterJ5":
-        """Condense multiple MasterJ5 designs into single MasterJ5"""
+        """Condense multiple MasterJ5 designs into single MasterJ5
+
+        Sequences are interned once (see intern_sequences), and sections
+        are deduplicated and joined on their SEQUENCE_CODE rather than
+        on the sequences themselves.
+        """
         master_j5: MasterJ5 = cls()
 
         master_j5.header = "\n".join(
@@ -204,254 +404,118 @@ class MasterJ5(BaseModel):
         master_j5.raw_csv = "\n".join(
             str(design.raw_csv) for design in individual_designs
         )
+        sections: List[Dict[str, pd.DataFrame]] = intern_sequences(individual_designs)
+
+        def combine(
+            section: str,
+            schema: Any,
+            sorted_by: List[str],
+            drop_duplicates_by: List[str],
+        ) -> Optional[pd.DataFrame]:
+            """Condense a section, keeping SEQUENCE_CODE for later joins"""
+            combined: Optional[pd.DataFrame] = concatenate_dfs(
+                [design[section] for design in sections if section in design],
+                sorted_by=sorted_by,
+                drop_duplicates_by=drop_duplicates_by,
+            )
+            setattr(
+                master_j5,
+                section,
+                validate_input(schema, combined.drop(columns=SEQUENCE_CODE))
+                if combined is not None
+                else None,
+            )
+            return combined
 
-        combined_digests: Optional[pd.DataFrame] = concatenate_dfs(
-            [
-                design.digests
-                for design in individual_designs
-                if design.digests is not None
-            ],
+        combined_digests: Optional[pd.DataFrame] = combine(
+            "digests",
+            schemas.MasterJ5Digests,
             sorted_by=["Sequence Source"],
-            drop_duplicates_by=["Sequence"],
-        )
-        master_j5.digests = (
-            schemas.MasterJ5Digests.validate(combined_digests)
-            if combined_digests is not None
-            else None
+            drop_duplicates_by=[SEQUENCE_CODE],
         )
-        combined_part_sources: Optional[pd.DataFrame] = concatenate_dfs(
-            [
-                design.part_sources
-                for design in individual_designs
-                if design.part_sources is not None
-            ],
+        combine(
+            "part_sources",
+            schemas.MasterJ5PartSources,
             sorted_by=["Name"],
-            drop_duplicates_by=["Sequence"],
-        )
-        master_j5.part_sources = (
-            schemas.MasterJ5PartSources.validate(combined_part_sources)
-            if combined_part_sources is not None
-            else None
+            drop_duplicates_by=[SEQUENCE_CODE],
         )
-        combined_synthesis: Optional[pd.DataFrame] = concatenate_dfs(
-            [
-                design.direct_synthesis
-                for design in individual_designs
-                if design.direct_synthesis is not None
-            ],
+        combine(
+            "direct_synthesis",
+            schemas.MasterJ5Synthesis,
             sorted_by=["Name"],
-            drop_duplicates_by=["Sequence"],
+            drop_duplicates_by=[SEQUENCE_CODE],
         )
-        master_j5.direct_synthesis = (
-            schemas.MasterJ5Synthesis.validate(combined_synthesis)
-            if combined_synthesis is not None
-            else None
-        )
-        combined_oligos: Optional[pd.DataFrame] = concatenate_dfs(
-            [
-                design.oligos
-                for design in individual_designs
-                if design.oligos is not None
-            ],
+        combine(
+            "oligos",
+            schemas.MasterJ5Oligos,
             sorted_by=["Name"],
-            drop_duplicates_by=["Sequence"],
-        )
-        master_j5.oligos = (
-            schemas.MasterJ5Oligos.validate(combined_oligos)
-            if combined_oligos is not None
-            else None
+            drop_duplicates_by=[SEQUENCE_CODE],
         )
         combined_pcrs: Optional[pd.DataFrame] = concatenate_dfs(
             [
-                design.pcr_reactions
-                for design in individual_designs
-                if design.pcr_reactions is not None
+                design["pcr_reactions"]
+                for design in sections
+                if "pcr_reactions" in design
             ],
             sorted_by=["forward_primer_name", "reverse_primer_name"],
             drop_duplicates_by=[
                 "forward_primer_name",
                 "reverse_primer_name",
-                "Sequence",
+                SEQUENCE_CODE,
             ],
         )
         if combined_pcrs is not None and master_j5.oligos is not None:
-            combined_pcrs = (
-                combined_pcrs.merge(
-                    right=master_j5.oligos[["ID Number", "Name"]].rename(
-                        columns={
-                            "ID Number": "forward_primer_id",
-                            "Name": "forward_primer_name",
-                        }
-                    ),
-                    how="left",
-                    on=["forward_primer_name"],
-                )
-                .merge(
-                    right=master_j5.oligos[["ID Number", "Name"]].rename(
-                        columns={
-                            "ID Number": "reverse_primer_id",
-                            "Name": "reverse_primer_name",
-                        }
-                    ),
-                    how="left",
-                    on=["reverse_primer_name"],
-                )
-                .assign(
-                    forward_primer_id=(
-                        lambda df: df.forward_primer_id_y.fillna(df.forward_primer_id_x)
-                    ),
-                    reverse_primer_id=(
-                        lambda df: df.reverse_primer_id_y.fillna(df.reverse_primer_id_x)
-                    ),
-                )
-                .drop(
-                    columns=[
-                        "forward_primer_id_x",
-                        "forward_primer_id_y",
-                        "reverse_primer_id_x",
-                        "reverse_primer_id_y",
-                    ]
-                )[
-                    [
-                        "ID Number",
-                        "Primary Template",
-                        "Alternate Template",
-                        "forward_primer_id",
-                        "forward_primer_name",
-                        "reverse_primer_id",
-                        "reverse_primer_name",
-                        "Note",
-                        "Mean Oligo Tm",
-                        "Delta Oligo Tm",
-                        "Mean Oligo Tm (3' only)",
-                        "Delta Oligo Tm (3' only)",
-                        "Length",
-                        "Sequence",
-                    ]
-                ]
+            oligo_ids: pd.Series = master_j5.oligos.set_index("Name")["ID Number"]
+            combined_pcrs = combined_pcrs.assign(
+                forward_primer_id=combined_pcrs["forward_primer_name"]
+                .map(oligo_ids)
+                .fillna(combined_pcrs["forward_primer_id"]),
+                reverse_primer_id=combined_pcrs["reverse_primer_name"]
+                .map(oligo_ids)
+                .fillna(combined_pcrs["reverse_primer_id"]),
             )
         master_j5.pcr_reactions = (
-            schemas.MasterJ5PCRs.validate(combined_pcrs)
+            validate_input(
+                schemas.MasterJ5PCRs, combined_pcrs.drop(columns=SEQUENCE_CODE)
+            )
             if combined_pcrs is not None
             else None
         )
 
-        updated_design_parts: List[DataFrame[schemas.MasterJ5Parts]] = []
-        for design_parts in [
-            design.parts for design in individual_designs if design.parts is not None
-        ]:
-            new_design_parts = design_parts.copy()
-            if master_j5.pcr_reactions is not None:
-                new_design_parts = (
-                    new_design_parts.merge(
-                        right=master_j5.pcr_reactions[["ID Number", "Sequence"]].rename(
-                            columns={
-                                "ID Number": "Type ID Number",
-                            }
-                        ),
-                        how="left",
-                        on=["Sequence"],
-                    )
-                    .assign(
-                        **{
-                            "Type ID Number": lambda df: df["Type ID Number_y"].fillna(
-                                df["Type ID Number_x"]
-                            )
-                        }
-                    )
-                    .drop(
-                        columns=[
-                            "Type ID Number_x",
-                            "Type ID Number_y",
-                        ]
-                    )
-                )
-            if master_j5.digests is not None:
-                new_design_parts = (
-                    new_design_parts.merge(
-                        right=master_j5.digests[["ID Number", "Sequence"]].rename(
-                            columns={
-                                "ID Number": "Type ID Number",
-                            }
-                        ),
-                        how="left",
-                        on=["Sequence"],
-                    )
-                    .assign(
-                        **{
-                            "Type ID Number": lambda df: df["Type ID Number_y"].fillna(
-                                df["Type ID Number_x"]
-                            )
-                        }
-                    )
-                    .drop(
-                        columns=[
-                            "Type ID Number_x",
-                            "Type ID Number_y",
-                        ]
-                    )
-                )
-            updated_design_parts.append(new_design_parts)
+        # Point PCR and digest parts at the condensed reactions with the
+        # same sequence
+        updated_design_parts: Dict[int, pd.DataFrame] = {
+            i: point_parts_to_reactions(
+                design["parts"], [combined_pcrs, combined_digests]
+            )
+            for i, design in enumerate(sections)
+            if "parts" in design
+        }
         combined_parts: Optional[pd.DataFrame] = concatenate_dfs(
-            updated_design_parts,
+            list(updated_design_parts.values()),
             sorted_by=["Type", "Type ID Number"],
-            drop_duplicates_by=["Sequence"],
+            drop_duplicates_by=[SEQUENCE_CODE],
         )
         master_j5.parts = (
-            schemas.MasterJ5Parts.validate(combined_parts)
+            validate_input(
+                schemas.MasterJ5Parts, combined_parts.drop(columns=SEQUENCE_CODE)
+            )
             if combined_parts is not None
             else None
         )
 
-        # Get mapping from old part ID to new part ID
-        part_id_mappings: List[pd.DataFrame] = []
-        for updated_design_part in updated_design_parts:
-            if master_j5.parts is not None:
-                # updated_design_part has original ID Number with updated
-                # Type ID Number
-                # master_j5.parts has updated ID Number
-                # and updated Type ID Number
-                # Merge to get mapping from original ID Number to
-                # updated ID Number
-                part_id_mapping = (
-                    updated_design_part[["ID Number", "Type", "Type ID Number"]]
-                    .merge(
-                        right=master_j5.parts[
-                            ["ID Number", "Type", "Type ID Number"]
-                        ].rename(columns={"ID Number": "New ID Number"}),
-                        how="left",
-                        on=["Type", "Type ID Number"],
-                    )[["ID Number", "New ID Number"]]
-                    .astype(pd.Int64Dtype())
-                )
-                part_id_mappings.append(part_id_mapping)
-
+        # Renumber the parts of each design's assemblies to the condensed
+        # part IDs, found by their updated Type and Type ID Number
         updated_design_assemblies: List[DataFrame[schemas.MasterJ5Assemblies]] = []
-        for i, design_assemblies in enumerate(
-            [
-                design.assemblies
-                for design in individual_designs
-                if design.assemblies is not None
-            ]
-        ):
-            if master_j5.parts is not None:
-                updated_design_assembly = design_assemblies.copy()
-                for j in range(int((design_assemblies.shape[1] - 3) / 2)):
-                    name_of_column_to_update = f"Assembly Piece ID Number.{j}"
-                    updated_design_assembly[
-                        name_of_column_to_update
-                    ] = updated_design_assembly.merge(
-                        right=part_id_mappings[i].rename(
-                            columns={
-                                "ID Number": name_of_column_to_update,
-                            }
-                        ),
-                        how="left",
-                        on=name_of_column_to_update,
-                    )[
-                        "New ID Number"
-                    ]
-                updated_design_assemblies.append(updated_design_assembly)
+        if master_j5.parts is not None:
+            for i, updated_design_part in updated_design_parts.items():
+                if individual_designs[i].assemblies is not None:
+                    updated_design_assemblies.append(
+                        renumber_assembly_parts(
+                            individual_designs[i].assemblies,
+                            new_part_ids(updated_design_part, master_j5.parts),
+                        )
+                    )
         combined_assemblies: Optional[pd.DataFrame] = concatenate_dfs(
             updated_design_assemblies,
             sorted_by=["Name"],
@@ -459,13 +523,14 @@ class MasterJ5(BaseModel):
             id_column_name="Number",
         )
         master_j5.assemblies = (
-            schemas.MasterJ5Assemblies.validate(combined_assemblies)
+            validate_input(schemas.MasterJ5Assemblies, combined_assemblies)
             if combined_assemblies is not None
             else None
         )
         master_j5.skinny_assemblies = (
-            schemas.MasterJ5SkinnyAssemblies.validate(
-                make_assemblies_skinny(master_j5.assemblies)
+            validate_input(
+                schemas.MasterJ5SkinnyAssemblies,
+                make_assemblies_skinny(master_j5.assemblies),
             )
             if master_j5.assemblies is not None
             else None
@@ -473,6 +538,110 @@ class MasterJ5(BaseModel):
 
         return master_j5
 
+    @classmethod
+    def merge_incremental(
+        cls, existing: "MasterJ5", new: "MasterJ5"
+    ) -> Tuple["MasterJ5", "MasterJ5"]:
+        """Add a design to an already condensed MasterJ5
+
+        Unlike condense_designs, rows of existing keep their order and ID
+        Numbers, so plates laid out from it stay valid. Only rows of new
+        that are not in existing, by the same keys condense_designs
+        deduplicates on, are appended and given the next IDs.
+
+        Arguments
+        ---------
+        existing : MasterJ5
+            Condensed design, e.g. from condense_designs
+
+        new : MasterJ5
+            Design to add
+
+        Returns
+        -------
+        Tuple[MasterJ5, MasterJ5]
+            The updated design, and a MasterJ5 holding only the rows
+            added to each section, with their new IDs
+        """
+        merged: MasterJ5 = cls()
+        delta: MasterJ5 = cls()
+        merged.header = "\n".join(str(design.header) for design in (existing, new))
+        merged.raw_csv = "\n".join(str(design.raw_csv) for design in (existing, new))
+        delta.header, delta.raw_csv = new.header, new.raw_csv
+        existing_sections, new_sections = intern_sequences([existing, new])
+
+        def append(
+            section: str, schema: Any, keys: List[str]
+        ) -> Optional[pd.DataFrame]:
+            """Append new rows of a section, keeping SEQUENCE_CODE"""
+            combined, added = append_new_rows(
+                existing_sections.get(section), new_sections.get(section), keys
+            )
+            for design, rows in ((merged, combined), (delta, added)):
+                setattr(
+                    design,
+                    section,
+                    validate_input(schema, rows.drop(columns=SEQUENCE_CODE))
+                    if rows is not None
+                    else None,
+                )
+            return combined
+
+        combined_digests = append(
+            "digests", schemas.MasterJ5Digests, keys=[SEQUENCE_CODE]
+        )
+        append("part_sources", schemas.MasterJ5PartSources, keys=[SEQUENCE_CODE])
+        append("direct_synthesis", schemas.MasterJ5Synthesis, keys=[SEQUENCE_CODE])
+        append("oligos", schemas.MasterJ5Oligos, keys=[SEQUENCE_CODE])
+        if "pcr_reactions" in new_sections and merged.oligos is not None:
+            new_pcrs: pd.DataFrame = new_sections["pcr_reactions"]
+            oligo_ids: pd.Series = merged.oligos.set_index("Name")["ID Number"]
+            new_sections["pcr_reactions"] = new_pcrs.assign(
+                forward_primer_id=new_pcrs["forward_primer_name"]
+                .map(oligo_ids)
+                .fillna(new_pcrs["forward_primer_id"]),
+                reverse_primer_id=new_pcrs["reverse_primer_name"]
+                .map(oligo_ids)
+                .fillna(new_pcrs["reverse_primer_id"]),
+            )
+        combined_pcrs = append(
+            "pcr_reactions",
+            schemas.MasterJ5PCRs,
+            keys=["forward_primer_name", "reverse_primer_name", SEQUENCE_CODE],
+        )
+        if "parts" in new_sections:
+            new_sections["parts"] = point_parts_to_reactions(
+                new_sections["parts"], [combined_pcrs, combined_digests]
+            )
+        append("parts", schemas.MasterJ5Parts, keys=[SEQUENCE_CODE])
+
+        new_assemblies: Optional[pd.DataFrame] = None
+        if new.assemblies is not None and merged.parts is not None:
+            new_assemblies = renumber_assembly_parts(
+                new.assemblies, new_part_ids(new_sections["parts"], merged.parts)
+            )
+        combined_assemblies, added_assemblies = append_new_rows(
+            existing.assemblies, new_assemblies, ["Name"], id_column_name="Number"
+        )
+        for design, assemblies in (
+            (merged, combined_assemblies),
+            (delta, added_assemblies),
+        ):
+            design.assemblies = (
+                validate_input(schemas.MasterJ5Assemblies, assemblies)
+                if assemblies is not None
+                else None
+            )
+            design.skinny_assemblies = (
+                validate_input(
+                    schemas.MasterJ5SkinnyAssemblies,
+                    make_assemblies_skinny(design.assemblies),
+                )
+                if design.assemblies is not None
+                else None
+            )
+        return merged, delta
+
     @classmethod
     def parse_json(cls, master_j5_json: str) -> "MasterJ5":
         """Parse MasterJ5.to_json() serialization into MasterJ5 object"""
@@ -565,6 +734,42 @@ class MasterJ5(BaseModel):
         }
 
 
+# MasterJ5 method parsing each section of a j5 combinatorial CSV, by
+# section title. Sections mapped to None are skipped.
+SECTION_PARSERS: Dict[str, Optional[Callable[[MasterJ5, str], None]]] = {
+    "Digest Linearized Pieces": MasterJ5.add_digests,
+    "Non-degenerate Part IDs and Sources": MasterJ5.add_part_sources,
+    "Direct Synthesis": MasterJ5.add_direct_synthesis,
+    "Oligo Synthesis": MasterJ5.add_oligos,
+    "PCR Reactions": MasterJ5.add_pcr_reactions,
+    "Assembly Pieces (SLIC/Gibson/CPEC)": partial(
+        MasterJ5.add_parts, method="SLIC/Gibson/CPEC"
+    ),
+    "Assembly Pieces (Golden-gate)": partial(MasterJ5.add_parts, method="Golden-gate"),
+    "Combinations of Assembly Pieces": MasterJ5.add_assemblies,
+    "Suggested Assembly Piece Contigs For Hierarchical Assembly": None,
+    "Assembly Parameters": None,
+    "Note": None,
+    "Combinatorial overhang/overlap design:": None,
+    "Target Bin Selected Relative Overlap Positions and Extra": None,
+    "Target Bin Selected Relative Overhang Positions": None,
+}
+
+
+def section_parser(title: str) -> Optional[Callable[[MasterJ5, str], None]]:
+    """Entry of SECTION_PARSERS for a section title
+
+    Titles are looked up as is first, then by the SECTION_PARSERS key
+    they start with, since some titles end with details of the design.
+    """
+    if title in SECTION_PARSERS:
+        return SECTION_PARSERS[title]
+    for prefix, parser in SECTION_PARSERS.items():
+        if title.startswith(prefix):
+            return parser
+    raise KeyError(f'Unexpected section with title "{title}"')
+
+
 class File(BaseModel):
     filename: str
     contents: str
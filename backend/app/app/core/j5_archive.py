@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Binary J5Design archives
+
+A J5Design archive is a zip file holding each MasterJ5 section as an
+Arrow IPC file, which keeps pandas dtypes, next to the header and
+plasmid files as text. Like J5Design.to_json, it leaves out raw_csv.
+Archives of large designs are several times smaller and faster to load
+than their JSON. pyarrow is only needed to read and write archives.
+"""
+
+import io
+import json
+import zipfile
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.core.j5 import J5Design, MasterJ5, PlasmidDesign, PlasmidMap
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None  # type: ignore[assignment]
+
+J5_ARCHIVE_MEDIA_TYPE: str = "application/zip"
+J5_ARCHIVE_FORMAT: str = "j5design-arrow"
+J5_ARCHIVE_VERSION: int = 1
+# MasterJ5 sections stored as Arrow IPC files
+MASTER_J5_TABLES: List[str] = [
+    "direct_synthesis",
+    "digests",
+    "oligos",
+    "pcr_reactions",
+    "parts",
+    "part_sources",
+    "assemblies",
+    "skinny_assemblies",
+]
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError(
+            "pyarrow is required for J5Design archives, install it with"
+            " pip install pyarrow"
+        )
+
+
+def is_j5_archive(contents: bytes) -> bool:
+    """Whether contents look like a J5Design archive rather than JSON"""
+    return contents[:4] == b"PK\x03\x04"
+
+
+def table_to_ipc(df: pd.DataFrame, compression: Optional[str]) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(
+        sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)
+    ) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def table_from_ipc(contents: bytes) -> pd.DataFrame:
+    # Uncompressed record batches reference contents without copying
+    return pa.ipc.open_file(pa.py_buffer(contents)).read_all().to_pandas()
+
+
+def dump_j5_design(j5_design: J5Design, compression: Optional[str] = "zstd") -> bytes:
+    """Serialize a J5Design into an archive
+
+    Arguments
+    ---------
+    j5_design : J5Design
+        Design to serialize
+
+    compression : str, optional
+        Compression of the Arrow IPC buffers, "zstd", "lz4" or None.
+        Uncompressed archives are larger, but their tables are loaded
+        without copying.
+
+    Returns
+    -------
+    bytes
+        The zip archive
+    """
+    require_pyarrow()
+    master_j5: MasterJ5 = j5_design.master_j5
+    manifest: Dict[str, Any] = {
+        "format": J5_ARCHIVE_FORMAT,
+        "version": J5_ARCHIVE_VERSION,
+        "zip_file_name": j5_design.zip_file_name,
+        "tables": [],
+        "plasmid_maps": [plasmid.filename for plasmid in j5_design.plasmid_maps],
+        "plasmid_designs": [plasmid.filename for plasmid in j5_design.plasmid_designs],
+    }
+    archive_file = io.BytesIO()
+    with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED) as archive:
+        for section in MASTER_J5_TABLES:
+            df: Optional[pd.DataFrame] = getattr(master_j5, section)
+            if df is not None:
+                manifest["tables"].append(section)
+                # Arrow buffers are compressed already
+                archive.writestr(
+                    f"master_j5/{section}.arrow",
+                    table_to_ipc(df, compression=compression),
+                    compress_type=zipfile.ZIP_STORED,
+                )
+        if master_j5.header is not None:
+            archive.writestr("master_j5/header.txt", master_j5.header)
+        for i, plasmid in enumerate(j5_design.plasmid_maps):
+            archive.writestr(f"plasmid_maps/{i}", plasmid.contents)
+        for i, plasmid in enumerate(j5_design.plasmid_designs):
+            archive.writestr(f"plasmid_designs/{i}", plasmid.contents)
+        archive.writestr("manifest.json", json.dumps(manifest))
+    return archive_file.getvalue()
+
+
+def load_j5_design(contents: bytes) -> J5Design:
+    """Deserialize a J5Design from an archive made by dump_j5_design
+
+    Raises zipfile.BadZipFile, KeyError or ValueError when contents are
+    not a valid archive, e.g. a j5 results zip.
+    """
+    require_pyarrow()
+    with zipfile.ZipFile(io.BytesIO(contents)) as archive:
+        manifest: Dict[str, Any] = json.loads(archive.read("manifest.json"))
+        if manifest.get("format") != J5_ARCHIVE_FORMAT:
+            raise ValueError("Not a J5Design archive")
+        if manifest["version"] > J5_ARCHIVE_VERSION:
+            raise ValueError(
+                f"J5Design archive version {manifest['version']} is not supported"
+            )
+        unknown_tables: List[str] = [
+            section for section in manifest["tables"] if section not in MASTER_J5_TABLES
+        ]
+        if unknown_tables:
+            raise ValueError(f"Unknown J5Design archive tables: {unknown_tables}")
+        master_j5: MasterJ5 = MasterJ5()
+        if "master_j5/header.txt" in archive.namelist():
+            master_j5.header = archive.read("master_j5/header.txt").decode("utf-8")
+        for section in manifest["tables"]:
+            setattr(
+                master_j5,
+                section,
+                table_from_ipc(archive.read(f"master_j5/{section}.arrow")),
+            )
+        return J5Design(
+            zip_file_name=manifest["zip_file_name"],
+            master_j5=master_j5,
+            plasmid_maps=[
+                PlasmidMap(
+                    filename=filename,
+                    contents=archive.read(f"plasmid_maps/{i}").decode("utf-8"),
+                )
+                for i, filename in enumerate(manifest["plasmid_maps"])
+            ],
+            plasmid_designs=[
+                PlasmidDesign(
+                    filename=filename,
+                    contents=archive.read(f"plasmid_designs/{i}").decode("utf-8"),
+                )
+                for i, filename in enumerate(manifest["plasmid_designs"])
+            ],
+        )
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 
 import collections
+import copy
+import dataclasses
 import io
 import itertools
+import json
 import logging
 import os
 import warnings
@@ -12,18 +15,28 @@ from typing import Any, Dict, Generator, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from Bio import BiopythonWarning, SeqIO
-from pandera import check_types
+from Bio import BiopythonWarning
+from fastapi import HTTPException
 from pandera.typing import DataFrame
 
 import app.api.utils.post_automation as post_automation
 import app.core.j5_to_echo_utils as j5_to_echo_utils
 from app import schemas
-from app.core.assembly import create_equimolar_assembly_instructions
+from app.core.assembly import (
+    WATER_WELL_VOLUME,
+    EchoTransferConstraints,
+    create_equimolar_assembly_instructions,
+)
+from app.core.cache import ResultCache, content_hash
+from app.core.genbank import read_genbank_sequences
+from app.core.instrumentation import instrumented
 from app.core.pcr_update import distribute_pcr
+from app.core.pipeline import Pipeline, PipelineResult, Stage
 from app.core.plating_utils import create_plating_instructions
+from app.core.validation import check_types
+from app.core.volume_ledger import apply_volume_ledger
 from app.core.workflow_readme import workflow_readme
-from app.core.echo import create_echo_instructions
+from app.core.echo import create_echo_instructions, echo_run_time_report
 from app.core import j5
 from app.core import autoprotocols
 from app.core import picking
@@ -40,212 +53,710 @@ DOWNSTREAM_AUTOMATION_PARAMETERS_TEMPLATE: str = os.path.join(
     os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__))),
     "downstream_automation_parameters_template.txt",
 )
+# j5 assembly piece type -> type of reaction the part comes out of
+PART_TYPES: Dict[str, str] = {
+    "PCR": "pcr",
+    "Direct Synthesis/PCR": "pcr",
+    "SOE": "pcr",
+    "Digest Linearized": "digest",
+}
+
+# Number of j5_to_echo pipeline stages allowed to run at the same time
+J5_TO_ECHO_MAX_WORKERS: int = int(os.environ.get("J5_TO_ECHO_MAX_WORKERS", 4))
+J5_TO_ECHO_PIPELINE_INPUTS: Tuple[str, ...] = (
+    "pcr_reactions",
+    "oligos",
+    "direct_synthesis",
+    "digests",
+    "parts",
+    "skinny_assemblies",
+    "part_sources",
+    "plasmid_maps",
+)
+J5_TO_ECHO_CACHE_MAX_SIZE: int = int(os.environ.get("J5_TO_ECHO_CACHE_MAX_SIZE", 16))
+J5_TO_ECHO_CACHE_TTL_SECONDS: float = float(
+    os.environ.get("J5_TO_ECHO_CACHE_TTL_SECONDS", 60 * 60)
+)
+# Echo instruction artifacts of the pipeline by transfer set, in the
+# order the sets are run
+ECHO_INSTRUCTION_ARTIFACTS: Dict[str, str] = {
+    "pcr": "pcr_echo_instructions_df",
+    "zag": "zag_echo_instructions_df",
+    "quant": "quant_echo_instructions",
+    "assembly": "assembly_echo_instructions_df",
+    "equimolar": "equimolar_assembly_echo_instructions",
+}
+# Each run of the pipeline stores one entry per stage
+J5_TO_ECHO_STAGE_CACHE_MAX_SIZE: int = int(
+    os.environ.get("J5_TO_ECHO_STAGE_CACHE_MAX_SIZE", 256)
+)
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 
-def j5_to_echo(j5_design: j5.J5Design) -> Tuple[dict[Any, Any], io.BytesIO]:
-    """Jupyter notebook in function form
+@dataclass(frozen=True)
+class AutomationParameters:
+    max_well_uses: int = MAX_WELL_USES
+    max_fmol: float = 100.0
+    max_vol: float = 5.0
+    max_part_percentage: float = 1.0
+    n_colonies_per_construct: int = 3
+    # Glycerol stock plates colonies are picked into, 96 or 384 wells,
+    # filled "column" or "row" major
+    glycerol_plate_format: int = 96
+    glycerol_plate_fill: str = "column"
+    # Split transfers across replicate source wells so none is drawn
+    # below its dead volume, and report what each well has left
+    track_source_volumes: bool = False
+    # Merge and reorder Echo transfers to shorten runs, and report the
+    # estimated run time of each set of Echo instructions
+    optimize_echo_transfers: bool = False
+    # Quantize equimolar assembly volumes to Echo droplets if set
+    echo_constraints: Optional[EchoTransferConstraints] = None
+
+
+DEFAULT_AUTOMATION_PARAMETERS: AutomationParameters = AutomationParameters()
+
+# Results of j5_to_echo keyed by design_cache_key. Values are
+# (workflow_db_objects, workflow zip bytes)
+J5_TO_ECHO_CACHE: ResultCache = ResultCache(
+    max_size=J5_TO_ECHO_CACHE_MAX_SIZE, ttl=J5_TO_ECHO_CACHE_TTL_SECONDS
+)
+# Outputs of j5_to_echo pipeline stages keyed by stage fingerprint, so
+# that resubmitting a design with different parameters only recomputes
+# the stages affected by the change
+J5_TO_ECHO_STAGE_CACHE: ResultCache = ResultCache(
+    max_size=J5_TO_ECHO_STAGE_CACHE_MAX_SIZE, ttl=J5_TO_ECHO_CACHE_TTL_SECONDS
+)
+
+
+def design_cache_key(j5_design: j5.J5Design, parameters: AutomationParameters) -> str:
+    """Content hash of everything j5_to_echo output depends on
+
+    The zip file name and plasmid designs are not used by j5_to_echo,
+    so they are left out. Plasmid maps are sorted by filename so that
+    upload order does not change the key.
+    """
+    return content_hash(
+        j5_design.master_j5.to_json(),
+        *(
+            f"{plasmid.filename}\n{plasmid.contents}"
+            for plasmid in sorted(
+                j5_design.plasmid_maps, key=lambda plasmid: plasmid.filename
+            )
+        ),
+        repr(parameters),
+    )
+
+
+@instrumented()
+def j5_to_echo(
+    j5_design: j5.J5Design,
+    parameters: AutomationParameters = DEFAULT_AUTOMATION_PARAMETERS,
+    use_cache: bool = True,
+    include_timings: bool = False,
+) -> Tuple[dict[Any, Any], io.BytesIO]:
+    """Automate a J5 design, reusing stored results for identical designs
 
     Arguments
     ---------
-    master_j5 : str
-        String representation of condensed assembly file
+    j5_design : j5.J5Design
+        Condensed J5 design
+
+    parameters : AutomationParameters, optional
+        Pipeline parameters. These are part of the cache key.
+
+    use_cache : bool, optional
+        If False, skip the cache lookups and recompute every stage. The
+        fresh results still replace whatever was stored for this design.
+
+    include_timings : bool, optional
+        Add workflow/timings.json, the resource usage of every stage,
+        to the zip file. Such results describe a single run, so they
+        are neither taken from nor stored in the results cache.
     """
-    logger.debug("Beginning to automate J5 Design")
-    template_plate_df: DataFrame[
-        schemas.TemplatesPlateSchema
-    ] = create_templates_plates(pcr_df=j5_design.master_j5.pcr_reactions)
-    oligos_plate_df: DataFrame[schemas.OligosPlateSchema] = create_oligos_plates(
-        oligos=j5_design.master_j5.oligos
-    )
-    synths_plate_df: DataFrame[schemas.SynthsPlateSchema] = create_synths_plates(
-        directSynthesisDF=j5_design.master_j5.direct_synthesis
-    )
-    oligos_order_form_96: DataFrame[
-        schemas.OligosOrderSchema
-    ] = create_oligos_order_form(
-        oligoPlateDF=oligos_plate_df,
-        oligos=j5_design.master_j5.oligos,
-        size=96,
-    )
-    oligos_order_form_384: DataFrame[
-        schemas.OligosOrderSchema
-    ] = create_oligos_order_form(
-        oligoPlateDF=oligos_plate_df,
-        oligos=j5_design.master_j5.oligos,
-        size=384,
-    )
+    cache_key: str = design_cache_key(j5_design=j5_design, parameters=parameters)
+    if use_cache and not include_timings:
+        cached = J5_TO_ECHO_CACHE.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Using cached automation results for design {cache_key}")
+            cached_db_objects, cached_zip = cached
+            return copy.deepcopy(cached_db_objects), io.BytesIO(cached_zip)
+    # Cached stage outputs must not share DataFrames with the caller's
+    # design, which may be modified after this returns
+    workflow_db_objects, workflow_zip = run_j5_to_echo(
+        j5_design=j5_design.copy(deep=True),
+        parameters=parameters,
+        use_cache=use_cache,
+        include_timings=include_timings,
+    )
+    if not include_timings:
+        J5_TO_ECHO_CACHE.set(
+            cache_key, (copy.deepcopy(workflow_db_objects), workflow_zip.getvalue())
+        )
+    return workflow_db_objects, workflow_zip
 
-    assembly_volume_df: DataFrame[
-        schemas.AssemblyVolumeSchema
-    ] = create_assembly_volume_df(
-        assemblyPartsDF=j5_design.master_j5.parts,
-        skinnyAssemblyInstructionsDF=j5_design.master_j5.skinny_assemblies,
-    )
-    pcr_instructions: DataFrame[schemas.PCRInstructionsSchema]
-    thermocycler: DataFrame[schemas.PCRThermocyclerSchema]
-    (pcr_instructions, thermocycler) = distribute_pcr(
-        templates=template_plate_df,
-        oligos=oligos_plate_df,
-        oligosseq=oligos_order_form_96,
-        pcrrxns=j5_design.master_j5.pcr_reactions,
-        assemblies=assembly_volume_df,
-        max_well_uses=MAX_WELL_USES,
-    )
-    pcr_echo_instructions_df: DataFrame[
-        schemas.EchoInstructionsSchema
-    ] = create_echo_instructions(worksheet=pcr_instructions, method="pcr")
-    pcr_bead_instructions_df = create_bead_instructions(clean_pcr_df=pcr_instructions)
-    clean_pcr_df: DataFrame[schemas.PCRWorksheetSchema] = stamp_pcrs(
-        cleanPCRDF=pcr_instructions
-    )
-    pcr_biomek_instructions_df = create_biomek_pcr_instructions(cleanPCRDF=clean_pcr_df)
-    digest_instructions: DataFrame[schemas.DigestsPlateSchema] = create_clean_digest_df(
-        digestedPiecesDF=j5_design.master_j5.digests,
-        assemblyVolumeDF=assembly_volume_df,
-    )
-    clean_digest_df: DataFrame[schemas.DigestsWorksheetSchema] = stamp_digests(
-        cleanDigestDF=digest_instructions, cleanPCRDF=clean_pcr_df
-    )
-    dpni_biomek_instructions = create_dpni_instructions(clean_pcr_df=clean_pcr_df)
-
-    zag_echo_instructions_df: DataFrame[
-        schemas.EchoInstructionsSchema
-    ] = create_echo_instructions(worksheet=clean_pcr_df, method="zag")
-    assembly_parts_df: DataFrame[schemas.AssemblyPartsSchema] = add_part_locations(
-        assemblyPartsDF=j5_design.master_j5.parts,
-        cleanPCRDF=clean_pcr_df,
-        cleanDigestDF=clean_digest_df,
-    )
-    clean_part_df: DataFrame[schemas.PartsPlateSchema] = create_clean_part_df(
-        parts=j5_design.master_j5.parts,
-        clean_pcr_df=clean_pcr_df,
-        clean_digest_df=clean_digest_df,
-    )
-    assembly_volume_verified_df: DataFrame[
-        schemas.AssemblyVolumeVerifiedSchema
-    ] = verify_volume_requirements(
-        assemblyVolumeDF=assembly_volume_df,
-        assemblyPartsDF=assembly_parts_df,
-    )
-    skinny_assembly_df: DataFrame[
-        schemas.AssemblyWorksheetSchema
-    ] = create_skinny_assembly_df(
-        skinnyassemblyInstructionsDF=j5_design.master_j5.skinny_assemblies,
-        assemblyVolumeDF=assembly_volume_verified_df,
-        assemblyPartsDF=assembly_parts_df,
-    )
-    assembly_echo_instructions_df: DataFrame[
-        schemas.EchoInstructionsSchema
-    ] = create_echo_instructions(worksheet=skinny_assembly_df, method="assembly")
-    construct_df: DataFrame[
-        schemas.ConstructWorksheetSchema
-    ] = j5_to_echo_utils.gather_construct_worksheet(
-        assembly_worksheet=skinny_assembly_df
-    )
-    quant_worksheet: DataFrame[schemas.PartsWorksheetSchema] = create_quant_worksheet(
-        parts_plate=clean_part_df
-    )
-    quant_echo_instructions: DataFrame[
-        schemas.EchoInstructionsSchema
-    ] = create_echo_instructions(worksheet=quant_worksheet, method="quant")
-    equimolar_assembly_df: DataFrame[
-        schemas.EquimolarAssemblyWorksheetSchema
-    ] = create_equimolar_assembly_instructions(
-        assembly_df=skinny_assembly_df,
-        quant_df=quant_worksheet,
-        max_fmol=100.0,
-        max_vol=5.0,
-        max_part_percentage=1.0,
-    )
-    equimolar_assembly_echo_instructions: DataFrame[
-        schemas.EchoInstructionsSchema
-    ] = create_echo_instructions(worksheet=equimolar_assembly_df, method="equimolar")
-    assembly_biomek_instructions = create_assembly_instructions(
-        construct_worksheet=construct_df
-    )
-    plating_instructions_biomek: DataFrame[
-        schemas.PlatingInstructionsSchema
-    ] = create_plating_instructions(
-        plating=construct_df,
-        method="biomek",
-        assemblyColumns=("src_plate", "src_well"),
-    )
-    picking_results_worksheet: DataFrame[
-        schemas.PickingResultsSchema
-    ] = picking.create_picking_instructions(
-        plating_instructions=plating_instructions_biomek, n_colonies_per_construct=3
-    )
-    registry_form, registry_sequences = create_registry_submission_form(
-        construct_worksheet=construct_df,
-    )
-    plasmid_sequences: DataFrame[
-        schemas.BenchlingPlasmidSequences
-    ] = collect_plasmid_sequences(genbanks=j5_design.plasmid_maps)
-    aa_sequences: DataFrame[schemas.BenchlingAASequences] = collect_aa_sequences(
-        part_sources=j5_design.master_j5.part_sources
+
+def ledgered_artifact(artifact: str) -> str:
+    """Name of the echo instruction artifact split by the volume ledger"""
+    return f"{artifact}_ledgered"
+
+
+def j5_to_echo_pipeline(
+    parameters: AutomationParameters = DEFAULT_AUTOMATION_PARAMETERS,
+) -> Pipeline:
+    """Stages of j5_to_echo and the artifacts connecting them
+
+    The initial artifacts are the DataFrames of the master j5 and the
+    plasmid maps of the design.
+    """
+    stages: List[Stage] = [
+        Stage(
+            name="create_templates_plates",
+            func=create_templates_plates,
+            inputs={"pcr_df": "pcr_reactions"},
+            outputs=("template_plate_df",),
+        ),
+        Stage(
+            name="create_oligos_plates",
+            func=create_oligos_plates,
+            inputs={"oligos": "oligos"},
+            outputs=("oligos_plate_df",),
+        ),
+        Stage(
+            name="create_synths_plates",
+            func=create_synths_plates,
+            inputs={"directSynthesisDF": "direct_synthesis"},
+            outputs=("synths_plate_df",),
+        ),
+        Stage(
+            name="create_oligos_order_form_96",
+            func=create_oligos_order_form,
+            inputs={"oligoPlateDF": "oligos_plate_df", "oligos": "oligos"},
+            outputs=("oligos_order_form_96",),
+            params={"size": 96},
+        ),
+        Stage(
+            name="create_oligos_order_form_384",
+            func=create_oligos_order_form,
+            inputs={"oligoPlateDF": "oligos_plate_df", "oligos": "oligos"},
+            outputs=("oligos_order_form_384",),
+            params={"size": 384},
+        ),
+        Stage(
+            name="create_assembly_volume_df",
+            func=create_assembly_volume_df,
+            inputs={
+                "assemblyPartsDF": "parts",
+                "skinnyAssemblyInstructionsDF": "skinny_assemblies",
+            },
+            outputs=("assembly_volume_df",),
+        ),
+        Stage(
+            name="distribute_pcr",
+            func=distribute_pcr,
+            inputs={
+                "templates": "template_plate_df",
+                "oligos": "oligos_plate_df",
+                "oligosseq": "oligos_order_form_96",
+                "pcrrxns": "pcr_reactions",
+                "assemblies": "assembly_volume_df",
+            },
+            outputs=("pcr_instructions", "thermocycler"),
+            params={"max_well_uses": parameters.max_well_uses},
+        ),
+        Stage(
+            name="create_pcr_echo_instructions",
+            func=create_echo_instructions,
+            inputs={"worksheet": "pcr_instructions"},
+            outputs=("pcr_echo_instructions_df",),
+            params={
+                "method": "pcr",
+                "optimize": parameters.optimize_echo_transfers,
+            },
+        ),
+        Stage(
+            name="create_bead_instructions",
+            func=create_bead_instructions,
+            inputs={"clean_pcr_df": "pcr_instructions"},
+            outputs=("pcr_bead_instructions_df",),
+        ),
+        Stage(
+            name="stamp_pcrs",
+            func=stamp_pcrs,
+            inputs={"cleanPCRDF": "pcr_instructions"},
+            outputs=("clean_pcr_df",),
+        ),
+        Stage(
+            name="create_biomek_pcr_instructions",
+            func=create_biomek_pcr_instructions,
+            inputs={"cleanPCRDF": "clean_pcr_df"},
+            outputs=("pcr_biomek_instructions_df",),
+        ),
+        Stage(
+            name="create_clean_digest_df",
+            func=create_clean_digest_df,
+            inputs={
+                "digestedPiecesDF": "digests",
+                "assemblyVolumeDF": "assembly_volume_df",
+            },
+            outputs=("digest_instructions",),
+            params={"max_well_uses": parameters.max_well_uses},
+        ),
+        Stage(
+            name="stamp_digests",
+            func=stamp_digests,
+            inputs={
+                "cleanDigestDF": "digest_instructions",
+                "cleanPCRDF": "clean_pcr_df",
+            },
+            outputs=("clean_digest_df",),
+        ),
+        Stage(
+            name="create_dpni_instructions",
+            func=create_dpni_instructions,
+            inputs={"clean_pcr_df": "clean_pcr_df"},
+            outputs=("dpni_biomek_instructions",),
+        ),
+        Stage(
+            name="create_zag_echo_instructions",
+            func=create_echo_instructions,
+            inputs={"worksheet": "clean_pcr_df"},
+            outputs=("zag_echo_instructions_df",),
+            params={
+                "method": "zag",
+                "optimize": parameters.optimize_echo_transfers,
+            },
+        ),
+        Stage(
+            name="add_part_locations",
+            func=add_part_locations,
+            inputs={
+                "assemblyPartsDF": "parts",
+                "cleanPCRDF": "clean_pcr_df",
+                "cleanDigestDF": "clean_digest_df",
+            },
+            outputs=("assembly_parts_df",),
+        ),
+        Stage(
+            name="create_clean_part_df",
+            func=create_clean_part_df,
+            inputs={
+                "parts": "parts",
+                "clean_pcr_df": "clean_pcr_df",
+                "clean_digest_df": "clean_digest_df",
+            },
+            outputs=("clean_part_df",),
+        ),
+        Stage(
+            name="verify_volume_requirements",
+            func=verify_volume_requirements,
+            inputs={
+                "assemblyVolumeDF": "assembly_volume_df",
+                "assemblyPartsDF": "assembly_parts_df",
+            },
+            outputs=("assembly_volume_verified_df",),
+        ),
+        Stage(
+            name="create_skinny_assembly_df",
+            func=create_skinny_assembly_df,
+            inputs={
+                "skinnyassemblyInstructionsDF": "skinny_assemblies",
+                "assemblyVolumeDF": "assembly_volume_verified_df",
+                "assemblyPartsDF": "assembly_parts_df",
+            },
+            outputs=("skinny_assembly_df",),
+            params={"max_well_uses": parameters.max_well_uses},
+        ),
+        Stage(
+            name="create_assembly_echo_instructions",
+            func=create_echo_instructions,
+            inputs={"worksheet": "skinny_assembly_df"},
+            outputs=("assembly_echo_instructions_df",),
+            params={
+                "method": "assembly",
+                "optimize": parameters.optimize_echo_transfers,
+            },
+        ),
+        Stage(
+            name="gather_construct_worksheet",
+            func=j5_to_echo_utils.gather_construct_worksheet,
+            inputs={"assembly_worksheet": "skinny_assembly_df"},
+            outputs=("construct_df",),
+        ),
+        Stage(
+            name="create_quant_worksheet",
+            func=create_quant_worksheet,
+            inputs={"parts_plate": "clean_part_df"},
+            outputs=("quant_worksheet",),
+        ),
+        Stage(
+            name="create_quant_echo_instructions",
+            func=create_echo_instructions,
+            inputs={"worksheet": "quant_worksheet"},
+            outputs=("quant_echo_instructions",),
+            params={
+                "method": "quant",
+                "optimize": parameters.optimize_echo_transfers,
+            },
+        ),
+        Stage(
+            name="create_equimolar_assembly_instructions",
+            func=create_equimolar_assembly_instructions,
+            inputs={"assembly_df": "skinny_assembly_df", "quant_df": "quant_worksheet"},
+            outputs=("equimolar_assembly_df",),
+            params={
+                "max_fmol": parameters.max_fmol,
+                "max_vol": parameters.max_vol,
+                "max_part_percentage": parameters.max_part_percentage,
+                "constraints": parameters.echo_constraints,
+            },
+        ),
+        Stage(
+            name="create_equimolar_assembly_echo_instructions",
+            func=create_echo_instructions,
+            inputs={"worksheet": "equimolar_assembly_df"},
+            outputs=("equimolar_assembly_echo_instructions",),
+            params={
+                "method": "equimolar",
+                "optimize": parameters.optimize_echo_transfers,
+            },
+        ),
+        Stage(
+            name="create_assembly_instructions",
+            func=create_assembly_instructions,
+            inputs={"construct_worksheet": "construct_df"},
+            outputs=("assembly_biomek_instructions",),
+        ),
+        Stage(
+            name="create_plating_instructions",
+            func=create_plating_instructions,
+            inputs={"plating": "construct_df"},
+            outputs=("plating_instructions_biomek",),
+            params={"method": "biomek", "assemblyColumns": ("src_plate", "src_well")},
+        ),
+        Stage(
+            name="create_picking_instructions",
+            func=picking.create_picking_instructions,
+            inputs={"plating_instructions": "plating_instructions_biomek"},
+            outputs=("picking_results_worksheet",),
+            params={
+                "n_colonies_per_construct": parameters.n_colonies_per_construct,
+                "plate_format": parameters.glycerol_plate_format,
+                "fill": parameters.glycerol_plate_fill,
+            },
+        ),
+        Stage(
+            name="create_registry_submission_form",
+            func=create_registry_submission_form,
+            inputs={"construct_worksheet": "construct_df"},
+            outputs=("registry_form", "registry_sequences"),
+        ),
+        Stage(
+            name="collect_plasmid_sequences",
+            func=collect_plasmid_sequences,
+            inputs={"genbanks": "plasmid_maps"},
+            outputs=("plasmid_sequences",),
+        ),
+        Stage(
+            name="collect_aa_sequences",
+            func=collect_aa_sequences,
+            inputs={"part_sources": "part_sources"},
+            outputs=("aa_sequences",),
+        ),
+        Stage(
+            name="collect_gene_sequences",
+            func=collect_gene_sequences,
+            inputs={"part_sources": "part_sources"},
+            outputs=("gene_sequences",),
+        ),
+        Stage(
+            name="order_genes",
+            func=autoprotocols.order_genes,
+            inputs={"synths_order_form_384": "synths_plate_df"},
+            outputs=("setup_synths_plate_json",),
+        ),
+        Stage(
+            name="order_oligos",
+            func=autoprotocols.order_oligos,
+            inputs={"oligos_order_form_384": "oligos_order_form_384"},
+            outputs=("setup_oligos_plate_json",),
+        ),
+        Stage(
+            name="setup_templates_plate",
+            func=autoprotocols.setup_templates_plate,
+            inputs={
+                "templates_plate": "template_plate_df",
+                "synths_plate": "synths_plate_df",
+            },
+            outputs=("setup_templates_plate_json",),
+        ),
+        Stage(
+            name="perform_pcrs",
+            func=autoprotocols.perform_pcrs,
+            inputs={
+                "echo_instructions": "pcr_echo_instructions_df",
+                "thermocycler_instructions": "thermocycler",
+            },
+            outputs=("perform_pcrs_json",),
+        ),
+        Stage(
+            name="analyze_pcrs",
+            func=autoprotocols.analyze_pcrs,
+            inputs={"pcr_worksheet": "clean_pcr_df"},
+            outputs=("analyze_pcrs_json",),
+        ),
+        Stage(
+            name="perform_digestions",
+            func=autoprotocols.perform_digestions,
+            inputs={
+                "pcr_worksheet": "clean_pcr_df",
+                "digest_worksheet": "clean_digest_df",
+            },
+            outputs=("perform_digestions_json",),
+        ),
+        Stage(
+            name="perform_cleanups",
+            func=autoprotocols.perform_cleanups,
+            inputs={
+                "pcr_worksheet": "clean_pcr_df",
+                "digest_worksheet": "clean_digest_df",
+            },
+            outputs=("perform_cleanups_json",),
+        ),
+        Stage(
+            name="organize_and_quantify_fragments",
+            func=autoprotocols.organize_and_quantify_fragments,
+            inputs={"quant_worksheet": "quant_worksheet"},
+            outputs=("quantify_parts_json",),
+        ),
+        Stage(
+            name="perform_assembly",
+            func=autoprotocols.perform_assembly,
+            inputs={"assembly_echo_instructions": "assembly_echo_instructions_df"},
+            outputs=("perform_assembly_json",),
+        ),
+        Stage(
+            name="perform_transformation",
+            func=autoprotocols.perform_transformation,
+            inputs={"plating_instructions": "plating_instructions_biomek"},
+            outputs=("perform_transformation_json",),
+        ),
+        Stage(
+            name="perform_colony_picking",
+            func=autoprotocols.perform_colony_picking,
+            inputs={"picking_instructions": "picking_results_worksheet"},
+            outputs=("perform_picking_json",),
+        ),
+    ]
+    if parameters.track_source_volumes:
+        # The ledger stage writes split copies of the echo instruction
+        # artifacts, which the stages using echo instructions read
+        ledgered: Dict[str, str] = {
+            artifact: ledgered_artifact(artifact)
+            for artifact in ECHO_INSTRUCTION_ARTIFACTS.values()
+        }
+        stages = [
+            dataclasses.replace(
+                stage,
+                inputs={
+                    argument: ledgered.get(name, name)
+                    for argument, name in stage.inputs.items()
+                },
+            )
+            for stage in stages
+        ]
+        stages.append(
+            Stage(
+                name="apply_source_volume_ledger",
+                func=apply_source_volume_ledger,
+                inputs={
+                    **ECHO_INSTRUCTION_ARTIFACTS,
+                    "assemblyPartsDF": "assembly_parts_df",
+                },
+                outputs=(*ledgered.values(), "source_well_depletion"),
+                params={"constraints": parameters.echo_constraints},
+            )
+        )
+    return Pipeline(stages=stages, initial=J5_TO_ECHO_PIPELINE_INPUTS)
+
+
+def apply_source_volume_ledger(
+    pcr: pd.DataFrame,
+    zag: pd.DataFrame,
+    quant: pd.DataFrame,
+    assembly: pd.DataFrame,
+    equimolar: pd.DataFrame,
+    assemblyPartsDF: DataFrame[schemas.AssemblyPartsSchema],
+    constraints: Optional[EchoTransferConstraints] = None,
+) -> Tuple[pd.DataFrame, ...]:
+    """Track source well volumes across the echo instructions of a design
+
+    Replicate PCR reactions of a part are interchangeable source wells,
+    and water wells hold WATER_WELL_VOLUME. The plain and equimolar
+    assembly instructions are alternatives. Split transfers are rounded
+    to constraints, or to Echo droplets if not set. See
+    apply_volume_ledger.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, ...]
+        The echo instructions in the order of ECHO_INSTRUCTION_ARTIFACTS, followed
+        by the depletion report
+    """
+    replicates = explode_source_locations(assemblyPartsDF).rename(
+        columns={
+            "SOURCE_PLATE": "PLATE",
+            "SOURCE_WELL": "WELL",
+            "ID Number": "REPLICATE_GROUP",
+        }
     )
-    gene_sequences: DataFrame[schemas.BenchlingGeneSequences] = collect_gene_sequences(
-        part_sources=j5_design.master_j5.part_sources
+    water = equimolar.loc[
+        equimolar["Source Plate Name"].str.startswith("water_plate"),
+        ["Source Plate Name", "Source Well"],
+    ].drop_duplicates()
+    well_volumes = pd.DataFrame(
+        {
+            "PLATE": water["Source Plate Name"],
+            "WELL": water["Source Well"],
+            "VOLUME": WATER_WELL_VOLUME,
+        }
     )
+    instruction_sets, report = apply_volume_ledger(
+        {
+            "pcr": pcr,
+            "zag": zag,
+            "quant": quant,
+            "assembly": assembly,
+            "equimolar": equimolar,
+        },
+        well_volumes=well_volumes,
+        replicates=replicates,
+        alternatives=("assembly", "equimolar"),
+        constraints=constraints or EchoTransferConstraints(),
+    )
+    overdrawn = report.loc[report["OVERDRAWN"], :]
+    if not overdrawn.empty:
+        logger.warning(
+            f"{overdrawn.shape[0]} source wells are drawn below their dead volume:"
+            f" {list(zip(overdrawn['PLATE'], overdrawn['WELL']))}"
+        )
+    return (*instruction_sets.values(), report)
+
+
+def run_j5_to_echo(
+    j5_design: j5.J5Design,
+    parameters: AutomationParameters = DEFAULT_AUTOMATION_PARAMETERS,
+    use_cache: bool = True,
+    include_timings: bool = False,
+) -> Tuple[dict[Any, Any], io.BytesIO]:
+    """Jupyter notebook in function form
+
+    Arguments
+    ---------
+    j5_design : j5.J5Design
+        Condensed J5 design
+
+    parameters : AutomationParameters, optional
+        Pipeline parameters
+
+    use_cache : bool, optional
+        If False, rerun stages whose outputs are in the stage cache
+
+    include_timings : bool, optional
+        Add workflow/timings.json with the metrics of every stage
+    """
+    logger.debug("Beginning to automate J5 Design")
+    pipeline_result: PipelineResult = j5_to_echo_pipeline(parameters=parameters).run(
+        initial={
+            "pcr_reactions": j5_design.master_j5.pcr_reactions,
+            "oligos": j5_design.master_j5.oligos,
+            "direct_synthesis": j5_design.master_j5.direct_synthesis,
+            "digests": j5_design.master_j5.digests,
+            "parts": j5_design.master_j5.parts,
+            "skinny_assemblies": j5_design.master_j5.skinny_assemblies,
+            "part_sources": j5_design.master_j5.part_sources,
+            "plasmid_maps": j5_design.plasmid_maps,
+        },
+        max_workers=J5_TO_ECHO_MAX_WORKERS,
+        cache=J5_TO_ECHO_STAGE_CACHE,
+        reuse_cached=use_cache,
+    )
+    if pipeline_result.reused:
+        logger.debug(
+            f"Reused {len(pipeline_result.reused)} cached stages,"
+            f" recomputed {sorted(pipeline_result.timings)}"
+        )
+    artifacts: Dict[str, Any] = pipeline_result.artifacts
+    if parameters.track_source_volumes:
+        # Write out the echo instructions as split by the ledger
+        artifacts = {
+            **artifacts,
+            **{
+                artifact: artifacts[ledgered_artifact(artifact)]
+                for artifact in ECHO_INSTRUCTION_ARTIFACTS.values()
+            },
+        }
 
     # Preparing ultimate results
     results: Dict[str, Any] = {}
     results["README.md"] = workflow_readme(0)
     results["Input"] = {
         "master_j5.csv": j5_design.master_j5.to_file(),
-        "benchling_plasmid_sequences.csv": plasmid_sequences.to_csv(index=False),
-        "benchling_aa_sequences.csv": aa_sequences.to_csv(index=False),
-        "benchling_gene_sequences.csv": gene_sequences.to_csv(index=False),
+        "benchling_plasmid_sequences.csv": artifacts["plasmid_sequences"].to_csv(
+            index=False
+        ),
+        "benchling_aa_sequences.csv": artifacts["aa_sequences"].to_csv(index=False),
+        "benchling_gene_sequences.csv": artifacts["gene_sequences"].to_csv(index=False),
         "plasmid_maps": {
             plasmid.filename: plasmid.contents for plasmid in j5_design.plasmid_maps
         },
     }
     results["Step_1-Order_genes"] = {
         "README.md": workflow_readme(1),
-        "synths_plate.csv": synths_plate_df.to_csv(index=False),
-        "setup_synths_plate.json": autoprotocols.order_genes(
-            synths_order_form_384=synths_plate_df
-        ),
+        "synths_plate.csv": artifacts["synths_plate_df"].to_csv(index=False),
+        "setup_synths_plate.json": artifacts["setup_synths_plate_json"],
     }
     results["Step_2-Order_oligos"] = {
         "README.md": workflow_readme(2),
-        "oligos_plate.csv": oligos_plate_df.to_csv(index=False),
-        "oligos_order_96.csv": oligos_order_form_96.to_csv(index=False),
-        "oligos_order_384.csv": oligos_order_form_384.to_csv(index=False),
-        "oligos_order_96.xlsx": to_excel_bytestring(oligos_order_form_96, "oligos"),
-        "oligos_order_384.xlsx": to_excel_bytestring(oligos_order_form_384, "oligos"),
-        "setup_oligos_plate.json": autoprotocols.order_oligos(
-            oligos_order_form_384=oligos_order_form_384
+        "oligos_plate.csv": artifacts["oligos_plate_df"].to_csv(index=False),
+        "oligos_order_96.csv": artifacts["oligos_order_form_96"].to_csv(index=False),
+        "oligos_order_384.csv": artifacts["oligos_order_form_384"].to_csv(index=False),
+        "oligos_order_96.xlsx": to_excel_bytestring(
+            artifacts["oligos_order_form_96"], "oligos"
+        ),
+        "oligos_order_384.xlsx": to_excel_bytestring(
+            artifacts["oligos_order_form_384"], "oligos"
         ),
+        "setup_oligos_plate.json": artifacts["setup_oligos_plate_json"],
     }
     results["Step_3-Prepare_templates"] = {
         "README.md": workflow_readme(3),
-        "templates_plate.csv": template_plate_df.to_csv(index=False),
-        "setup_templates_plate.json": autoprotocols.setup_templates_plate(
-            templates_plate=template_plate_df, synths_plate=synths_plate_df
-        ),
+        "templates_plate.csv": artifacts["template_plate_df"].to_csv(index=False),
+        "setup_templates_plate.json": artifacts["setup_templates_plate_json"],
     }
     results["Step_4-Perform_PCRs"] = {
-        "README.md": workflow_readme(4),
-        "clean_pcr_worksheet.csv": clean_pcr_df.to_csv(index=False),
-        "pcr_echo_instructions.csv": pcr_echo_instructions_df.to_csv(index=False),
-        "pcr_biomek_instructions.csv": pcr_biomek_instructions_df.to_csv(index=False),
-        "pcr_thermocycler_instructions.csv": (thermocycler.to_csv(index=False)),
-        "perform_pcrs.json": autoprotocols.perform_pcrs(
-            echo_instructions=pcr_echo_instructions_df,
-            thermocycler_instructions=thermocycler,
+        "README.md": workflow_readme(4, parameters.track_source_volumes),
+        "clean_pcr_worksheet.csv": artifacts["clean_pcr_df"].to_csv(index=False),
+        "pcr_echo_instructions.csv": artifacts["pcr_echo_instructions_df"].to_csv(
+            index=False
         ),
+        "pcr_biomek_instructions.csv": artifacts["pcr_biomek_instructions_df"].to_csv(
+            index=False
+        ),
+        "pcr_thermocycler_instructions.csv": (
+            artifacts["thermocycler"].to_csv(index=False)
+        ),
+        "perform_pcrs.json": artifacts["perform_pcrs_json"],
     }
     results["Step_5-Analyze_PCRs"] = {
         "README.md": workflow_readme(5),
-        "zag_echo_instructions.csv": zag_echo_instructions_df.to_csv(index=False),
-        "analyze_pcrs.json": autoprotocols.analyze_pcrs(
-            pcr_worksheet=clean_pcr_df,
+        "zag_echo_instructions.csv": artifacts["zag_echo_instructions_df"].to_csv(
+            index=False
         ),
+        "analyze_pcrs.json": artifacts["analyze_pcrs_json"],
     }
     results["Step_6-Redo_PCRs"] = {
         "README.md": workflow_readme(6),
@@ -255,47 +766,47 @@ def j5_to_echo(j5_design: j5.J5Design) -> Tuple[dict[Any, Any], io.BytesIO]:
     }
     results["Step_8-Restriction_Digests"] = {
         "README.md": workflow_readme(8),
-        "digests_plate.csv": clean_digest_df.to_csv(index=False),
-        "dpni_biomek_instructions.csv": dpni_biomek_instructions.to_csv(index=False),
-        "perform_digestions.json": autoprotocols.perform_digestions(
-            pcr_worksheet=clean_pcr_df,
-            digest_worksheet=clean_digest_df,
+        "digests_plate.csv": artifacts["clean_digest_df"].to_csv(index=False),
+        "dpni_biomek_instructions.csv": artifacts["dpni_biomek_instructions"].to_csv(
+            index=False
         ),
+        "perform_digestions.json": artifacts["perform_digestions_json"],
     }
     results["Step_9-PCR_Cleanup"] = {
         "README.md": workflow_readme(9),
-        "bead_biomek_instructions.csv": pcr_bead_instructions_df.to_csv(index=False),
-        "perform_cleanups.json": autoprotocols.perform_cleanups(
-            pcr_worksheet=clean_pcr_df,
-            digest_worksheet=clean_digest_df,
+        "bead_biomek_instructions.csv": artifacts["pcr_bead_instructions_df"].to_csv(
+            index=False
         ),
+        "perform_cleanups.json": artifacts["perform_cleanups_json"],
     }
     results["Step_10-Quantify_Part_Yield"] = {
-        "README.md": workflow_readme(10),
-        "parts_plate.csv": clean_part_df.to_csv(index=False),
-        "quant_worksheet.csv": quant_worksheet.to_csv(index=False),
-        "quant_echo_instructions.csv": quant_echo_instructions.to_csv(index=False),
-        "quantify_parts.json": autoprotocols.organize_and_quantify_fragments(
-            quant_worksheet=quant_worksheet
+        "README.md": workflow_readme(10, parameters.track_source_volumes),
+        "parts_plate.csv": artifacts["clean_part_df"].to_csv(index=False),
+        "quant_worksheet.csv": artifacts["quant_worksheet"].to_csv(index=False),
+        "quant_echo_instructions.csv": artifacts["quant_echo_instructions"].to_csv(
+            index=False
         ),
+        "quantify_parts.json": artifacts["quantify_parts_json"],
     }
     results["Step_11-Perform_Assembly"] = {
-        "README.md": workflow_readme(11),
-        "clean_assembly_worksheet.csv": skinny_assembly_df.to_csv(index=False),
+        "README.md": workflow_readme(11, parameters.track_source_volumes),
+        "clean_assembly_worksheet.csv": artifacts["skinny_assembly_df"].to_csv(
+            index=False
+        ),
         "assembly_echo_instructions.csv": (
-            assembly_echo_instructions_df.to_csv(index=False)
+            artifacts["assembly_echo_instructions_df"].to_csv(index=False)
         ),
         "assembly_biomek_instructions.csv": (
-            assembly_biomek_instructions.to_csv(index=False)
+            artifacts["assembly_biomek_instructions"].to_csv(index=False)
         ),
-        "construct_worksheet.csv": construct_df.to_csv(index=False),
-        "equimolar_assembly_worksheet.csv": (equimolar_assembly_df.to_csv(index=False)),
-        "equimolar_assembly_echo_instructions.csv": (
-            equimolar_assembly_echo_instructions.to_csv(index=False)
+        "construct_worksheet.csv": artifacts["construct_df"].to_csv(index=False),
+        "equimolar_assembly_worksheet.csv": (
+            artifacts["equimolar_assembly_df"].to_csv(index=False)
         ),
-        "perform_assembly.json": autoprotocols.perform_assembly(
-            assembly_echo_instructions=assembly_echo_instructions_df
+        "equimolar_assembly_echo_instructions.csv": (
+            artifacts["equimolar_assembly_echo_instructions"].to_csv(index=False)
         ),
+        "perform_assembly.json": artifacts["perform_assembly_json"],
     }
     results["Step_12-Yeast_Plasmid_Prep"] = {
         "README.md": workflow_readme(12),
@@ -303,23 +814,23 @@ def j5_to_echo(j5_design: j5.J5Design) -> Tuple[dict[Any, Any], io.BytesIO]:
     results["Step_13-Ecoli_Transformation"] = {
         "README.md": workflow_readme(13),
         "plating_instructions_biomek.csv": (
-            plating_instructions_biomek.to_csv(index=False)
-        ),
-        "perform_transformation.json": autoprotocols.perform_transformation(
-            plating_instructions=plating_instructions_biomek
+            artifacts["plating_instructions_biomek"].to_csv(index=False)
         ),
+        "perform_transformation.json": artifacts["perform_transformation_json"],
     }
     results["Step_14-Colony_Picking"] = {
         "README.md": workflow_readme(14),
-        "picking_worksheet.csv": picking_results_worksheet.to_csv(index=False),
-        "perform_picking.json": autoprotocols.perform_colony_picking(
-            picking_instructions=picking_results_worksheet
+        "picking_worksheet.csv": artifacts["picking_results_worksheet"].to_csv(
+            index=False
         ),
+        "perform_picking.json": artifacts["perform_picking_json"],
     }
     results["Step_15-Request_NGS"] = {
         "README.md": workflow_readme(15),
-        "registry_submission_form.csv": registry_form.to_csv(index=False),
-        "registry_submission_sequences.csv": registry_sequences.to_csv(index=False),
+        "registry_submission_form.csv": artifacts["registry_form"].to_csv(index=False),
+        "registry_submission_sequences.csv": artifacts["registry_sequences"].to_csv(
+            index=False
+        ),
     }
     results["Step_16-Submit_NGS_Samples"] = {
         "README.md": workflow_readme(16),
@@ -333,6 +844,27 @@ def j5_to_echo(j5_design: j5.J5Design) -> Tuple[dict[Any, Any], io.BytesIO]:
     results["Step_19-Submit_To_Registry"] = {
         "README.md": workflow_readme(19),
     }
+    if parameters.track_source_volumes:
+        results["source_well_depletion.csv"] = artifacts[
+            "source_well_depletion"
+        ].to_csv(index=False)
+    if parameters.optimize_echo_transfers:
+        results["echo_run_time_estimates.csv"] = echo_run_time_report(
+            {
+                name: artifacts[artifact]
+                for name, artifact in ECHO_INSTRUCTION_ARTIFACTS.items()
+            }
+        ).to_csv(index=False)
+    if include_timings:
+        results["timings.json"] = json.dumps(
+            {
+                "stages": [
+                    metrics.to_dict() for metrics in pipeline_result.metrics.values()
+                ],
+                "reused_stages": sorted(pipeline_result.reused),
+            },
+            indent=2,
+        )
     # Returning results in a zip file
     initial_workflow_zip = create_workflow_zip({"workflow": results})
 
@@ -342,129 +874,133 @@ def j5_to_echo(j5_design: j5.J5Design) -> Tuple[dict[Any, Any], io.BytesIO]:
             {
                 "name": "synths_plate.csv",
                 "size": 96,
-                "raw_data": synths_plate_df.to_csv(),
+                "raw_data": artifacts["synths_plate_df"].to_csv(),
                 "plate_type": "synth",
-                "plate_names": list(synths_plate_df["PLATE ID"].unique()),
+                "plate_names": list(artifacts["synths_plate_df"]["PLATE ID"].unique()),
             },
             {
                 "name": "oligos_plate.csv",
                 "size": 384,
-                "raw_data": oligos_plate_df.to_csv(),
+                "raw_data": artifacts["oligos_plate_df"].to_csv(),
                 "plate_type": "oligo",
-                "plate_names": list(oligos_plate_df["PLATE ID"].unique()),
+                "plate_names": list(artifacts["oligos_plate_df"]["PLATE ID"].unique()),
             },
             {
                 "name": "templates_plate.csv",
                 "size": 384,
-                "raw_data": template_plate_df.to_csv(),
+                "raw_data": artifacts["template_plate_df"].to_csv(),
                 "plate_type": "template",
-                "plate_names": list(template_plate_df["PLATE ID"].unique()),
+                "plate_names": list(
+                    artifacts["template_plate_df"]["PLATE ID"].unique()
+                ),
             },
             {
                 "name": "digests_plate.csv",
                 "size": 96,
-                "raw_data": clean_digest_df.to_csv(),
+                "raw_data": artifacts["clean_digest_df"].to_csv(),
                 "plate_type": "digest",
-                "plate_names": list(clean_digest_df["DIGEST_SOURCE_PLATE"].unique()),
+                "plate_names": list(
+                    artifacts["clean_digest_df"]["DIGEST_SOURCE_PLATE"].unique()
+                ),
             },
             {
                 "name": "parts_plate.csv",
                 "size": 384,
-                "raw_data": clean_part_df.to_csv(),
+                "raw_data": artifacts["clean_part_df"].to_csv(),
                 "plate_type": "part",
-                "plate_names": list(clean_part_df["PART_PLATE"].unique()),
+                "plate_names": list(artifacts["clean_part_df"]["PART_PLATE"].unique()),
             },
             {
                 "name": "clean_pcr_worksheet.csv",
                 "size": 96,
-                "raw_data": clean_pcr_df.to_csv(),
+                "raw_data": artifacts["clean_pcr_df"].to_csv(),
                 "plate_type": "pcr",
-                "plate_names": list(clean_pcr_df["OUTPUT_PLATE"].unique()),
+                "plate_names": list(artifacts["clean_pcr_df"]["OUTPUT_PLATE"].unique()),
             },
         ],
         "instructions": [
             {
                 "category": "oligo_order_96.csv",
                 "trial": 1,
-                "data": oligos_order_form_96.to_csv(),
+                "data": artifacts["oligos_order_form_96"].to_csv(),
                 "assocations": ["oligo"],
             },
             {
                 "category": "pcr_worksheet",
                 "trial": 1,
-                "data": clean_pcr_df.to_csv(),
+                "data": artifacts["clean_pcr_df"].to_csv(),
                 "assocations": ["pcr", "template", "oligo", "part"],
             },
             {
                 "category": "part_worksheet",
                 "trial": 1,
-                "data": clean_part_df.to_csv(),
+                "data": artifacts["clean_part_df"].to_csv(),
                 "assocations": ["part"],
             },
             {
                 "category": "clean_assembly_worksheet",
                 "trial": 1,
-                "data": skinny_assembly_df.to_csv(),
+                "data": artifacts["skinny_assembly_df"].to_csv(),
                 "assocations": ["assembly"],
             },
             {
                 "category": "pcr_echo_instructions.csv",
                 "trial": 1,
-                "data": pcr_echo_instructions_df.to_csv(),
+                "data": artifacts["pcr_echo_instructions_df"].to_csv(),
                 "assocations": ["pcr", "template", "oligo"],
             },
             {
                 "category": "pcr_biomek_instructions.csv",
                 "trial": 1,
-                "data": pcr_biomek_instructions_df.to_csv(),
+                "data": artifacts["pcr_biomek_instructions_df"].to_csv(),
                 "assocations": ["pcr", "template", "oligo"],
             },
             {
                 "category": "zag_echo_instructions.csv",
                 "trial": 1,
-                "data": zag_echo_instructions_df.to_csv(),
+                "data": artifacts["zag_echo_instructions_df"].to_csv(),
                 "assocations": ["pcr"],
             },
             {
                 "category": "bead_biomek_instructions.csv",
                 "trial": 1,
-                "data": pcr_bead_instructions_df.to_csv(),
+                "data": artifacts["pcr_bead_instructions_df"].to_csv(),
                 "assocations": ["pcr"],
             },
             {
                 "category": "dpni_biomek_instructions.csv",
                 "trial": 1,
-                "data": dpni_biomek_instructions.to_csv(),
+                "data": artifacts["dpni_biomek_instructions"].to_csv(),
                 "assocations": ["pcr"],
             },
             {
                 "category": "assembly_biomek_instructions.csv",
                 "trial": 1,
-                "data": assembly_biomek_instructions.to_csv(),
+                "data": artifacts["assembly_biomek_instructions"].to_csv(),
                 "assocations": ["assembly"],
             },
             {
                 "category": "construct_worksheet.csv",
                 "trial": 1,
-                "data": construct_df.to_csv(),
+                "data": artifacts["construct_df"].to_csv(),
                 "associations": ["construct"],
             },
             {
                 "category": "quant_worksheet.csv",
                 "trial": 1,
-                "data": quant_worksheet.to_csv(),
+                "data": artifacts["quant_worksheet"].to_csv(),
                 "associations": ["quant"],
             },
             {
                 "category": "registry_submission_form.csv",
                 "trial": 1,
-                "data": registry_form.to_csv(),
+                "data": artifacts["registry_form"].to_csv(),
                 "associations": ["registry"],
             },
             {
                 "category": "registry_submission_sequences.csv",
                 "trial": 1,
-                "data": registry_sequences.to_csv(),
+                "data": artifacts["registry_sequences"].to_csv(),
                 "associations": ["registry"],
             },
         ],
@@ -483,6 +1019,7 @@ def j5_to_echo(j5_design: j5.J5Design) -> Tuple[dict[Any, Any], io.BytesIO]:
     return workflow_db_objects, initial_workflow_zip
 
 
+@instrumented()
 def create_workflow_zip(contents: dict) -> io.BytesIO:
     in_mem_zip = io.BytesIO()
     with zipfile.ZipFile(in_mem_zip, "w") as archive:
@@ -492,15 +1029,6 @@ def create_workflow_zip(contents: dict) -> io.BytesIO:
     return in_mem_zip
 
 
-def read_genbank_sequence(genbank: str) -> str:
-    """Read sequence from genbank string"""
-    return str(
-        list(SeqIO.to_dict(SeqIO.parse(io.StringIO(genbank), "genbank")).values())[
-            0
-        ].seq
-    ).upper()
-
-
 @check_types()
 def collect_plasmid_sequences(
     genbanks: List[j5.PlasmidMap],
@@ -508,11 +1036,12 @@ def collect_plasmid_sequences(
     """Get raw plasmid sequences from design genbanks"""
     if not genbanks:
         return pd.DataFrame(columns=["Name", "Bases", "Type"])
-    plasmid_names: List[str] = []
-    plasmid_seqs: List[str] = []
-    for plasmid_map in genbanks:
-        plasmid_names.append(plasmid_map.filename.replace(".gb", ""))
-        plasmid_seqs.append(read_genbank_sequence(genbank=plasmid_map.contents))
+    plasmid_names: List[str] = [
+        plasmid_map.filename.replace(".gb", "") for plasmid_map in genbanks
+    ]
+    plasmid_seqs: List[str] = read_genbank_sequences(
+        [plasmid_map.contents for plasmid_map in genbanks]
+    )
     return (
         pd.DataFrame({"Name": plasmid_names, "Bases": plasmid_seqs})
         .assign(Type="cloning")
@@ -567,6 +1096,7 @@ def distribute_high_use_parts(
     tmpSkinnyAssembly: pd.DataFrame,
     assemblyVolumeDF: DataFrame[schemas.AssemblyVolumeVerifiedSchema],
     assemblyPartsDF: DataFrame[schemas.AssemblyPartsSchema],
+    max_well_uses: int = MAX_WELL_USES,
 ) -> DataFrame[schemas.AssemblyWorksheetSchema]:
     """Distributes parts that are used a lot
 
@@ -585,6 +1115,9 @@ def distribute_high_use_parts(
     assemblyPartsDF: pd.DataFrame
         Table of parts used in the assembly and their IDs
 
+    max_well_uses: int
+        Maximum number of transfers out of a single well
+
     Returns
     -------
     tmpSkinnyAssembly: pd.DataFrame
@@ -592,28 +1125,61 @@ def distribute_high_use_parts(
         multiple wells instead of just one.
 
     """
-    for partID in assemblyVolumeDF.loc[
-        assemblyVolumeDF["NUMBER_OF_USES"] > MAX_WELL_USES, "PART_ID"
-    ]:
-        distributedWells = j5_to_echo_utils.distributeWells(
-            assemblyVolumeDF.loc[
-                assemblyVolumeDF["PART_ID"] == partID, "NUMBER_OF_USES"
-            ].values[0],
-            eval(
-                assemblyPartsDF.loc[
-                    assemblyPartsDF["ID Number"] == partID,
-                    "SOURCE_LOCATIONS",
-                ].values[0]
+    high_use_parts = assemblyVolumeDF.loc[
+        assemblyVolumeDF["NUMBER_OF_USES"] > max_well_uses, "PART_ID"
+    ]
+    high_use = tmpSkinnyAssembly["Part ID"].isin(high_use_parts)
+    if not high_use.any():
+        return tmpSkinnyAssembly
+    # Consecutive uses of a part share a well until it has been used
+    # max_well_uses times, then move on to its next source location
+    uses = pd.DataFrame(
+        {
+            "ID Number": tmpSkinnyAssembly.loc[high_use, "Part ID"],
+            "SOURCE_SLOT": (
+                tmpSkinnyAssembly.loc[high_use].groupby("Part ID").cumcount()
+                // max_well_uses
             ),
-            maxWellUses=MAX_WELL_USES,
+        }
+    )
+    distributedWells = uses.merge(
+        explode_source_locations(assemblyPartsDF),
+        on=["ID Number", "SOURCE_SLOT"],
+        how="left",
+    ).set_index(uses.index)
+    if distributedWells["SOURCE_PLATE"].isna().any():
+        raise HTTPException(
+            status_code=500,
+            detail="Not enough available wells for number of uses",
         )
-        tmpSkinnyAssembly.loc[
-            tmpSkinnyAssembly["Part ID"] == partID,
-            ["Source Plate", "Source Well"],
-        ] = distributedWells
+    tmpSkinnyAssembly.loc[high_use, ["Source Plate", "Source Well"]] = distributedWells[
+        ["SOURCE_PLATE", "SOURCE_WELL"]
+    ].to_numpy()
     return tmpSkinnyAssembly
 
 
+def explode_source_locations(
+    assemblyPartsDF: DataFrame[schemas.AssemblyPartsSchema],
+) -> pd.DataFrame:
+    """One row per source location of each part
+
+    Returns
+    -------
+    pd.DataFrame
+        ID Number of the part, SOURCE_SLOT (position of the location in
+        SOURCE_LOCATIONS), SOURCE_PLATE and SOURCE_WELL
+    """
+    locations = (
+        assemblyPartsDF.loc[:, ["ID Number", "SOURCE_LOCATIONS"]]
+        .explode("SOURCE_LOCATIONS")
+        .dropna(subset=["SOURCE_LOCATIONS"])
+    )
+    locations["SOURCE_SLOT"] = locations.groupby("ID Number").cumcount()
+    locations["SOURCE_PLATE"] = locations["SOURCE_LOCATIONS"].str[0]
+    locations["SOURCE_WELL"] = locations["SOURCE_LOCATIONS"].str[1]
+    return locations.drop(columns="SOURCE_LOCATIONS").reset_index(drop=True)
+
+
 @check_types()
 def verify_volume_requirements(
     assemblyVolumeDF: DataFrame[schemas.AssemblyVolumeSchema],
@@ -635,14 +1201,14 @@ def verify_volume_requirements(
     Returns
     -------
     assemblyVolumeDF: pd.DataFrame
-        same dataframe as above, modified to also say
+        copy of the dataframe above, modified to also say
         whether there's enough volume for the rxns
 
     """
-
-    assemblyVolumeDF["NUMBER_OF_RXNS_PERFORMED"] = assemblyPartsDF.apply(
-        lambda row: len(row["SOURCE_LOCATIONS"]), axis=1
-    )
+    assemblyVolumeDF = assemblyVolumeDF.copy()
+    assemblyVolumeDF["NUMBER_OF_RXNS_PERFORMED"] = assemblyPartsDF[
+        "SOURCE_LOCATIONS"
+    ].str.len()
     assemblyVolumeDF["VOLUME_OBTAINED_(uL)"] = (
         assemblyVolumeDF["NUMBER_OF_RXNS_PERFORMED"] * 40
     )  # 40 uL elution volume
@@ -659,6 +1225,7 @@ def create_skinny_assembly_df(
     skinnyassemblyInstructionsDF: Optional[DataFrame[schemas.MasterJ5SkinnyAssemblies]],
     assemblyVolumeDF: DataFrame[schemas.AssemblyVolumeVerifiedSchema],
     assemblyPartsDF: DataFrame[schemas.AssemblyPartsSchema],
+    max_well_uses: int = MAX_WELL_USES,
 ) -> DataFrame[schemas.AssemblyWorksheetSchema]:
     """Creates skinny assembly worksheet
 
@@ -752,6 +1319,7 @@ def create_skinny_assembly_df(
         tmpSkinnyAssembly=tmpSkinnyAssembly,
         assemblyVolumeDF=assemblyVolumeDF,
         assemblyPartsDF=assemblyPartsDF,
+        max_well_uses=max_well_uses,
     )
     return skinny_assembly_df
 
@@ -767,6 +1335,7 @@ def stamp_digests(
             columns=list(cleanDigestDF.columns)
             + ["PARTS_SOURCE_PLATE", "PARTS_WELL", "PART_TYPE"]
         )
+    cleanDigestDF = cleanDigestDF.copy()
     cleanDigestDF["PARTS_SOURCE_PLATE"] = [
         f'parts_plate_{((index + 96 * cleanPCRDF["OUTPUT_PLATE"].unique().shape[0])//384 + 1)}'  # noqa
         for index in range(cleanDigestDF.shape[0])
@@ -797,8 +1366,9 @@ def stamp_pcrs(
     if cleanPCRDF.empty:
         return pd.DataFrame(
             columns=list(cleanPCRDF.columns)
-            + ["PARTS_SOURCE_PLATE", "PARTS_WELL", "ZAG_PLATE", "ZAG_WELL"]
+            + ["PARTS_SOURCE_PLATE", "PARTS_WELL", "ZAG_PLATE", "ZAG_WELL", "PART_TYPE"]
         )
+    cleanPCRDF = cleanPCRDF.copy()
     cleanPCRDF["PARTS_SOURCE_PLATE"] = cleanPCRDF["OUTPUT_PLATE"].apply(
         lambda pcrPlate: f'parts_plate_{( (int(pcrPlate.split("_")[-1])-1)//4 + 1 )}'  # noqa
     )
@@ -821,6 +1391,7 @@ def stamp_pcrs(
         ]
         * 20
     )[: cleanPCRDF.shape[0]]
+    cleanPCRDF["PART_TYPE"] = "pcr"
     return cleanPCRDF
 
 
@@ -828,6 +1399,7 @@ def stamp_pcrs(
 def create_clean_digest_df(
     digestedPiecesDF: Optional[DataFrame[schemas.MasterJ5Digests]],
     assemblyVolumeDF: DataFrame[schemas.AssemblyVolumeSchema],
+    max_well_uses: int = MAX_WELL_USES,
 ) -> DataFrame[schemas.DigestsPlateSchema]:
     """Creates restriction digest instructions"""
     if digestedPiecesDF is None:
@@ -849,7 +1421,7 @@ def create_clean_digest_df(
         .apply(
             lambda row: [row["TYPE_ID"]]
             * j5_to_echo_utils.necessaryRxnsFromUses(
-                row["NUMBER_OF_USES"], MAX_WELL_USES
+                row["NUMBER_OF_USES"], max_well_uses
             ),
             axis=1,
         )
@@ -979,47 +1551,39 @@ def add_part_locations(
     """Identifying source locations of parts"""
     if assemblyPartsDF is None:
         raise ValueError("No parts available?")
-    assemblySourceDataFrames = {
-        "PCR": cleanPCRDF,
-        "Direct Synthesis/PCR": cleanPCRDF,
-        "SOE": cleanPCRDF,
-        "Digest Linearized": cleanDigestDF,
-    }
-    assemblyTypeMap = {
-        "PCR": "pcr",
-        "Direct Synthesis/PCR": "pcr",
-        "SOE": "pcr",
-        "Digest Linearized": "digest",
-    }
-    assemblyPartsDF["SOURCE_LOCATIONS"] = assemblyPartsDF.apply(
-        lambda row: list(
-            zip(
-                list(
-                    assemblySourceDataFrames[row["Type"]].loc[
-                        assemblySourceDataFrames[row["Type"]].loc[:, "REACTION_NUMBER"]
-                        == row["Type ID Number"],
-                        "PARTS_SOURCE_PLATE",
-                    ]
-                ),
-                list(
-                    assemblySourceDataFrames[row["Type"]].loc[
-                        assemblySourceDataFrames[row["Type"]].loc[:, "REACTION_NUMBER"]
-                        == row["Type ID Number"],
-                        "PARTS_WELL",
-                    ]
-                ),
-            )
-        ),
-        axis=1,
+    # PART_TYPES maps PCR, SOE and Direct Synthesis/PCR parts to the PCR
+    # worksheet and Digest Linearized parts to the digest worksheet
+    sources = pd.concat(
+        (
+            cleanPCRDF.assign(PART_TYPE="pcr"),
+            cleanDigestDF.assign(PART_TYPE="digest"),
+        )
     )
-    assemblyPartsDF["PART_TYPE"] = assemblyPartsDF["Type"].apply(
-        lambda j5_type: assemblyTypeMap[j5_type]
+    sources["SOURCE_LOCATION"] = list(
+        zip(sources["PARTS_SOURCE_PLATE"], sources["PARTS_WELL"])
+    )
+    source_locations = (
+        sources.groupby(["PART_TYPE", "REACTION_NUMBER"], sort=False)["SOURCE_LOCATION"]
+        .agg(list)
+        .rename("SOURCE_LOCATIONS")
+    )
+    part_types = assemblyPartsDF["Type"].map(PART_TYPES)
+    assemblyPartsDF = assemblyPartsDF.copy()
+    assemblyPartsDF["SOURCE_LOCATIONS"] = source_locations.reindex(
+        pd.MultiIndex.from_arrays((part_types, assemblyPartsDF["Type ID Number"]))
+    ).to_numpy()
+    missing = assemblyPartsDF["SOURCE_LOCATIONS"].isna()
+    if missing.any():
+        raise ValueError(
+            "No source locations for parts"
+            f" {list(assemblyPartsDF.loc[missing, 'ID Number'])}"
+        )
+    assemblyPartsDF["PART_TYPE"] = part_types
+    assemblyPartsDF["FIRST_PART_SOURCE_PLATE"] = (
+        assemblyPartsDF["SOURCE_LOCATIONS"].str[0].str[0]
     )
-    assemblyPartsDF["FIRST_PART_SOURCE_PLATE"] = assemblyPartsDF[
-        "SOURCE_LOCATIONS"
-    ].apply(lambda locations: locations[0][0])
-    assemblyPartsDF["FIRST_PART_WELL"] = assemblyPartsDF["SOURCE_LOCATIONS"].apply(
-        lambda locations: locations[0][1]
+    assemblyPartsDF["FIRST_PART_WELL"] = (
+        assemblyPartsDF["SOURCE_LOCATIONS"].str[0].str[1]
     )
     return assemblyPartsDF
 
@@ -1218,8 +1782,6 @@ def create_clean_part_df(
 ) -> DataFrame[schemas.PartsPlateSchema]:
     if parts is None:
         raise ValueError("No parts available")
-    clean_pcr_df["PART_TYPE"] = "pcr"
-    clean_digest_df["PART_TYPE"] = "digest"
     clean_part_df = pd.concat(
         (
             clean_digest_df.rename(
@@ -1266,22 +1828,23 @@ def create_clean_part_df(
             ],
         )
     )
-    clean_part_df["PART_ID"] = clean_part_df.apply(
-        lambda row: parts.loc[
-            (parts["PART_TYPE"] == row["PART_TYPE"])
-            & (parts["Type ID Number"] == row["SOURCE_ID"]),
-            "ID Number",
-        ].values[0],
-        axis=1,
+    part_keys = (
+        parts.assign(PART_TYPE=parts["Type"].map(PART_TYPES))
+        .rename(
+            columns={
+                "Type ID Number": "SOURCE_ID",
+                "ID Number": "PART_ID",
+                "Part(s)": "PART_NAME",
+            }
+        )
+        .drop_duplicates(subset=["PART_TYPE", "SOURCE_ID"])
+        .loc[:, ["PART_TYPE", "SOURCE_ID", "PART_ID", "PART_NAME"]]
     )
-    clean_part_df["PART_NAME"] = clean_part_df.apply(
-        lambda row: parts.loc[
-            (parts["PART_TYPE"] == row["PART_TYPE"])
-            & (parts["Type ID Number"] == row["SOURCE_ID"]),
-            "Part(s)",
-        ].values[0],
-        axis=1,
+    clean_part_df = clean_part_df.merge(
+        part_keys, on=["PART_TYPE", "SOURCE_ID"], how="left", validate="many_to_one"
     )
+    if clean_part_df["PART_ID"].isna().any():
+        raise ValueError("Parts worksheet references reactions missing from parts")
     return clean_part_df.loc[
         :,
         [
@@ -1456,6 +2019,7 @@ def create_biomek_pcr_instructions(
 def create_quant_worksheet(
     parts_plate: DataFrame[schemas.PartsPlateSchema],
 ) -> DataFrame[schemas.PartsWorksheetSchema]:
+    parts_plate = parts_plate.copy()
     parts_plate["QUANT_PLATE"] = [
         f"quant_plate_{index//88 + 1}" for index in range(parts_plate.shape[0])
     ]
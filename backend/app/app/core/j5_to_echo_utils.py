@@ -9,9 +9,10 @@ from typing import Dict, List, Tuple
 import numpy as np
 import pandas as pd
 from fastapi import HTTPException
-from pandera import check_types
 from pandera.typing import DataFrame
 from app import schemas
+from app.core.assembly import assign_water_wells
+from app.core.validation import check_types
 
 OUTPUT_OLIGOS_PLATE_FILENAME = "oligos_plate.csv"
 OUTPUT_TEMPLATES_PLATE_FILENAME = "templates_plate.csv"
@@ -1336,7 +1337,9 @@ def addControlToAssembly(control, assemblyDF):
     return assemblyDF
 
 
-def water_transfer(assembly_df, mm_conc, final_assembly_volume):
+def water_transfer(
+    assembly_df, mm_conc, final_assembly_volume, water_well_capacity=40000
+):
     """Creates Echo instructions for adding water to assembly plates.
 
     Arguments
@@ -1350,171 +1353,44 @@ def water_transfer(assembly_df, mm_conc, final_assembly_volume):
     final_assembly_volume : float
         User-defined reaction volume for all Gibson assemblies.
 
+    water_well_capacity : float
+        Volume of water drawn from each water well, in units of nL.
+        Defaults to 40 uL, assuming a 65 uL fill and a 20 uL dead volume.
+
     Returns
     ---------
     assembly_water : pd.Dataframe
         Dataframe containing Echo instructions for assembly parts and water.
     """
-    # Creating 'water' dataframe to take in data from the input dataframe
-    water = pd.DataFrame(
-        columns=(
+    # Determination of water to add to each destination well based on user
+    # input, in units of nL
+    water_for_assembly = (final_assembly_volume * 1000) / mm_conc
+    water = (
+        assembly_df.groupby(["Destination Plate Name", "Destination Well"], sort=False)[
+            "Transfer Volume"
+        ]
+        .sum()
+        .rsub(water_for_assembly)
+        .clip(lower=0)
+        .rename("Transfer Volume")
+        .reset_index()
+    )
+    water = water.loc[water["Transfer Volume"] > 0, :].reset_index(drop=True)
+    water["Source Plate Name"], water["Source Well"] = assign_water_wells(
+        water["Transfer Volume"].to_numpy(), capacity=water_well_capacity
+    )
+    water = water[
+        [
             "Source Plate Name",
             "Source Well",
             "Destination Plate Name",
             "Destination Well",
             "Transfer Volume",
-            "Parts Volume",
-        ),
-        index=assembly_df.index,
+        ]
+    ]
+    assembly_water = pd.concat(
+        [assembly_df.drop(columns=["Conc (fmol/uL)", "fmol Transferred"]), water]
     )
-    water["Source Plate Name"] = "water_plate_1"
-    water["Destination Plate Name"] = assembly_df["Destination Plate Name"]
-    wells = [""] * (len(assembly_df))
-    aliquot = [0] * (len(assembly_df))
-    i = 0
-    j = 0
-    destination = assembly_df["Destination Well"]
-    volume = assembly_df["Transfer Volume"]
-    # Filling a list of wells for unique assembly destinaiton wells, and
-    # calculating volume of parts in those wells
-    # List of wells is as long as the number of source wells, then reduced
-    # to actual amount of destination wells later
-    for i in range(len(assembly_df)):
-        if destination[i] not in wells:
-            wells[j] = destination[i]
-            aliquot[j] = aliquot[j] + volume[i]
-            j += 1
-        else:
-            wells[j] = "remove"
-            j += 1
-    # Adding unique destination wells to dataframe as wells for needing water
-    # transfer
-    # Also adding volumes of parts in those wells
-    water["Destination Well"] = wells
-    water["Parts Volume"] = aliquot
-    # Determination of water to add to each destination well based on user
-    # input, in units of nL
-    water_for_assembly = (final_assembly_volume * 1000) / mm_conc
-    water["Transfer Volume"] = water_for_assembly - water["Parts Volume"]
-    i = 0
-    deletion = water["Transfer Volume"].values.tolist()
-    remove = []
-    for i in range(len(water)):
-        if deletion[i] == water_for_assembly:
-            remove.append(i)
-    # Removing wells with no water to be added, and temporary columns used
-    # in water volume calculations
-    water.drop(remove, inplace=True)
-    water.drop(columns="Parts Volume", inplace=True)
-    water_to_transfer = water["Transfer Volume"].values.tolist()
-    # Reducing transfer volume to zero if parts volume greater than final
-    # assembly volume
-    for i in range(len(water_to_transfer)):
-        if water_to_transfer[i] <= 0:
-            water_to_transfer[i] = 0
-    water["Transfer Volume"] = water_to_transfer
-    # Calculating total volume of water to transfer to destination plate
-    total_water = 0
-    i = 0
-    for i in range(len(water_to_transfer)):
-        total_water = total_water + water_to_transfer[i]
-
-    # Now determining how many wells are necessary to fill destination wells
-    # with water
-    # Assigning each water well 40 uL to use, assuming 65 uL start and end
-    # is 20 uL
-    class water_well:
-        well_name = ""
-        well_volume = 40000
-
-    # water_wells = int((total_water//40000) + 1)
-    water_wells = (total_water // 40000) + 1
-    wells_to_add = []
-    i = 0
-    label = ""
-    # Assigning of names to water wells necessary to fill destination wells
-    while i <= water_wells:
-        if i <= 23:
-            label = "A"
-        if i > 23 and i <= 47:
-            label = "B"
-        if i > 47 and i <= 71:
-            label = "C"
-        if i > 71 and i <= 95:
-            label = "D"
-        if i > 95 and i <= 119:
-            label = "E"
-        if i > 119 and i <= 143:
-            label = "F"
-        if i > 143 and i <= 167:
-            label = "G"
-        if i > 167 and i <= 191:
-            label = "H"
-        if i > 191 and i <= 215:
-            label = "I"
-        if i > 215 and i <= 239:
-            label = "J"
-        if i > 239 and i <= 263:
-            label = "K"
-        if i > 263 and i <= 287:
-            label = "L"
-        if i > 287 and i <= 311:
-            label = "M"
-        if i > 311 and i <= 335:
-            label = "N"
-        if i > 335 and i <= 359:
-            label = "O"
-        if i > 359 and i <= 383:
-            label = "P"
-        well_to_add_to_list = water_well()
-        well_to_add_to_list.well_name = label + str(i + 1)
-        wells_to_add.append(well_to_add_to_list)
-        i += 1
-
-    # Determination of how many destination wells a water source well can fill,
-    # and what destination wells to fill per water source well
-    class stopping:
-        location = 0
-        volume = 0
-        error = "error"
-
-    well_limit = 0
-    when_to_stop = []
-    i = 0
-    for i in range(len(water_to_transfer)):
-        well_limit = well_limit + water_to_transfer[i]
-        if well_limit >= 30000:
-            stop = stopping()
-            stop.location = i
-            stop.volume = well_limit
-            when_to_stop.append(stop)
-            well_limit = 0
-        if well_limit >= 40000:
-            stop = stopping()
-            when_to_stop.append(stop.error)
-            well_limit = 0
-    last_entry = stopping()
-    last_entry.location = len(water)
-    i = 0
-    j = 0
-    wells_for_df = []
-    recent_end = 0
-    counter = 0
-    for i in range(len(when_to_stop)):
-        for j in range(recent_end, when_to_stop[i].location):
-            wells_for_df.append(wells_to_add[i].well_name)
-        recent_end = when_to_stop[i].location
-        counter += 1
-    for i in range(recent_end, last_entry.location):
-        wells_for_df.append(wells_to_add[counter].well_name)
-        if wells_to_add[counter].well_volume > 40000:
-            wells_for_df[i] = "error"
-    # Making file output
-    water["Source Well"] = wells_for_df
-    assembly_df.drop(columns="Conc (fmol/uL)", inplace=True)
-    assembly_df.drop(columns="fmol Transferred", inplace=True)
-    to_join = [assembly_df, water]
-    assembly_water = pd.concat(to_join)
     assembly_water = assembly_water.reset_index(drop=True)
     return assembly_water
 
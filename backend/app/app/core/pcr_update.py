@@ -13,10 +13,10 @@ import numpy as np
 import pandas as pd
 import requests
 from k_means_constrained import KMeansConstrained
-from pandera import check_types
 from pandera.typing import DataFrame
 
 from app import schemas
+from app.core.validation import check_types
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
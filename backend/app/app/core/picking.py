@@ -1,51 +1,76 @@
 import typing as t
+
+import numpy as np
 from pandera.typing import DataFrame
-import pandera as pa
 
 from app import schemas
+from app.core.validation import check_types
+
+# (rows, columns) of the supported destination plates
+PLATE_DIMENSIONS: t.Dict[int, t.Tuple[str, int]] = {
+    96: ("ABCDEFGH", 12),
+    384: ("ABCDEFGHIJKLMNOP", 24),
+}
+
 
+def plate_wells(plate_format: int = 96, fill: str = "column") -> np.ndarray:
+    """Well names of a plate in fill order
 
-def well_generator() -> t.Generator[str, None, None]:
-    for col in range(1, 13):
-        for row in "ABCDEFGH":
-            yield f"{row}{col}"
+    Arguments
+    ---------
+    plate_format : int
+        Number of wells of the plate, 96 or 384
+
+    fill : str
+        "column" to fill down each column before moving to the next
+        (A1, B1, ...) or "row" to fill along each row (A1, A2, ...)
+    """
+    if plate_format not in PLATE_DIMENSIONS:
+        raise ValueError(
+            f"Plate format must be one of {list(PLATE_DIMENSIONS)}, not {plate_format}"
+        )
+    rows, n_columns = PLATE_DIMENSIONS[plate_format]
+    wells: np.ndarray = np.char.add(
+        np.array(list(rows))[:, np.newaxis],
+        np.arange(1, n_columns + 1).astype(str)[np.newaxis, :],
+    )
+    if fill == "column":
+        return wells.T.ravel()
+    if fill == "row":
+        return wells.ravel()
+    raise ValueError(f"Fill must be 'column' or 'row', not {fill}")
 
 
-@pa.check_types
+@check_types
 def create_picking_instructions(
     plating_instructions: DataFrame[schemas.PlatingInstructionsSchema],
     n_colonies_per_construct: int = 3,
+    plate_format: int = 96,
+    fill: str = "column",
 ) -> DataFrame[schemas.PickingResultsSchema]:
     """Generate picking worksheet assuming transformation for each construct
     was successful
+
+    Each construct gets n_colonies_per_construct consecutive wells of the
+    glycerol plates, which are filled in the order given by plate_format
+    and fill (see plate_wells). A new plate is started when one is full.
     """
-    # Initialize the well generator and plate counter
-    wells = well_generator()
-    plate_counter: int = 1
-
-    # List to hold data for the new dataframe
-    data: list[dict[str, str]] = []
-
-    # Iterate over each row in the given dataframe
-    for _, row in plating_instructions.iterrows():
-        for _ in range(n_colonies_per_construct):
-            try:
-                # Get next available well
-                dest_well = next(wells)
-            except StopIteration:
-                # If we run out of wells, reset the generator and increment
-                # the plate_counter
-                wells = well_generator()
-                plate_counter += 1
-                dest_well = next(wells)
-
-            data.append(
-                {
-                    "Source Barcode": row["QPLATE"],
-                    "Source Region": row["QWELL"],
-                    "Destination Barcode": f"glycerol_plate_{plate_counter}",
-                    "Destination Well": dest_well,
-                }
-            )
-
-    return DataFrame(data)
+    wells: np.ndarray = plate_wells(plate_format=plate_format, fill=fill)
+    picks: np.ndarray = np.arange(
+        plating_instructions.shape[0] * n_colonies_per_construct
+    )
+    plate_index, well_index = np.divmod(picks, wells.size)
+    return DataFrame(
+        {
+            "Source Barcode": np.repeat(
+                plating_instructions["QPLATE"].to_numpy(), n_colonies_per_construct
+            ),
+            "Source Region": np.repeat(
+                plating_instructions["QWELL"].to_numpy(), n_colonies_per_construct
+            ),
+            "Destination Barcode": np.char.add(
+                "glycerol_plate_", (plate_index + 1).astype(str)
+            ),
+            "Destination Well": wells[well_index],
+        }
+    )
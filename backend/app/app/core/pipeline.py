@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+
+import concurrent.futures
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.core.cache import ResultCache, content_hash
+from app.core.instrumentation import StageMetrics, measure
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """Single step of a pipeline
+
+    Arguments
+    ---------
+    name : str
+        Unique name of the stage, used in logs and timings
+
+    func : Callable
+        Function performing the work of the stage
+
+    inputs : Mapping[str, str]
+        Keyword argument of func -> name of the artifact passed to it
+
+    outputs : Tuple[str, ...]
+        Names of the artifacts produced by the stage. If there is more
+        than one, func must return a tuple of the same length.
+
+    params : Mapping[str, Any]
+        Constant keyword arguments of func
+    """
+
+    name: str
+    func: Callable[..., Any]
+    inputs: Mapping[str, str] = field(default_factory=dict)
+    outputs: Tuple[str, ...] = ()
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+    def run(self, artifacts: Mapping[str, Any]) -> Dict[str, Any]:
+        result = self.func(
+            **{argument: artifacts[name] for argument, name in self.inputs.items()},
+            **self.params,
+        )
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if len(self.outputs) != len(result):
+            raise ValueError(
+                f"Stage {self.name} returned {len(result)} results,"
+                f" expected {len(self.outputs)}"
+            )
+        return dict(zip(self.outputs, result))
+
+
+@dataclass
+class PipelineResult:
+    artifacts: Dict[str, Any]
+    timings: Dict[str, float]
+    # Stages whose outputs were taken from the stage cache
+    reused: Set[str] = field(default_factory=set)
+    # Resource usage of the stages run, if instrumentation is enabled
+    metrics: Dict[str, StageMetrics] = field(default_factory=dict)
+
+
+def fingerprint(value: Any) -> str:
+    """Content hash of a pipeline input
+
+    DataFrames are hashed row by row with pandas. Columns holding
+    unhashable values (e.g. lists) fall back to hashing the CSV
+    representation. Anything else is hashed through its repr.
+    """
+    if isinstance(value, pd.DataFrame):
+        try:
+            rows: bytes = pd.util.hash_pandas_object(value).values.tobytes()
+        except TypeError:
+            rows = value.to_csv().encode("utf8")
+        return content_hash(repr(list(value.columns)), repr(list(value.dtypes)), rows)
+    return content_hash(repr(value))
+
+
+def copy_artifacts(artifacts: Mapping[str, Any]) -> Dict[str, Any]:
+    """Artifacts with DataFrames and Series copied
+
+    Stage outputs are copied into and out of the stage cache, so that
+    callers modifying the artifacts of one run do not change the
+    outputs reused by later runs.
+    """
+    return {
+        name: value.copy() if isinstance(value, (pd.DataFrame, pd.Series)) else value
+        for name, value in artifacts.items()
+    }
+
+
+class Pipeline:
+    """Directed acyclic graph of stages connected by named artifacts
+
+    Stages run as soon as all of their inputs exist, so stages that do
+    not depend on each other run concurrently. Stages must not mutate
+    their inputs since other stages may be reading them at the same
+    time.
+
+    Each stage has a fingerprint derived from its name, function,
+    parameters, the names of its inputs and outputs and the
+    fingerprints of its inputs, all the way up to
+    the content of the initial artifacts. When running with a cache,
+    stages whose fingerprint is unchanged since a previous run reuse
+    the outputs of that run, so changing one parameter or input only
+    recomputes the stages downstream of it.
+
+    Arguments
+    ---------
+    stages : Iterable[Stage]
+        Stages of the pipeline, in any order
+
+    initial : Iterable[str]
+        Names of the artifacts provided when running the pipeline
+    """
+
+    def __init__(self, stages: Iterable[Stage], initial: Iterable[str]) -> None:
+        self.stages: List[Stage] = list(stages)
+        self.initial: Tuple[str, ...] = tuple(initial)
+        self.producers: Dict[str, Stage] = {}
+        if len({stage.name for stage in self.stages}) != len(self.stages):
+            raise ValueError("Pipeline stage names must be unique")
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self.producers or output in self.initial:
+                    raise ValueError(f"Artifact {output} is produced more than once")
+                self.producers[output] = stage
+        # Stages in an order where producers come before consumers
+        self.order: List[Stage] = []
+        available: Set[str] = set(self.initial)
+        remaining: List[Stage] = list(self.stages)
+        while remaining:
+            ready = [
+                stage
+                for stage in remaining
+                if available.issuperset(stage.inputs.values())
+            ]
+            if not ready:
+                missing = {
+                    stage.name: sorted(set(stage.inputs.values()) - available)
+                    for stage in remaining
+                }
+                raise ValueError(f"Stages have unmet or cyclic inputs: {missing}")
+            for stage in ready:
+                available.update(stage.outputs)
+                remaining.remove(stage)
+                self.order.append(stage)
+
+    def fingerprints(self, initial: Mapping[str, Any]) -> Dict[str, str]:
+        """Fingerprint of every stage for the given initial artifacts"""
+        artifact_fingerprints: Dict[str, str] = {
+            name: fingerprint(initial[name]) for name in self.initial
+        }
+        stage_fingerprints: Dict[str, str] = {}
+        for stage in self.order:
+            stage_fingerprint: str = content_hash(
+                stage.name,
+                f"{stage.func.__module__}.{stage.func.__qualname__}",
+                repr(sorted(stage.params.items())),
+                repr(sorted(stage.inputs.items())),
+                repr(stage.outputs),
+                *(
+                    f"{argument}:{artifact_fingerprints[name]}"
+                    for argument, name in sorted(stage.inputs.items())
+                ),
+            )
+            stage_fingerprints[stage.name] = stage_fingerprint
+            for output in stage.outputs:
+                artifact_fingerprints[output] = content_hash(stage_fingerprint, output)
+        return stage_fingerprints
+
+    def run(
+        self,
+        initial: Mapping[str, Any],
+        max_workers: int = 1,
+        cache: Optional[ResultCache] = None,
+        reuse_cached: bool = True,
+    ) -> PipelineResult:
+        """Run every stage of the pipeline
+
+        Arguments
+        ---------
+        initial : Mapping[str, Any]
+            Value of every artifact listed in the initial argument of
+            the pipeline
+
+        max_workers : int, optional
+            Number of stages allowed to run at the same time
+
+        cache : ResultCache, optional
+            Stage outputs keyed by stage fingerprint. Outputs of the
+            stages run are stored in it.
+
+        reuse_cached : bool, optional
+            If False, run every stage even if its outputs are cached
+
+        Returns
+        -------
+        PipelineResult
+            Every artifact of the pipeline, the wall time of each stage
+            run in seconds and the names of the stages reused from the
+            cache
+        """
+        missing_initial = set(self.initial) - set(initial)
+        if missing_initial:
+            raise ValueError(f"Missing pipeline inputs: {sorted(missing_initial)}")
+        stage_fingerprints: Dict[str, str] = (
+            self.fingerprints(initial) if cache is not None else {}
+        )
+        artifacts: Dict[str, Any] = dict(initial)
+        timings: Dict[str, float] = {}
+        metrics: Dict[str, StageMetrics] = {}
+        reused: Set[str] = set()
+        pending: List[Stage] = list(self.stages)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running: Dict[concurrent.futures.Future, Stage] = {}
+            while pending or running:
+                ready: List[Stage] = [
+                    stage
+                    for stage in pending
+                    if all(name in artifacts for name in stage.inputs.values())
+                ]
+                reused_now: bool = False
+                for stage in ready:
+                    pending.remove(stage)
+                    if cache is not None and reuse_cached:
+                        cached = cache.get(stage_fingerprints[stage.name])
+                        if cached is not None:
+                            logger.debug(f"Reusing cached pipeline stage {stage.name}")
+                            artifacts.update(copy_artifacts(cached))
+                            reused.add(stage.name)
+                            reused_now = True
+                            continue
+                    stage_inputs = {
+                        name: artifacts[name] for name in stage.inputs.values()
+                    }
+                    running[pool.submit(_timed_run, stage, stage_inputs)] = stage
+                if reused_now:
+                    # Reused outputs may have made more stages ready
+                    continue
+                if not running:
+                    missing = {
+                        stage.name: sorted(
+                            name
+                            for name in stage.inputs.values()
+                            if name not in artifacts
+                        )
+                        for stage in pending
+                    }
+                    raise RuntimeError(f"Pipeline stages are missing inputs: {missing}")
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        outputs, elapsed, stage_metrics = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        logger.error(f"Pipeline stage {stage.name} failed")
+                        raise
+                    timings[stage.name] = elapsed
+                    if stage_metrics is not None:
+                        metrics[stage.name] = stage_metrics
+                    artifacts.update(outputs)
+                    if cache is not None:
+                        cache.set(
+                            stage_fingerprints[stage.name], copy_artifacts(outputs)
+                        )
+        return PipelineResult(
+            artifacts=artifacts, timings=timings, reused=reused, metrics=metrics
+        )
+
+
+def _timed_run(
+    stage: Stage, artifacts: Mapping[str, Any]
+) -> Tuple[Dict[str, Any], float, Optional[StageMetrics]]:
+    start: float = time.perf_counter()
+    with measure(stage.name) as measurement:
+        outputs: Dict[str, Any] = stage.run(artifacts)
+        measurement["result"] = tuple(outputs.values())
+    return outputs, time.perf_counter() - start, measurement.get("metrics")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import contextlib
+import enum
+import functools
+import os
+from typing import Any, Callable, Generator, Type, TypeVar
+
+import pandas as pd
+import pandera as pa
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class ValidationMode(str, enum.Enum):
+    """How much DataFrame validation is done
+
+    full:     every check_types decorated function validates (and
+              coerces) its inputs and outputs
+    boundary: only data entering the application, such as parsed j5
+              designs, is validated with validate_input. Functions
+              passing DataFrames between internal stages skip
+              validation, so their outputs keep the dtypes pandas
+              gives them (e.g. 66 rather than 66.0 in a CSV).
+    off:      like boundary, but validate_input only coerces dtypes.
+              Explicit validation requests still validate.
+    """
+
+    FULL = "full"
+    BOUNDARY = "boundary"
+    OFF = "off"
+
+
+_validation_mode: ValidationMode = ValidationMode(
+    os.environ.get("DNADA_VALIDATION_MODE", ValidationMode.FULL.value).lower()
+)
+
+
+def get_validation_mode() -> ValidationMode:
+    return _validation_mode
+
+
+def set_validation_mode(mode: ValidationMode) -> None:
+    """Set the validation mode of the whole process"""
+    global _validation_mode
+    _validation_mode = ValidationMode(mode)
+
+
+@contextlib.contextmanager
+def validation_mode(mode: ValidationMode) -> Generator[None, None, None]:
+    """Temporarily set the validation mode of the whole process"""
+    previous: ValidationMode = get_validation_mode()
+    set_validation_mode(mode)
+    try:
+        yield
+    finally:
+        set_validation_mode(previous)
+
+
+def check_types(*args: Any, **kwargs: Any) -> Any:
+    """pandera.check_types that only validates in full validation mode
+
+    Takes the same arguments as pandera.check_types, and like it can be
+    used with or without parentheses. The mode is read on every call,
+    so it can be changed after functions are decorated.
+    """
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return check_types()(args[0])
+
+    def decorator(func: F) -> F:
+        validated: Callable[..., Any] = pa.check_types(*args, **kwargs)(func)
+
+        @functools.wraps(func)
+        def wrapper(*func_args: Any, **func_kwargs: Any) -> Any:
+            if _validation_mode is ValidationMode.FULL:
+                return validated(*func_args, **func_kwargs)
+            return func(*func_args, **func_kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def validate_input(schema: Type[pa.DataFrameModel], df: pd.DataFrame) -> pd.DataFrame:
+    """Validate a DataFrame entering the application against schema
+
+    Used on data read from uploaded files, which the rest of the code
+    relies on having the dtypes of the schema. In off mode the checks
+    are skipped but the columns are still coerced to those dtypes.
+
+    Arguments
+    ---------
+    schema : Type[pa.DataFrameModel]
+        Schema to validate against
+
+    df : pd.DataFrame
+        DataFrame to validate
+
+    Returns
+    -------
+    pd.DataFrame
+        Validated and coerced df
+    """
+    if _validation_mode is ValidationMode.OFF:
+        return schema.to_schema().coerce_dtype(df)
+    return schema.validate(df)
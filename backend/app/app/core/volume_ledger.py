@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+
+from typing import Collection, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.assembly import EchoTransferConstraints
+
+# Volume assumed in a source well (in uL), the elution volume also
+# assumed by verify_volume_requirements
+DEFAULT_WELL_VOLUME: float = 40.0
+# Volume an Echo 384PP source well cannot transfer (in uL)
+DEFAULT_DEAD_VOLUME: float = 15.0
+
+SOURCE_COLUMNS: List[str] = ["Source Plate Name", "Source Well"]
+
+
+def ledger_wells(
+    transfers: pd.DataFrame,
+    well_volumes: Optional[pd.DataFrame],
+    replicates: Optional[pd.DataFrame],
+    default_volume: float,
+    dead_volume: float,
+    constraints: EchoTransferConstraints,
+) -> pd.DataFrame:
+    """Every source well with its replicate group and usable volume
+
+    Wells of a replicate group are listed in the order given in
+    replicates. Source wells without replicates form a group of their
+    own. Usable volume is rounded down to whole droplets.
+    """
+    sources: pd.DataFrame = (
+        transfers.loc[:, SOURCE_COLUMNS]
+        .drop_duplicates()
+        .set_axis(["PLATE", "WELL"], axis=1)
+    )
+    if replicates is None or replicates.empty:
+        wells = sources.assign(REPLICATE_GROUP=np.arange(sources.shape[0]))
+    else:
+        grouped: pd.DataFrame = replicates.loc[
+            :, ["PLATE", "WELL", "REPLICATE_GROUP"]
+        ].drop_duplicates(subset=["PLATE", "WELL"])
+        grouped = grouped.assign(
+            REPLICATE_GROUP=pd.factorize(grouped["REPLICATE_GROUP"])[0]
+        )
+        ungrouped: pd.DataFrame = sources.merge(
+            grouped, on=["PLATE", "WELL"], how="left", indicator=True
+        )
+        ungrouped = ungrouped.loc[ungrouped["_merge"] == "left_only", ["PLATE", "WELL"]]
+        wells = pd.concat(
+            [
+                grouped,
+                ungrouped.assign(
+                    REPLICATE_GROUP=grouped["REPLICATE_GROUP"].max()
+                    + 1
+                    + np.arange(ungrouped.shape[0])
+                ),
+            ]
+        )
+    wells = wells.assign(VOLUME=default_volume, DEAD_VOLUME=dead_volume)
+    if well_volumes is not None and not well_volumes.empty:
+        overrides: pd.DataFrame = well_volumes.set_index(["PLATE", "WELL"])
+        wells = wells.set_index(["PLATE", "WELL"])
+        for column in ("VOLUME", "DEAD_VOLUME"):
+            if column in overrides:
+                wells[column] = (
+                    overrides[column].reindex(wells.index).fillna(wells[column])
+                )
+        wells = wells.reset_index()
+    # Work in whole nL like Echo transfer volumes
+    wells["CAPACITY"] = np.round(
+        constraints.quantize(np.clip(wells["VOLUME"] - wells["DEAD_VOLUME"], 0, None))
+        * 1000
+    ).astype(np.int64)
+    return wells.sort_values("REPLICATE_GROUP", kind="stable").reset_index(drop=True)
+
+
+def round_split_pieces(
+    piece_volumes: np.ndarray,
+    transfer_index: np.ndarray,
+    constraints: EchoTransferConstraints,
+) -> np.ndarray:
+    """Round the pieces of split transfers to volumes the Echo can transfer
+
+    Every piece but the last of a transfer is rounded down to whole
+    droplets, and dropped if below the minimum transfer volume, with
+    the remainder carried to the next well. A last piece below the
+    minimum takes what it lacks from the piece before it, or is merged
+    into it. Transfer totals are unchanged.
+    """
+    quantum: int = round(constraints.quantum * 1000)
+    min_volume: int = round(constraints.min_volume * 1000)
+    rounded: np.ndarray = piece_volumes.copy()
+    # Pieces [first, stop) of each transfer, looping only over split ones
+    firsts: np.ndarray = np.flatnonzero(np.r_[True, np.diff(transfer_index) != 0])
+    stops: np.ndarray = np.r_[firsts[1:], transfer_index.size]
+    split: np.ndarray = stops - firsts >= 2
+    for first, stop in zip(firsts[split].tolist(), stops[split].tolist()):
+        carry: int = 0
+        for i in range(first, stop - 1):
+            volume: int = int(rounded[i]) + carry
+            rounded[i] = volume // quantum * quantum
+            if rounded[i] < min_volume:
+                rounded[i] = 0
+            carry = volume - int(rounded[i])
+        rounded[stop - 1] += carry
+        if 0 < rounded[stop - 1] < min_volume:
+            before: np.ndarray = np.flatnonzero(rounded[first : stop - 1])
+            if before.size:
+                previous: int = first + int(before[-1])
+                lacking: int = -(-(min_volume - int(rounded[stop - 1])) // quantum)
+                lacking *= quantum
+                if rounded[previous] - lacking >= min_volume:
+                    rounded[previous] -= lacking
+                    rounded[stop - 1] += lacking
+                else:
+                    rounded[stop - 1] += rounded[previous]
+                    rounded[previous] = 0
+    return rounded
+
+
+def draw_transfers(
+    transfers: pd.DataFrame,
+    wells: pd.DataFrame,
+    constraints: EchoTransferConstraints = EchoTransferConstraints(),
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Draw transfers, in order, from the wells of their replicate group
+
+    Each group is treated as one stretch of volume made of its wells
+    laid end to end. A transfer takes the next stretch of its group's
+    volume, and is split into one transfer per well that stretch
+    overlaps, rounded with round_split_pieces. Volume a group cannot
+    supply is drawn from its last well, which then shows up as
+    overdrawn.
+
+    Arguments
+    ---------
+    transfers : pd.DataFrame
+        Echo transfers in the order they happen
+
+    wells : pd.DataFrame
+        Output of ledger_wells
+
+    constraints : EchoTransferConstraints
+        Droplet volume and minimum transfer volume of split transfers
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, np.ndarray]
+        Transfers with their source wells, split where needed, and the
+        index in wells each of them is drawn from
+    """
+    group_of_well: pd.Series = wells.set_index(["PLATE", "WELL"])["REPLICATE_GROUP"]
+    groups: np.ndarray = group_of_well.reindex(
+        pd.MultiIndex.from_frame(transfers.loc[:, SOURCE_COLUMNS])
+    ).to_numpy()
+    volumes: np.ndarray = transfers["Transfer Volume"].to_numpy().astype(np.int64)
+    n_groups: int = int(wells["REPLICATE_GROUP"].max()) + 1
+    well_groups: np.ndarray = wells["REPLICATE_GROUP"].to_numpy()
+
+    # Give the last well of each group whatever the group lacks
+    demand: np.ndarray = np.bincount(groups, weights=volumes, minlength=n_groups)
+    supply: np.ndarray = np.bincount(
+        well_groups, weights=wells["CAPACITY"], minlength=n_groups
+    )
+    last_well: np.ndarray = np.r_[well_groups[1:] != well_groups[:-1], True]
+    capacity: np.ndarray = wells["CAPACITY"].to_numpy().copy()
+    shortfall: np.ndarray = np.clip(demand - supply, 0, None).astype(np.int64)
+    capacity[last_well] += shortfall[well_groups[last_well]]
+    well_end: np.ndarray = np.cumsum(capacity)
+    well_start: np.ndarray = well_end - capacity
+    group_start: np.ndarray = well_start[np.r_[True, last_well[:-1]]]
+    group_last_well: np.ndarray = np.flatnonzero(last_well)
+
+    # Position of each transfer in its group's stretch of volume
+    order: np.ndarray = np.argsort(groups, kind="stable")
+    end: np.ndarray = np.empty_like(volumes)
+    end[order] = pd.Series(volumes[order]).groupby(groups[order]).cumsum().to_numpy()
+    end = end + group_start[groups]
+    start: np.ndarray = end - volumes
+
+    first: np.ndarray = np.minimum(
+        np.searchsorted(well_end, start, side="right"), group_last_well[groups]
+    )
+    last: np.ndarray = np.maximum(np.searchsorted(well_end, end, side="left"), first)
+    pieces: np.ndarray = last - first + 1
+    transfer_index: np.ndarray = np.repeat(np.arange(volumes.size), pieces)
+    well_index: np.ndarray = (
+        first[transfer_index]
+        + np.arange(transfer_index.size)
+        - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    )
+    piece_volumes: np.ndarray = np.minimum(
+        end[transfer_index], well_end[well_index]
+    ) - np.maximum(start[transfer_index], well_start[well_index])
+    piece_volumes = round_split_pieces(
+        np.clip(piece_volumes, 0, None), transfer_index, constraints
+    )
+    keep: np.ndarray = (piece_volumes > 0) | (volumes[transfer_index] == 0)
+    transfer_index, well_index = transfer_index[keep], well_index[keep]
+
+    drawn: pd.DataFrame = transfers.iloc[transfer_index].reset_index(drop=True)
+    drawn["Source Plate Name"] = wells["PLATE"].to_numpy()[well_index]
+    drawn["Source Well"] = wells["WELL"].to_numpy()[well_index]
+    drawn["Transfer Volume"] = np.clip(piece_volumes[keep], 0, None)
+    return drawn, well_index
+
+
+def depletion_report(
+    wells: pd.DataFrame, drawn: pd.DataFrame, well_index: np.ndarray
+) -> pd.DataFrame:
+    """Volume used from each well, in total and per transfer set (in uL)"""
+    used: pd.DataFrame = (
+        pd.DataFrame(
+            {
+                "WELL_INDEX": well_index,
+                "SET": drawn["SET"].to_numpy(),
+                "USED": drawn["Transfer Volume"].to_numpy() / 1000,
+            }
+        )
+        .pivot_table(index="WELL_INDEX", columns="SET", values="USED", aggfunc="sum")
+        .reindex(range(wells.shape[0]))
+        .fillna(0.0)
+    )
+    used.columns = [f"{transfer_set.upper()}_VOLUME" for transfer_set in used.columns]
+    report: pd.DataFrame = pd.concat(
+        [wells.drop(columns="CAPACITY"), used.reset_index(drop=True)], axis=1
+    )
+    report["USED_VOLUME"] = used.sum(axis=1).to_numpy()
+    return report
+
+
+def apply_volume_ledger(
+    instruction_sets: Mapping[str, pd.DataFrame],
+    well_volumes: Optional[pd.DataFrame] = None,
+    replicates: Optional[pd.DataFrame] = None,
+    default_volume: float = DEFAULT_WELL_VOLUME,
+    dead_volume: float = DEFAULT_DEAD_VOLUME,
+    alternatives: Collection[str] = (),
+    constraints: EchoTransferConstraints = EchoTransferConstraints(),
+) -> Tuple[Dict[str, pd.DataFrame], pd.DataFrame]:
+    """Track source well volumes across sets of Echo instructions
+
+    The sets are drawn from the source wells in the order given. A
+    transfer that would take a well below its dead volume is split, and
+    the rest is drawn from the next well of its replicate group.
+
+    Arguments
+    ---------
+    instruction_sets : Mapping[str, pd.DataFrame]
+        Echo instructions by name, in the order they are run
+
+    well_volumes : pd.DataFrame, optional
+        PLATE, WELL and VOLUME (in uL), and optionally DEAD_VOLUME, of
+        wells not holding default_volume
+
+    replicates : pd.DataFrame, optional
+        PLATE, WELL and REPLICATE_GROUP of wells holding the same
+        content. Transfers from any well of a group may be drawn from
+        any other, in the order listed.
+
+    default_volume : float
+        Volume of wells not in well_volumes (in uL)
+
+    dead_volume : float
+        Volume left in wells that cannot be transferred (in uL)
+
+    alternatives : Collection[str]
+        Names of sets of which only one is run, e.g. assembly and
+        equimolar assembly instructions. They must come after the
+        other sets. Each is drawn on top of the other sets on its own,
+        and the report shows the largest volume used from each well.
+
+    constraints : EchoTransferConstraints
+        Droplet volume and minimum transfer volume split transfers are
+        rounded to. Volume rounded off a piece is carried to the next
+        well.
+
+    Returns
+    -------
+    Tuple[Dict[str, pd.DataFrame], pd.DataFrame]
+        Instruction sets with transfers split across replicate wells,
+        and the depletion report with the volume used from every well,
+        what remains, and whether it is OVERDRAWN
+    """
+    names: List[str] = list(instruction_sets)
+    base: List[str] = [name for name in names if name not in alternatives]
+    if names[: len(base)] != base:
+        raise ValueError("Alternative instruction sets must come last")
+    transfers: pd.DataFrame = pd.concat(
+        [
+            instructions.assign(SET=name)
+            for name, instructions in instruction_sets.items()
+        ],
+        ignore_index=True,
+    )
+    wells: pd.DataFrame = ledger_wells(
+        transfers, well_volumes, replicates, default_volume, dead_volume, constraints
+    )
+    scenarios: List[List[str]] = [
+        base + [alternative] for alternative in names if alternative in alternatives
+    ] or [base]
+    results: Dict[str, pd.DataFrame] = {}
+    reports: List[pd.DataFrame] = []
+    for scenario in scenarios:
+        drawn, well_index = draw_transfers(
+            transfers.loc[transfers["SET"].isin(scenario), :], wells, constraints
+        )
+        reports.append(depletion_report(wells, drawn, well_index))
+        for name, instructions in drawn.groupby("SET", sort=False):
+            results.setdefault(name, instructions.drop(columns="SET"))
+    results = {
+        name: results.get(
+            name, instruction_sets[name].iloc[:0].reset_index(drop=True)
+        ).reset_index(drop=True)
+        for name in names
+    }
+    report: pd.DataFrame = reports[0]
+    for other in reports[1:]:
+        for column in other.columns.difference(wells.columns):
+            report[column] = np.maximum(report.get(column, 0.0), other[column])
+    report["REMAINING_VOLUME"] = report["VOLUME"] - report["USED_VOLUME"]
+    report["OVERDRAWN"] = report["REMAINING_VOLUME"] < report["DEAD_VOLUME"] - 1e-9
+    set_columns: List[str] = [f"{name.upper()}_VOLUME" for name in names]
+    report = report.reindex(
+        columns=[
+            *wells.columns.drop("CAPACITY"),
+            *set_columns,
+            "USED_VOLUME",
+            "REMAINING_VOLUME",
+            "OVERDRAWN",
+        ]
+    )
+    report[set_columns] = report[set_columns].fillna(0.0)
+    return results, report
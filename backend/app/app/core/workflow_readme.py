@@ -480,6 +480,21 @@ construct IDs and whether or not they were successful.
 }
 
 
-def workflow_readme(step: int) -> Optional[str]:
+# Steps with both worksheets and echo instructions
+LEDGER_README_STEPS = (4, 10, 11)
+LEDGER_README_NOTE = """
+## Source volume tracking
+
+The echo instructions of this step were split across replicate source
+wells so that no well is drawn below its dead volume, see
+*'source_well_depletion.csv'*. The worksheets of this step describe the
+source wells and volumes before the split: use the echo instructions for
+the volumes actually transferred from each well.
+"""
+
+
+def workflow_readme(step: int, source_volume_ledger: bool = False) -> Optional[str]:
     assert step in WORKFLOW_READMES.keys()
+    if source_volume_ledger and step in LEDGER_README_STEPS:
+        return WORKFLOW_READMES[step] + LEDGER_README_NOTE
     return WORKFLOW_READMES.get(step)
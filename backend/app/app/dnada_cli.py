@@ -1,9 +1,12 @@
 import typer
 from pathlib import Path
+from typing import Optional
 from fastapi import UploadFile
 from app.core.process_design import process_j5_zip_upload
 from app.core.condense_designs import condense_designs
-from app.core.j5_to_echo import j5_to_echo
+from app.core.assembly import ECHO_DROPLET_VOLUME, EchoTransferConstraints
+from app.core.j5_to_echo import AutomationParameters, j5_to_echo
+from app.core.validation import ValidationMode, get_validation_mode, set_validation_mode
 from app.core import j5
 
 
@@ -16,15 +19,67 @@ def condense_and_automate_j5(
     output: Path = typer.Option(
         "automation_instructions.zip", help="Path to save the output file."
     ),
+    use_cache: bool = typer.Option(
+        True, help="Reuse results of a previous run on the same design."
+    ),
+    include_timings: bool = typer.Option(
+        False, help="Add the time and memory used by each step to the output."
+    ),
+    validation_mode: ValidationMode = typer.Option(
+        get_validation_mode(), help="How much of the data to validate."
+    ),
+    glycerol_plate_format: int = typer.Option(
+        96, help="Wells of the glycerol stock plates, 96 or 384."
+    ),
+    glycerol_plate_fill: str = typer.Option(
+        "column", help="Fill glycerol stock plates in 'column' or 'row' order."
+    ),
+    optimize_echo_transfers: bool = typer.Option(
+        False, help="Merge and reorder Echo transfers to shorten runs."
+    ),
+    track_source_volumes: bool = typer.Option(
+        False, help="Split Echo transfers so no source well is overdrawn."
+    ),
+    quantize_to_droplets: bool = typer.Option(
+        False, help="Quantize equimolar assembly volumes to Echo droplets."
+    ),
+    droplet_volume: float = typer.Option(
+        ECHO_DROPLET_VOLUME, help="Volume of an Echo droplet (nL)."
+    ),
+    min_transfer_volume: float = typer.Option(
+        ECHO_DROPLET_VOLUME, help="Smallest volume transferred for a part (nL)."
+    ),
+    max_source_well_volume: Optional[float] = typer.Option(
+        None, help="Volume that may be drawn from a source well (uL)."
+    ),
 ) -> None:
     """Condense j5 design zip files into single design then create
     customized automation instructions for J5 Design."""
+    set_validation_mode(validation_mode)
     designs: list[j5.J5Design] = []
     for file in files:
         with file.open("rb") as f:
             designs.append(process_j5_zip_upload(UploadFile(f, filename=file.name)))
     condensed = condense_designs(designs)
-    _, result = j5_to_echo(j5_design=condensed)
+    parameters = AutomationParameters(
+        glycerol_plate_format=glycerol_plate_format,
+        glycerol_plate_fill=glycerol_plate_fill,
+        optimize_echo_transfers=optimize_echo_transfers,
+        track_source_volumes=track_source_volumes,
+        echo_constraints=EchoTransferConstraints(
+            droplet_volume=droplet_volume,
+            min_transfer_volume=min_transfer_volume,
+            max_source_well_volume=max_source_well_volume,
+        )
+        if quantize_to_droplets
+        else None,
+    )
+    _, result = j5_to_echo(
+        j5_design=condensed,
+        parameters=parameters,
+        use_cache=use_cache,
+        include_timings=include_timings,
+    )
     result.seek(0)
     with output.open("wb") as out_file:
         out_file.write(result.read())
@@ -78,6 +78,7 @@ from .validate import (
     PeakTableSchema,
     PickingResultsSchema,
     PlatingInstructionsSchema,
+    PrimerPairsSchema,
     RegistryPlasmidSchema,
     RegistryWorksheetSchema,
     SynthsPlateSchema,
@@ -236,6 +237,7 @@ __all__ = [
     "PeakTableSchema",
     "PickingResultsSchema",
     "PlatingInstructionsSchema",
+    "PrimerPairsSchema",
     "RegistryPlasmidSchema",
     "RegistryWorksheetSchema",
     "SynthsPlateSchema",
@@ -1,4 +1,5 @@
-from typing import Dict, Optional, Type
+import re
+from typing import Dict, Optional, Set, Type
 
 import pandas as pd
 import pandera as pa
@@ -10,20 +11,38 @@ ALLOWED_NUCLEOTIDES = set("ATCG")
 ALLOWED_AMINO_ACIDS = set("RHKDESTNQCGPAVILMFYW*")
 
 
+def alphabet_pattern(alphabet: Set[str]) -> str:
+    """Regex matching strings made only of alphabet, in either case"""
+    letters: str = "".join(sorted(alphabet | {letter.lower() for letter in alphabet}))
+    return f"[{re.escape(letters)}]*"
+
+
+DNA_SEQUENCE_PATTERN: str = alphabet_pattern(ALLOWED_NUCLEOTIDES)
+AA_SEQUENCE_PATTERN: str = alphabet_pattern(ALLOWED_AMINO_ACIDS)
+
+
 @extensions.register_check_method()
 def is_dna_sequence(col: Series[str]) -> Series[bool]:
-    """Check if string contains valid nucleotides
-    Notes: https://stackoverflow.com/a/1323374
-    """
-    return col.str.upper().apply(set) <= ALLOWED_NUCLEOTIDES
+    """Check if string contains valid nucleotides"""
+    return col.str.fullmatch(DNA_SEQUENCE_PATTERN, na=False)
 
 
 @extensions.register_check_method()
 def is_aa_sequence(col: Series[str]) -> Series[bool]:
-    """Check if string contains valid amino acids
-    Notes: https://stackoverflow.com/a/1323374
-    """
-    return col.str.upper().apply(set) <= ALLOWED_AMINO_ACIDS
+    """Check if string contains valid amino acids"""
+    return col.str.fullmatch(AA_SEQUENCE_PATTERN, na=False)
+
+
+@extensions.register_check_method()
+def is_location_list(col: Series[object]) -> Series[bool]:
+    """Check if values are lists of (plate, well) tuples"""
+    return col.map(
+        lambda locations: isinstance(locations, list)
+        and len(locations) > 0
+        and all(
+            isinstance(location, tuple) and len(location) == 2 for location in locations
+        )
+    )
 
 
 class ValidationResponse(BaseModel):
@@ -197,6 +216,7 @@ class PCRWorksheetSchema(PCRInstructionsSchema):
     PARTS_WELL: Series[str] = pa.Field()
     ZAG_PLATE: Series[str] = pa.Field()
     ZAG_WELL: Series[str] = pa.Field()
+    PART_TYPE: Series[str] = pa.Field(isin=["pcr"])
 
 
 class PCRThermocyclerSchema(pa.DataFrameModel):
@@ -286,6 +306,20 @@ class PickingResultsSchema(pa.DataFrameModel):
         coerce = True
 
 
+class PrimerPairsSchema(pa.DataFrameModel):
+    NAME: Series[str] = pa.Field(unique=True)
+    FORWARD_PRIMER: Series[str] = pa.Field(
+        is_dna_sequence=(), str_length={"min_value": 1}
+    )
+    REVERSE_PRIMER: Series[str] = pa.Field(
+        is_dna_sequence=(), str_length={"min_value": 1}
+    )
+
+    class Config:
+        strict = False
+        coerce = True
+
+
 class MasterJ5Digests(pa.DataFrameModel):
     ID_Number: Series[int] = pa.Field(alias="ID Number", ge=0, unique=True)
     Sequence_Source: Series[str] = pa.Field(alias="Sequence Source", unique=True)
@@ -420,7 +454,7 @@ class MasterJ5Parts(pa.DataFrameModel):
 
 
 class AssemblyPartsSchema(MasterJ5Parts):
-    SOURCE_LOCATIONS: Series[str] = pa.Field()
+    SOURCE_LOCATIONS: Series[object] = pa.Field(is_location_list=())
     PART_TYPE: Series[str] = pa.Field(isin=["pcr", "digest"])
     FIRST_PART_SOURCE_PLATE: Series[str] = pa.Field()
     FIRST_PART_WELL: Series[str] = pa.Field()
@@ -482,14 +516,15 @@ class AssemblyVolumeVerifiedSchema(AssemblyVolumeSchema):
     NUMBER_OF_RXNS_PERFORMED: Series[int] = pa.Field(gt=0)
     VOLUME_OBTAINED: Series[float] = pa.Field(alias="VOLUME_OBTAINED_(uL)", ge=0)
     ENOUGH_VOLUME: Series[bool] = pa.Field()
-    SOURCE_WELLS: Series[str] = pa.Field()
+    SOURCE_WELLS: Series[object] = pa.Field(is_location_list=())
 
 
 class AssemblyWorksheetSchema(MasterJ5SkinnyAssemblies):
     ID_NUMBER: Series[int] = pa.Field(alias="ID Number")
     Source_Plate: Series[str] = pa.Field(alias="Source Plate")
     Source_Well: Series[str] = pa.Field(alias="Source Well")
-    SOURCE_LOCATIONS: Series[str] = pa.Field()
+    # Lists of (plate, well) tuples, or their repr when read from a CSV
+    SOURCE_LOCATIONS: Series[object] = pa.Field()
     Destination_Plate: Series[str] = pa.Field(alias="Destination Plate")
     Destination_Well: Series[str] = pa.Field(alias="Destination Well")
     Parts_Summary: Series[str] = pa.Field(alias="Parts Summary")
@@ -570,4 +605,5 @@ VALIDATION_SCHEMAS: Dict[str, pandera_schema] = {
     "masterj5assemblies": MasterJ5Assemblies,
     "masterj5skinnyassemblies": MasterJ5SkinnyAssemblies,
     "assemblyvolume": AssemblyVolumeSchema,
+    "primerpairs": PrimerPairsSchema,
 }
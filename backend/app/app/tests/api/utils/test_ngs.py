@@ -0,0 +1,49 @@
+import io
+
+import openpyxl
+import pandas as pd
+
+from app.api.utils.ngs import setup_ngs_worksheets
+
+WELLS = [f"{row}{column}" for column in range(1, 13) for row in "ABCDEFGH"]
+
+
+def test_forms_of_each_plate_from_pooled_template() -> None:
+    # Five glycerol plates, so a full NGS plate and one of 3 samples
+    glycerol = pd.DataFrame(
+        [
+            (f"glycerol_plate_{plate}", well, f"construct_{plate}_{well}")
+            for plate in range(1, 6)
+            for well in WELLS
+        ],
+        columns=["GLYCEROL_PLATE", "GLYCEROL_WELL", "name"],
+    ).iloc[:387]
+    registry = pd.DataFrame(
+        {"name": glycerol["name"], "Part_ID": [f"JPUB_{i}" for i in range(387)]}
+    )
+    ngs_worksheet, submission_excels = setup_ngs_worksheets(
+        glycerol_stock_file=io.StringIO(glycerol.to_csv(index=False)),
+        registry_file=io.StringIO(registry.to_csv(index=False)),
+        username="user",
+    )
+    assert len(submission_excels) == 2
+    for plate, submission_excel in submission_excels.items():
+        samples = ngs_worksheet.loc[ngs_worksheet["NGS_PLATE"] == plate]
+        worksheet = openpyxl.load_workbook(submission_excel).active
+        assert worksheet["AI33"].value == "Rows, Quads"
+        assert [
+            tuple(cell.value for cell in row)
+            for row in worksheet.iter_rows(
+                min_row=34, max_row=33 + 384, min_col=37, max_col=39
+            )
+        ] == list(
+            zip(
+                samples["Sample_Name"],
+                samples["Part ID"],
+                ["Plasmid__purified"] * samples.shape[0],
+            )
+        ) + [
+            (None, None, None)
+        ] * (
+            384 - samples.shape[0]
+        )
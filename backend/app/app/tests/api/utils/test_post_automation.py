@@ -0,0 +1,35 @@
+import io
+
+import pandas as pd
+
+from app.api.utils.post_automation import consolidate_pcr_trials
+
+
+def pcr_trial(trial: int, good: list) -> io.StringIO:
+    return io.StringIO(
+        pd.DataFrame(
+            {
+                "OUTPUT_PLATE": ["pcr_plate_1"] * 3,
+                "OUTPUT_WELL": ["A1", "B1", "C1"],
+                "OUTPUT_LOCATION": [f"redo_{trial}#{well}" for well in "ABC"],
+                "GOOD": good,
+            }
+        ).to_csv()
+    )
+
+
+def test_first_successful_trial_wins() -> None:
+    consolidated = consolidate_pcr_trials(
+        {
+            "trial_1": pcr_trial(1, [True, False, False]),
+            "trial_2": pcr_trial(2, [True, False, True]),
+            "trial_3": pcr_trial(3, [True, True, True]),
+        }
+    )
+    assert list(consolidated["trial"]) == ["trial_1", "trial_3", "trial_2"]
+    assert list(consolidated["GOOD"]) == [True, True, True]
+    assert list(consolidated["src_location"]) == [
+        "trial_1#redo_1#A",
+        "trial_3#redo_3#B",
+        "trial_2#redo_2#C",
+    ]
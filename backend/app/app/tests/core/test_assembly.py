@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from app.core.assembly import (
+    EchoTransferConstraints,
+    add_water_to_assembly,
+    assign_water_wells,
+    optimize_equimolar_assembly_rxn,
+    solve_constrained_equimolar_assembly_rxns,
+    solve_equimolar_assembly_rxns,
+)
+
+
+def solve_with_lp(
+    conc: pd.Series, rxn: pd.Series, max_vol: float, max_fmol: float
+) -> np.ndarray:
+    volumes: np.ndarray = np.zeros(conc.size)
+    for number in rxn.unique():
+        in_rxn: np.ndarray = (rxn == number).to_numpy()
+        volumes[in_rxn] = optimize_equimolar_assembly_rxn(
+            conc=conc.to_numpy()[in_rxn], max_vol=max_vol, max_fmol=max_fmol
+        )
+    return volumes
+
+
+def test_closed_form_matches_lp() -> None:
+    rng = np.random.default_rng(0)
+    rxn = pd.Series(np.repeat(np.arange(200), rng.integers(1, 8, size=200)))
+    conc = pd.Series(rng.uniform(1.0, 500.0, size=rxn.size))
+    for max_vol, max_fmol in ((5.0, 100.0), (2.0, 10.0), (5.0, 1000.0)):
+        np.testing.assert_allclose(
+            solve_equimolar_assembly_rxns(conc, rxn, max_vol, max_fmol),
+            solve_with_lp(conc, rxn, max_vol, max_fmol),
+            atol=1e-6,
+        )
+
+
+def test_degenerate_reactions_use_lp() -> None:
+    rxn = pd.Series([0, 0, 1, 1])
+    conc = pd.Series([0.0, 50.0, 20.0, 40.0])
+    np.testing.assert_allclose(
+        solve_equimolar_assembly_rxns(conc, rxn, 5.0, 100.0),
+        solve_with_lp(conc, rxn, 5.0, 100.0),
+        atol=1e-6,
+    )
+
+
+def test_constrained_volumes_are_droplet_multiples_within_limits() -> None:
+    rng = np.random.default_rng(1)
+    rxn = pd.Series(np.repeat(np.arange(100), rng.integers(2, 8, size=100)))
+    conc = pd.Series(rng.uniform(1.0, 2000.0, size=rxn.size))
+    source = pd.Series(rng.integers(0, 30, size=rxn.size))
+    constraints = EchoTransferConstraints(
+        droplet_volume=2.5, min_transfer_volume=25.0, max_source_well_volume=8.0
+    )
+    volumes = solve_constrained_equimolar_assembly_rxns(
+        conc, rxn, source, 5.0, 100.0, constraints
+    )
+    nl = volumes * 1000
+    np.testing.assert_allclose(nl, np.round(nl / 5) * 5, atol=1e-6)
+    assert (nl >= 25.0 - 1e-6).all()
+    assert (pd.Series(volumes).groupby(rxn).sum() <= 5.0 + 1e-9).all()
+    assert (pd.Series(volumes).groupby(source).sum() <= 8.0 + 1e-9).all()
+
+
+def test_constrained_volumes_pin_dilute_reactions_to_minimum() -> None:
+    rxn = pd.Series([0, 0, 0])
+    conc = pd.Series([10.0, 10.0, 1e5])
+    volumes = solve_constrained_equimolar_assembly_rxns(
+        conc,
+        rxn,
+        rxn,
+        5.0,
+        100.0,
+        EchoTransferConstraints(min_transfer_volume=50.0),
+    )
+    # The concentrated part would need 0.1 nL, so it takes 50 nL and the
+    # others share the rest of the volume
+    np.testing.assert_allclose(volumes, [2.475, 2.475, 0.05])
+
+
+def test_water_wells_respect_capacity_across_plates() -> None:
+    volumes = np.full(2000, 4.0)
+    plates, wells = assign_water_wells(volumes, capacity=10.0)
+    # Two transfers fit in each well, so 1000 wells over three plates
+    assert list(wells[:5]) == ["A1", "A1", "A2", "A2", "A3"]
+    assert plates[767] == "water_plate_1" and plates[768] == "water_plate_2"
+    assert wells[768] == "A1"
+    assert plates[-1] == "water_plate_3"
+    used = pd.Series(volumes).groupby([plates, wells]).sum()
+    assert (used <= 10.0).all()
+
+
+def test_water_fills_reactions_to_max_volume() -> None:
+    worksheet = pd.DataFrame(
+        {
+            "Number": [0, 0, 1, 2],
+            "Destination Plate": ["assembly_1"] * 4,
+            "Destination Well": ["A1", "A1", "B1", "C1"],
+            "EQUIMOLAR_VOLUME": [1.0, 2.5, 4.0, 5.0],
+        }
+    )
+    water = add_water_to_assembly(worksheet, max_vol=5.0, water_well_capacity=2.0)
+    water = water.loc[water["Part Name"] == "water", :]
+    assert list(water["Number"]) == [0, 1]
+    assert list(water["Destination Well"]) == ["A1", "B1"]
+    np.testing.assert_allclose(water["EQUIMOLAR_VOLUME"], [1.5, 1.0])
+    assert list(water["Source Well"]) == ["A1", "A2"]
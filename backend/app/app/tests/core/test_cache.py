@@ -0,0 +1,36 @@
+import time
+
+from app.core.cache import ResultCache, content_hash
+
+
+def test_content_hash_is_order_and_boundary_sensitive() -> None:
+    assert content_hash("a", "b") == content_hash("a", "b")
+    assert content_hash("a", "b") != content_hash("b", "a")
+    assert content_hash("ab", "c") != content_hash("a", "bc")
+    assert content_hash("a") == content_hash(b"a")
+
+
+def test_result_cache_evicts_least_recently_used() -> None:
+    cache = ResultCache(max_size=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_result_cache_expires_entries() -> None:
+    cache = ResultCache(max_size=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_result_cache_disabled() -> None:
+    cache = ResultCache(max_size=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
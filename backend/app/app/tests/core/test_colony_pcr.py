@@ -0,0 +1,258 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.colony_pcr import (
+    PrimerAnnealsMultipleTimes,
+    PrimerIndex,
+    assign_primer_wells,
+    choose_primer_pairs,
+    create_colony_pcr_instructions,
+    create_multi_primer_colony_pcr_instructions,
+    find_binding_sites,
+    reverse_complement,
+    simulate_pcr,
+)
+
+FORWARD_PRIMER = "TTGACCATGGCAAGTCCAGA"
+REVERSE_PRIMER = "GGATCCTTAACGGCTAGCAA"
+
+
+def random_dna(length: int, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    return "".join(rng.choice(list("ACGT"), size=length))
+
+
+def test_pcr_on_either_strand() -> None:
+    template = random_dna(1000)
+    fwd_primer = template[100:120]
+    rev_primer = reverse_complement(template[500:520])
+    assert simulate_pcr(template, fwd_primer, rev_primer) == (420, template[100:520])
+    flipped = reverse_complement(template)
+    assert simulate_pcr(flipped, fwd_primer, rev_primer) == (420, template[100:520])
+
+
+def test_primers_and_amplicons_across_origin() -> None:
+    template = random_dna(1000)
+    fwd_primer = template[-10:] + template[:10]
+    rev_primer = reverse_complement(template[200:220])
+    length, pcr = simulate_pcr(template, fwd_primer, rev_primer)
+    assert length == 230
+    assert pcr == template[-10:] + template[:220]
+    sites = PrimerIndex({"plasmid": template}).binding_sites([fwd_primer])
+    assert sites.to_dict("records") == [
+        {
+            "TEMPLATE": "plasmid",
+            "PRIMER": fwd_primer,
+            "STRAND": 1,
+            "START": 990,
+            "MISMATCHES": 0,
+        }
+    ]
+
+
+def test_reverse_primer_binding_twice_is_rejected() -> None:
+    template = random_dna(1000)
+    rev_site = template[500:520]
+    template = template[:700] + rev_site + template[720:]
+    with pytest.raises(PrimerAnnealsMultipleTimes):
+        simulate_pcr(template, template[100:120], reverse_complement(rev_site))
+
+
+def test_found_sites_match_primer_index() -> None:
+    template = random_dna(1000)
+    primers = [
+        template[300:320],
+        reverse_complement(template[600:620]),
+        template[-10:] + template[:10],
+        reverse_complement(template[-5:] + template[:15]),
+    ]
+    sites = PrimerIndex({"plasmid": template}).binding_sites(primers)
+    for primer in primers:
+        expected = sites.loc[sites["PRIMER"] == primer, ["STRAND", "START"]]
+        assert find_binding_sites(template, primer) == list(
+            expected.itertuples(index=False, name=None)
+        )
+
+
+def test_mismatches_outside_seed() -> None:
+    template = random_dna(1000)
+    primer = template[300:320]
+    mismatched = ("A" if primer[0] != "A" else "C") + primer[1:]
+    index = PrimerIndex({"plasmid": template})
+    assert index.binding_sites([mismatched]).empty
+    sites = index.binding_sites([mismatched], max_mismatches=1)
+    assert sites[["START", "MISMATCHES"]].values.tolist() == [[300, 1]]
+
+
+def test_colony_pcr_lengths() -> None:
+    sequences = pd.DataFrame(
+        {
+            "Name": ["p1", "p2"],
+            "Bases": [
+                random_dna(50, seed)
+                + FORWARD_PRIMER
+                + random_dna(250 + seed, seed)
+                + reverse_complement(REVERSE_PRIMER)
+                + random_dna(200, seed)
+                for seed in (1, 2)
+            ],
+        }
+    )
+    glycerol = pd.DataFrame(
+        {
+            "GLYCEROL_PLATE": "glycerol_plate_1",
+            "GLYCEROL_WELL": ["A1", "B1", "C1"],
+            "name": ["p1", None, "p2"],
+        }
+    )
+    results = create_colony_pcr_instructions(
+        glycerol_file=io.StringIO(glycerol.to_csv(index=False)),
+        plasmid_sequences_file=io.StringIO(sequences.to_csv(index=False)),
+        forward_primer=FORWARD_PRIMER,
+        reverse_primer=REVERSE_PRIMER,
+        username="user",
+    )
+    with zipfile.ZipFile(results) as archive:
+        worksheet = pd.read_csv(
+            io.BytesIO(archive.read("colony_pcr/colony_pcr_worksheet.csv"))
+        )
+    assert worksheet["PCR_LENGTH"].tolist() == [291, 0, 292]
+
+
+def test_primer_pair_with_best_separated_product_is_chosen() -> None:
+    fwd_1, rev_1, fwd_2, rev_2 = (random_dna(20, seed) for seed in range(10, 14))
+    templates = {
+        name: random_dna(50, seed)
+        + fwd_1
+        + fwd_2
+        + random_dna(400, seed)
+        + reverse_complement(rev_1)
+        + random_dna(gap, seed)
+        + reverse_complement(rev_2)
+        + random_dna(100, seed)
+        for name, seed, gap in [("p1", 1, 100), ("p2", 2, 300)]
+    }
+    templates["p3"] = random_dna(1000, 3)
+    primer_pairs = pd.DataFrame(
+        {
+            "NAME": ["same size", "different size"],
+            "FORWARD_PRIMER": [fwd_1, fwd_2],
+            "REVERSE_PRIMER": [rev_1, rev_2],
+        }
+    )
+    choices = choose_primer_pairs(templates, primer_pairs)
+    assert choices["PRIMER_PAIR"].tolist()[:2] == ["different size"] * 2
+    assert choices["PCR_LENGTH"].tolist() == [560, 760, 0]
+    assert choices["SEPARATION"].tolist()[:2] == [200, 200]
+    assert pd.isna(choices.loc[2, "PRIMER_PAIR"])
+
+
+def test_multi_primer_colony_pcr_instructions() -> None:
+    fwd_1, rev_1, fwd_2, rev_2 = (random_dna(20, seed) for seed in range(10, 14))
+    sequences = pd.DataFrame(
+        {
+            "Name": ["p1", "p2", "p3"],
+            "Bases": [
+                random_dna(50, seed)
+                + fwd_1
+                + fwd_2
+                + random_dna(400, seed)
+                + reverse_complement(rev_1)
+                + random_dna(gap, seed)
+                + reverse_complement(rev_2)
+                + random_dna(100, seed)
+                for seed, gap in [(1, 100), (2, 300)]
+            ]
+            + [random_dna(1000, 3)],
+        }
+    )
+    glycerol = pd.DataFrame(
+        {
+            "GLYCEROL_PLATE": "glycerol_plate_1",
+            "GLYCEROL_WELL": ["A1", "B1", "C1", "D1"],
+            "name": ["p1", "p3", "p2", "p1"],
+        }
+    )
+    primer_pairs = pd.DataFrame(
+        {
+            "NAME": ["same size", "different size"],
+            "FORWARD_PRIMER": [fwd_1, fwd_2],
+            "REVERSE_PRIMER": [rev_1, rev_2],
+        }
+    )
+    results = create_multi_primer_colony_pcr_instructions(
+        glycerol_file=io.StringIO(glycerol.to_csv(index=False)),
+        plasmid_sequences_file=io.StringIO(sequences.to_csv(index=False)),
+        primer_pairs_file=io.StringIO(primer_pairs.to_csv(index=False)),
+        username="user",
+        reaction_volume=10,
+    )
+    with zipfile.ZipFile(results) as archive:
+        worksheet, echo_instructions, primer_plates = (
+            pd.read_csv(io.BytesIO(archive.read(f"colony_pcr/colony_pcr_{name}.csv")))
+            for name in ("worksheet", "echo_instructions", "primer_plates")
+        )
+    checked = [True, False, True, True]
+    assert worksheet["PRIMER_PAIR"].notna().tolist() == checked
+    assert worksheet["PCR_LENGTH"].tolist() == [560, 0, 760, 560]
+    for primer, well in [("PRIMER1", "A1"), ("PRIMER2", "B1")]:
+        assert (
+            worksheet.loc[checked, f"{primer}_PLATE"].tolist()
+            == ["colony_pcr_primer_plate_1"] * 3
+        )
+        assert worksheet.loc[checked, f"{primer}_WELL"].tolist() == [well] * 3
+        assert worksheet.loc[1, [f"{primer}_PLATE", f"{primer}_WELL"]].isna().all()
+        assert worksheet[f"{primer}_VOLUME"].tolist() == [40, 0, 40, 40]
+    unchecked_well = worksheet.loc[1, "COLONY_PCR_WELL"]
+    assert unchecked_well not in echo_instructions["Destination Well"].tolist()
+    assert set(echo_instructions["Destination Well"]) == set(
+        worksheet.loc[checked, "COLONY_PCR_WELL"]
+    )
+    assert primer_plates.to_dict("records") == [
+        {
+            "PLATE": "colony_pcr_primer_plate_1",
+            "WELL": well,
+            "SEQUENCE": sequence,
+            "VOLUME": 15.12,
+        }
+        for well, sequence in [("A1", fwd_2), ("B1", rev_2)]
+    ]
+
+
+@pytest.mark.parametrize(
+    "primer_pairs",
+    [
+        "NAME,FORWARD_PRIMER,REVERSE_PRIMER\n",
+        f"NAME,FORWARD_PRIMER\npair,{FORWARD_PRIMER}\n",
+        f"NAME,FORWARD_PRIMER,REVERSE_PRIMER\npair,{FORWARD_PRIMER},\n",
+        "",
+    ],
+)
+def test_invalid_primer_pairs_are_rejected(primer_pairs: str) -> None:
+    glycerol = pd.DataFrame(
+        {"GLYCEROL_PLATE": ["glycerol_plate_1"], "GLYCEROL_WELL": ["A1"], "name": "p1"}
+    )
+    sequences = pd.DataFrame({"Name": ["p1"], "Bases": [random_dna(1000)]})
+    with pytest.raises(ValueError):
+        create_multi_primer_colony_pcr_instructions(
+            glycerol_file=io.StringIO(glycerol.to_csv(index=False)),
+            plasmid_sequences_file=io.StringIO(sequences.to_csv(index=False)),
+            primer_pairs_file=io.StringIO(primer_pairs),
+            username="user",
+        )
+
+
+def test_primer_wells_are_split_by_volume() -> None:
+    transfers, primer_plates = assign_primer_wells(
+        pd.Series(["AAA", "CCC", "AAA", "AAA"]),
+        volume=10_000,
+        well_volume=35.0,
+        dead_volume=15.0,
+    )
+    assert transfers["WELL"].tolist() == ["A1", "C1", "A1", "B1"]
+    assert primer_plates["SEQUENCE"].tolist() == ["AAA", "AAA", "CCC"]
+    assert primer_plates["VOLUME"].tolist() == [35.0, 25.0, 25.0]
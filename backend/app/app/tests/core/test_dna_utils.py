@@ -0,0 +1,23 @@
+import numpy as np
+
+from app.core import dna_utils
+from app.core.dna_utils import translate_dna_to_aa, translate_dna_to_aa_batch
+
+
+def test_batch_translation_matches_biopython() -> None:
+    rng = np.random.default_rng(0)
+    dnas = [
+        "".join(rng.choice(list("ACGTacgt"), size=length))
+        for length in rng.choice([0, 3, 31, 300, 3000], size=200)
+    ] + ["ATGNNNGCN", "ATGUUU", "atgtaa"]
+    dna_utils.TRANSLATION_CACHE.clear()
+    translations = translate_dna_to_aa_batch(dnas)
+    assert translations == [translate_dna_to_aa(dna) for dna in dnas]
+    assert translations[-3:] == ["MXA", "MF", "M*"]
+
+
+def test_translations_are_cached() -> None:
+    dna_utils.TRANSLATION_CACHE.clear()
+    assert translate_dna_to_aa_batch(["ATGGCC", "ATGGCC", "ATGG"]) == ["MA", "MA", ""]
+    assert translate_dna_to_aa_batch(["ATGGCC"]) == ["MA"]
+    assert dna_utils.TRANSLATION_CACHE.hits == 1
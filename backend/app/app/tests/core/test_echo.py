@@ -0,0 +1,119 @@
+import pandas as pd
+
+import pytest
+
+from app.core.echo import (
+    ECHO_METHODS,
+    EchoTransferColumns,
+    create_echo_instructions,
+    estimate_echo_run_time,
+    optimize_echo_instructions,
+    register_echo_method,
+)
+
+
+def echo_instructions(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "Source Plate Name",
+            "Source Well",
+            "Destination Plate Name",
+            "Destination Well",
+            "Transfer Volume",
+        ],
+    )
+
+
+def test_duplicate_transfers_are_merged() -> None:
+    optimized = optimize_echo_instructions(
+        echo_instructions(
+            [
+                ("src_1", "A1", "dst_1", "A1", 100),
+                ("src_1", "A1", "dst_1", "A1", 50),
+                ("src_1", "A1", "dst_1", "B1", 50),
+            ]
+        )
+    )
+    assert list(optimized["Transfer Volume"]) == [150, 50]
+
+
+def test_source_wells_follow_serpentine_path() -> None:
+    optimized = optimize_echo_instructions(
+        echo_instructions(
+            [
+                ("src_1", well, "dst_1", "A1", 100)
+                for well in ["A10", "B1", "A2", "B12", "A1", "C3"]
+            ]
+        )
+    )
+    assert list(optimized["Source Well"]) == ["A1", "A2", "A10", "B12", "B1", "C3"]
+
+
+def test_plate_pairs_are_chained_to_save_swaps() -> None:
+    optimized = optimize_echo_instructions(
+        echo_instructions(
+            [
+                ("src_10", "A1", "dst_1", "A1", 100),
+                ("src_2", "A1", "dst_1", "A1", 100),
+                ("src_2", "A1", "dst_2", "A1", 100),
+                ("src_10", "A1", "dst_2", "A1", 100),
+            ]
+        )
+    )
+    assert list(
+        zip(optimized["Source Plate Name"], optimized["Destination Plate Name"])
+    ) == [
+        ("src_2", "dst_1"),
+        ("src_2", "dst_2"),
+        ("src_10", "dst_2"),
+        ("src_10", "dst_1"),
+    ]
+    estimate = estimate_echo_run_time(optimized)
+    assert estimate.source_plate_loads == 2
+    assert estimate.destination_plate_loads == 3
+    assert estimate.transfers == 4
+
+
+def test_pcr_transfers_are_stacked_by_source() -> None:
+    worksheet = pd.DataFrame(
+        {
+            "PRIMER1_PLATE": ["primers"],
+            "PRIMER1_WELL": ["A1"],
+            "PRIMER1_VOLUME": [100],
+            "PRIMER2_PLATE": ["primers"],
+            "PRIMER2_WELL": ["B1"],
+            "PRIMER2_VOLUME": [100],
+            "TEMPLATE_PLATE": ["templates"],
+            "TEMPLATE_WELL": ["A1"],
+            "TEMPLATE_VOLUME": [None],
+            "OUTPUT_PLATE": ["pcr_1"],
+            "OUTPUT_WELL": ["C1"],
+        }
+    )
+    instructions = create_echo_instructions(worksheet, "pcr")
+    # Transfers without a volume are dropped
+    assert list(instructions["Source Well"]) == ["A1", "B1"]
+    assert set(instructions["Destination Well"]) == {"C1"}
+
+
+def test_registered_methods_are_used() -> None:
+    register_echo_method(
+        "dilution",
+        [EchoTransferColumns("PLATE", "WELL", "DILUTION_PLATE", "WELL", 250)],
+    )
+    try:
+        with pytest.raises(ValueError):
+            register_echo_method("dilution", [])
+        instructions = create_echo_instructions(
+            pd.DataFrame(
+                {"PLATE": ["p"] * 2, "WELL": ["B1", "A1"], "DILUTION_PLATE": "d"}
+            ),
+            "dilution",
+        )
+        assert list(instructions["Source Well"]) == ["A1", "B1"]
+        assert list(instructions["Transfer Volume"]) == [250, 250]
+    finally:
+        del ECHO_METHODS["dilution"]
+    with pytest.raises(ValueError):
+        create_echo_instructions(pd.DataFrame({"PLATE": ["p"]}), "dilution")
@@ -0,0 +1,63 @@
+import io
+from pathlib import Path
+
+import pytest
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SeqFeature import FeatureLocation, SeqFeature
+from Bio.SeqRecord import SeqRecord
+
+from app.core import genbank
+from app.core.genbank import (
+    extract_origin_sequence,
+    parse_genbank_sequence,
+    read_genbank_sequences,
+)
+
+EXAMPLE_DIR = Path(__file__).resolve().parents[5] / "examples" / "example_j5_output"
+
+
+def genbank_file(sequence: str) -> str:
+    record = SeqRecord(
+        Seq(sequence),
+        id="pmas00003",
+        name="pmas00003",
+        annotations={"molecule_type": "DNA", "topology": "circular"},
+        features=[SeqFeature(FeatureLocation(0, 10, strand=1), type="misc_feature")],
+    )
+    handle = io.StringIO()
+    SeqIO.write(record, handle, "genbank")
+    return handle.getvalue()
+
+
+def test_origin_sequence_matches_biopython() -> None:
+    contents = genbank_file("acgtNacgtt" * 25 + "gat")
+    assert extract_origin_sequence(contents) == parse_genbank_sequence(contents)
+    assert extract_origin_sequence(contents) == "ACGTNACGTT" * 25 + "GAT"
+
+
+def test_j5_genbank_is_read_without_biopython() -> None:
+    # j5 LOCUS lines have no date, which Biopython rejects
+    contents = (EXAMPLE_DIR / "pmas00001.gb").read_text()
+    sequence = extract_origin_sequence(contents)
+    assert sequence is not None
+    assert len(sequence) == 150
+    assert sequence.startswith("GGACACCCTGATGGCCGTGG")
+
+
+def test_unreadable_origin_falls_back_to_biopython() -> None:
+    contents = (EXAMPLE_DIR / "pmas00001.gb").read_text()
+    # LOCUS length no longer matches the ORIGIN block
+    truncated = contents.replace("150 bp", "151 bp")
+    assert extract_origin_sequence(truncated) is None
+    no_origin = contents[: contents.index("ORIGIN")]
+    assert extract_origin_sequence(no_origin) is None
+
+
+def test_sequences_are_cached_by_content(monkeypatch: pytest.MonkeyPatch) -> None:
+    contents = (EXAMPLE_DIR / "pmas00002.gb").read_text()
+    genbank.GENBANK_SEQUENCE_CACHE.clear()
+    expected = read_genbank_sequences([contents])
+    monkeypatch.setattr(genbank, "extract_origin_sequence", lambda contents: None)
+    monkeypatch.setattr(genbank, "parse_genbank_sequence", lambda contents: "")
+    assert read_genbank_sequences([contents, contents]) == expected * 2
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from app.core.instrumentation import MetricsRegistry, StageMetrics, count_rows, measure
+
+
+def test_count_rows() -> None:
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    assert count_rows(df) == 3
+    assert count_rows((df, df.head(1), "text")) == 4
+    assert count_rows("text") is None
+
+
+def test_measure_records_metrics() -> None:
+    registry = MetricsRegistry()
+    with measure("stage", registry=registry) as measurement:
+        measurement["result"] = pd.DataFrame({"a": [1, 2]})
+    metrics: StageMetrics = measurement["metrics"]
+    assert metrics.name == "stage"
+    assert metrics.rows == 2
+    assert metrics.wall_seconds >= 0
+    exposition: str = registry.to_prometheus()
+    assert 'dnada_stage_calls_total{stage="stage"} 1' in exposition
+    assert 'dnada_stage_rows_total{stage="stage"} 2' in exposition
@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.core.j5 import MasterJ5, iter_sections, make_assemblies_skinny
+
+EXAMPLE_CSV = (
+    Path(__file__).resolve().parents[5]
+    / "examples"
+    / "example_j5_output"
+    / "pmas00001_combinatorial.csv"
+)
+
+
+def test_sections_are_found_in_one_scan() -> None:
+    master_j5_csv = 'header\n\n\n"Title A",x\n1,2\r\n \r\n"Title B"\n3\n\n'
+    sections = [
+        (title, master_j5_csv[start:end])
+        for title, start, end in iter_sections(master_j5_csv)
+    ]
+    assert sections == [
+        ("header", "header"),
+        ("Title A", '"Title A",x\n1,2'),
+        ("Title B", '"Title B"\n3'),
+    ]
+
+
+def test_parse_example_csv() -> None:
+    master_j5_csv = EXAMPLE_CSV.read_text()
+    for csv in (master_j5_csv, master_j5_csv.replace("\n", "\r\n")):
+        master_j5 = MasterJ5.parse_csv(csv)
+        assert list(master_j5.parts["Part(s)"]) == [
+            "(ImaginaryVector)",
+            "(ImaginaryProtein1)",
+            "(ImaginaryProtein2)",
+        ]
+        assert list(master_j5.skinny_assemblies["Part ID"]) == [0, 1, 0, 2]
+        assert master_j5.pcr_reactions.shape[0] == 2
+
+
+def test_unexpected_sections_are_rejected() -> None:
+    with pytest.raises(KeyError, match="Surprise"):
+        MasterJ5.parse_csv('header\n\n"Surprise section"\n1,2\n')
+
+
+def test_skinny_assemblies_skip_empty_part_slots() -> None:
+    assemblies = pd.DataFrame(
+        {
+            "Number": [1, 0],
+            "Name": ["b", "a"],
+            "Assembly Method": ["Golden-gate"] * 2,
+            "Part(s).0": ["v", "v"],
+            "Assembly Piece ID Number.0": pd.array([0, 0], dtype="Int64"),
+            "Part(s).1": ["x", None],
+            "Assembly Piece ID Number.1": pd.array([1, None], dtype="Int64"),
+            "Part(s).2": ["y", "z"],
+            "Assembly Piece ID Number.2": pd.array([2, 3], dtype="Int64"),
+        }
+    )
+    skinny = make_assemblies_skinny(assemblies)
+    assert list(skinny["Name"]) == ["a", "a", "b", "b", "b"]
+    assert list(skinny["Part Name"]) == ["v", "z", "v", "x", "y"]
+    assert list(skinny["Part ID"]) == [0, 3, 0, 1, 2]
+    assert list(skinny["Part Order"]) == [0, 2, 0, 1, 2]
+
+
+def test_condense_designs_sharing_a_pcr_product() -> None:
+    master_j5_csv = EXAMPLE_CSV.read_text()
+    # Same PCR product amplified with a differently named forward primer
+    renamed_csv = master_j5_csv.replace("pmas0000", "pmasB000").replace(
+        "mas00001_(ImaginaryProtein1)", "masB0001_(ImaginaryProtein1)"
+    )
+    condensed = MasterJ5.condense_designs(
+        [MasterJ5.parse_csv(master_j5_csv), MasterJ5.parse_csv(renamed_csv)]
+    )
+    assert condensed.pcr_reactions.shape[0] == 3
+    assert condensed.parts.shape[0] == 3
+    assert list(condensed.assemblies["Name"]) == [
+        "pmas00001",
+        "pmas00002",
+        "pmasB0001",
+        "pmasB0002",
+    ]
+    part_ids = dict(zip(condensed.parts["Part(s)"], condensed.parts["ID Number"]))
+    assert (
+        list(condensed.assemblies["Assembly Piece ID Number.1"])
+        == [
+            part_ids["(ImaginaryProtein1)"],
+            part_ids["(ImaginaryProtein2)"],
+        ]
+        * 2
+    )
+
+
+def test_merge_incremental_keeps_existing_ids() -> None:
+    master_j5_csv = EXAMPLE_CSV.read_text()
+    renamed_csv = master_j5_csv.replace("pmas0000", "pmasB000").replace(
+        "mas00001_(ImaginaryProtein1)", "masB0001_(ImaginaryProtein1)"
+    )
+    existing = MasterJ5.condense_designs([MasterJ5.parse_csv(master_j5_csv)])
+    merged, delta = MasterJ5.merge_incremental(
+        existing, MasterJ5.parse_csv(renamed_csv)
+    )
+    for section in ("oligos", "pcr_reactions", "parts", "assemblies"):
+        existing_rows = getattr(existing, section)
+        pd.testing.assert_frame_equal(
+            getattr(merged, section).iloc[: existing_rows.shape[0]], existing_rows
+        )
+    # The renamed primer has the sequence of an existing oligo
+    assert delta.oligos.empty
+    assert list(delta.pcr_reactions["ID Number"]) == [2]
+    assert delta.parts.empty
+    assert list(delta.assemblies["Number"]) == [2, 3]
+    assert list(delta.assemblies["Assembly Piece ID Number.1"]) == list(
+        existing.assemblies["Assembly Piece ID Number.1"]
+    )
+
+    _, repeated = MasterJ5.merge_incremental(merged, MasterJ5.parse_csv(renamed_csv))
+    assert repeated.pcr_reactions.empty
+    assert repeated.assemblies.empty
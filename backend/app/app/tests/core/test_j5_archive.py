@@ -0,0 +1,70 @@
+import io
+import json
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.core.j5 import J5Design, MasterJ5, PlasmidMap
+from app.core.j5_archive import dump_j5_design, is_j5_archive, load_j5_design
+
+pytest.importorskip("pyarrow")
+
+EXAMPLE_CSV = (
+    Path(__file__).resolve().parents[5]
+    / "examples"
+    / "example_j5_output"
+    / "pmas00001_combinatorial.csv"
+)
+
+
+@pytest.mark.parametrize("compression", ["zstd", None])
+def test_archive_round_trip_keeps_dtypes(compression: str) -> None:
+    j5_design = J5Design(
+        zip_file_name="example",
+        master_j5=MasterJ5.parse_csv(EXAMPLE_CSV.read_text()),
+        plasmid_maps=[PlasmidMap(filename="a.gb", contents="LOCUS a\n//\n")],
+        plasmid_designs=[],
+    )
+    archive = dump_j5_design(j5_design, compression=compression)
+    assert is_j5_archive(archive)
+    assert not is_j5_archive(j5_design.to_json().encode())
+
+    loaded = load_j5_design(archive)
+    assert loaded.zip_file_name == "example"
+    assert loaded.plasmid_maps == j5_design.plasmid_maps
+    assert loaded.master_j5.header == j5_design.master_j5.header
+    for section in ("oligos", "pcr_reactions", "parts", "assemblies"):
+        pd.testing.assert_frame_equal(
+            getattr(loaded.master_j5, section), getattr(j5_design.master_j5, section)
+        )
+    assert loaded.master_j5.direct_synthesis is not None
+
+
+def test_manifest_may_only_name_master_j5_tables() -> None:
+    archive_file = io.BytesIO()
+    with zipfile.ZipFile(archive_file, "w") as archive:
+        archive.writestr(
+            "manifest.json",
+            json.dumps(
+                {
+                    "format": "j5design-arrow",
+                    "version": 1,
+                    "zip_file_name": "example",
+                    "tables": ["__class__"],
+                    "plasmid_maps": [],
+                    "plasmid_designs": [],
+                }
+            ),
+        )
+    with pytest.raises(ValueError, match="__class__"):
+        load_j5_design(archive_file.getvalue())
+
+
+def test_j5_results_zip_is_not_an_archive() -> None:
+    archive_file = io.BytesIO()
+    with zipfile.ZipFile(archive_file, "w") as archive:
+        archive.writestr("pmas00001.gb", "LOCUS a\n//\n")
+    with pytest.raises(KeyError):
+        load_j5_design(archive_file.getvalue())
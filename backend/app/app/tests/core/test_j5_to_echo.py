@@ -0,0 +1,76 @@
+import io
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi import UploadFile
+
+import app.core.j5_to_echo as j5_to_echo
+import app.core.pcr_update as pcr_update
+from app.core.condense_designs import condense_designs
+from app.core.j5 import J5Design
+from app.core.process_design import process_j5_zip_upload
+
+EXAMPLE_ZIP = Path(__file__).resolve().parents[5] / "examples" / "example_j5_output.zip"
+PCR_INSTRUCTIONS = "workflow/Step_4-Perform_PCRs/pcr_echo_instructions.csv"
+
+
+def fake_neb_tm_api(primer_sequences: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        [{"seq1": fwd, "seq2": rev, "ta": 60} for fwd, rev in primer_sequences]
+    )
+
+
+@pytest.fixture
+def example_design(monkeypatch: pytest.MonkeyPatch) -> J5Design:
+    monkeypatch.setattr(pcr_update, "call_neb_tm_api", fake_neb_tm_api)
+    j5_to_echo.J5_TO_ECHO_CACHE.clear()
+    j5_to_echo.J5_TO_ECHO_STAGE_CACHE.clear()
+    with EXAMPLE_ZIP.open("rb") as f:
+        design = process_j5_zip_upload(UploadFile(f, filename=EXAMPLE_ZIP.name))
+    return condense_designs([design])
+
+
+def test_ledger_runs_after_a_cached_run_without_it(example_design: J5Design) -> None:
+    _, default = j5_to_echo.j5_to_echo(j5_design=example_design)
+    _, tracked = j5_to_echo.j5_to_echo(
+        j5_design=example_design,
+        parameters=j5_to_echo.AutomationParameters(track_source_volumes=True),
+    )
+    with zipfile.ZipFile(default) as default_zip, zipfile.ZipFile(
+        tracked
+    ) as tracked_zip:
+        assert "workflow/source_well_depletion.csv" not in default_zip.namelist()
+        report = pd.read_csv(
+            io.BytesIO(tracked_zip.read("workflow/source_well_depletion.csv"))
+        )
+        default_pcr = pd.read_csv(io.BytesIO(default_zip.read(PCR_INSTRUCTIONS)))
+        tracked_pcr = pd.read_csv(io.BytesIO(tracked_zip.read(PCR_INSTRUCTIONS)))
+    assert report["PCR_VOLUME"].sum() * 1000 == pytest.approx(
+        default_pcr["Transfer Volume"].sum()
+    )
+    assert tracked_pcr["Transfer Volume"].sum() == default_pcr["Transfer Volume"].sum()
+
+
+def test_ledger_reuses_the_stages_writing_echo_instructions(
+    example_design: J5Design,
+) -> None:
+    master_j5 = example_design.master_j5
+    initial = {
+        "pcr_reactions": master_j5.pcr_reactions,
+        "oligos": master_j5.oligos,
+        "direct_synthesis": master_j5.direct_synthesis,
+        "digests": master_j5.digests,
+        "parts": master_j5.parts,
+        "skinny_assemblies": master_j5.skinny_assemblies,
+        "part_sources": master_j5.part_sources,
+        "plasmid_maps": example_design.plasmid_maps,
+    }
+    default = j5_to_echo.j5_to_echo_pipeline().fingerprints(initial)
+    tracked = j5_to_echo.j5_to_echo_pipeline(
+        j5_to_echo.AutomationParameters(track_source_volumes=True)
+    ).fingerprints(initial)
+    for stage in ("create_pcr_echo_instructions", "create_assembly_echo_instructions"):
+        assert tracked[stage] == default[stage]
+    assert tracked["perform_pcrs"] != default["perform_pcrs"]
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from app.core.j5_to_echo import distribute_high_use_parts
+
+
+def test_high_use_parts_move_to_next_location_every_max_uses() -> None:
+    skinny_assembly = pd.DataFrame(
+        {
+            "Part ID": [0, 1, 0, 0, 1, 0, 0],
+            "Source Plate": ["p1", "p2", "p1", "p1", "p2", "p1", "p1"],
+            "Source Well": ["A1", "B1", "A1", "A1", "B1", "A1", "A1"],
+        }
+    )
+    assembly_volume = pd.DataFrame({"PART_ID": [0, 1], "NUMBER_OF_USES": [5, 2]})
+    assembly_parts = pd.DataFrame(
+        {
+            "ID Number": [0, 1],
+            "SOURCE_LOCATIONS": [
+                [("p1", "A1"), ("p1", "A2"), ("p3", "C1")],
+                [("p2", "B1")],
+            ],
+        }
+    )
+    distributed = distribute_high_use_parts(
+        tmpSkinnyAssembly=skinny_assembly,
+        assemblyVolumeDF=assembly_volume,
+        assemblyPartsDF=assembly_parts,
+        max_well_uses=2,
+    )
+    assert list(distributed["Source Plate"]) == [
+        "p1",
+        "p2",
+        "p1",
+        "p1",
+        "p2",
+        "p1",
+        "p3",
+    ]
+    assert list(distributed["Source Well"]) == [
+        "A1",
+        "B1",
+        "A1",
+        "A2",
+        "B1",
+        "A2",
+        "C1",
+    ]
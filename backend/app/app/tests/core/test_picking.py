@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from app.core.picking import create_picking_instructions, plate_wells
+
+
+def plating_instructions(n_constructs: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "j5_construct_id": range(n_constructs),
+            "name": [f"construct_{i}" for i in range(n_constructs)],
+            "parts": "part",
+            "assembly_method": "SLIC/Gibson/CPEC",
+            "src_plate": "gibson_plate_1",
+            "src_well": "A1",
+            "QPLATE": [f"QPLATE_{i // 48 + 1}" for i in range(n_constructs)],
+            "QWELL": [f"Q{i}" for i in range(n_constructs)],
+        }
+    )
+
+
+def test_picks_fill_96_well_plates_by_column() -> None:
+    picks = create_picking_instructions(plating_instructions(33), 3)
+    assert picks.shape[0] == 99
+    assert list(picks["Source Region"][:4]) == ["Q0", "Q0", "Q0", "Q1"]
+    assert list(picks["Destination Well"][:3]) == ["A1", "B1", "C1"]
+    assert picks["Destination Well"][8] == "A2"
+    assert picks["Destination Barcode"][95] == "glycerol_plate_1"
+    assert picks["Destination Barcode"][96] == "glycerol_plate_2"
+    assert picks["Destination Well"][96] == "A1"
+
+
+def test_picks_fill_384_well_plates_by_row() -> None:
+    picks = create_picking_instructions(
+        plating_instructions(200), 2, plate_format=384, fill="row"
+    )
+    assert list(picks["Destination Well"][23:26]) == ["A24", "B1", "B2"]
+    assert picks["Destination Well"][383] == "P24"
+    assert picks["Destination Barcode"][384] == "glycerol_plate_2"
+
+
+def test_plate_wells_rejects_unknown_formats() -> None:
+    assert plate_wells(384).size == 384
+    with pytest.raises(ValueError):
+        plate_wells(48)
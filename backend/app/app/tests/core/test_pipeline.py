@@ -0,0 +1,153 @@
+import pandas as pd
+import pytest
+
+from app.core.cache import ResultCache
+from app.core.pipeline import Pipeline, Stage
+
+
+def test_pipeline_runs_stages_in_dependency_order() -> None:
+    pipeline = Pipeline(
+        stages=[
+            Stage(
+                name="total",
+                func=lambda low, high: low + high,
+                inputs={"low": "low", "high": "high"},
+                outputs=("total",),
+            ),
+            Stage(
+                name="split",
+                func=lambda number, divisor: divmod(number, divisor),
+                inputs={"number": "number"},
+                outputs=("high", "low"),
+                params={"divisor": 4},
+            ),
+        ],
+        initial=("number",),
+    )
+    result = pipeline.run(initial={"number": 10}, max_workers=2)
+    assert result.artifacts["high"] == 2
+    assert result.artifacts["low"] == 2
+    assert result.artifacts["total"] == 4
+    assert set(result.timings) == {"split", "total"}
+
+
+def test_pipeline_rejects_unmet_inputs() -> None:
+    with pytest.raises(ValueError):
+        Pipeline(
+            stages=[
+                Stage(name="a", func=abs, inputs={"x": "b"}, outputs=("a",)),
+                Stage(name="b", func=abs, inputs={"x": "a"}, outputs=("b",)),
+            ],
+            initial=(),
+        )
+
+
+def test_pipeline_reraises_stage_errors() -> None:
+    def fail(number: int) -> int:
+        raise RuntimeError("stage failed")
+
+    pipeline = Pipeline(
+        stages=[Stage(name="fail", func=fail, inputs={"number": "n"}, outputs=("x",))],
+        initial=("n",),
+    )
+    with pytest.raises(RuntimeError):
+        pipeline.run(initial={"n": 1})
+
+
+def test_pipeline_only_reruns_stages_downstream_of_changes() -> None:
+    calls: list = []
+
+    def record(name: str, value: int) -> int:
+        calls.append(name)
+        return value
+
+    pipeline = Pipeline(
+        stages=[
+            Stage(
+                name="left",
+                func=lambda value: record("left", value),
+                inputs={"value": "a"},
+                outputs=("left",),
+            ),
+            Stage(
+                name="right",
+                func=lambda value: record("right", value),
+                inputs={"value": "b"},
+                outputs=("right",),
+            ),
+        ],
+        initial=("a", "b"),
+    )
+    cache = ResultCache()
+    pipeline.run(initial={"a": 1, "b": 2}, cache=cache)
+    result = pipeline.run(initial={"a": 1, "b": 3}, cache=cache)
+    assert calls == ["left", "right", "right"]
+    assert result.reused == {"left"}
+    assert result.artifacts["right"] == 3
+
+
+def test_pipeline_cached_outputs_are_not_shared() -> None:
+    pipeline = Pipeline(
+        stages=[
+            Stage(
+                name="table",
+                func=lambda n: pd.DataFrame({"N": range(n)}),
+                inputs={"n": "n"},
+                outputs=("table",),
+            )
+        ],
+        initial=("n",),
+    )
+    cache = ResultCache()
+    first = pipeline.run(initial={"n": 3}, cache=cache)
+    first.artifacts["table"].loc[:, "N"] = -1
+    second = pipeline.run(initial={"n": 3}, cache=cache)
+    assert second.reused == {"table"}
+    assert list(second.artifacts["table"]["N"]) == [0, 1, 2]
+    second.artifacts["table"]["N"] = 7
+    third = pipeline.run(initial={"n": 3}, cache=cache)
+    assert list(third.artifacts["table"]["N"]) == [0, 1, 2]
+
+
+def test_pipeline_cache_tells_apart_renamed_outputs() -> None:
+    def pipeline(name: str) -> Pipeline:
+        return Pipeline(
+            stages=[
+                Stage(
+                    name="double",
+                    func=lambda n: 2 * n,
+                    inputs={"n": "n"},
+                    outputs=(name,),
+                ),
+                Stage(
+                    name="increment",
+                    func=lambda n: n + 1,
+                    inputs={"n": name},
+                    outputs=("result",),
+                ),
+            ],
+            initial=("n",),
+        )
+
+    cache = ResultCache()
+    assert pipeline("doubled").run({"n": 3}, cache=cache).artifacts["result"] == 7
+    renamed = pipeline("twice").run({"n": 3}, cache=cache)
+    assert renamed.artifacts["result"] == 7
+    assert "double" not in renamed.reused
+
+
+def test_pipeline_raises_when_inputs_never_appear() -> None:
+    pipeline = Pipeline(
+        stages=[
+            Stage(
+                name="double", func=lambda n: 2 * n, inputs={"n": "n"}, outputs=("x",)
+            ),
+            Stage(name="use", func=abs, inputs={"x": "x"}, outputs=("y",)),
+        ],
+        initial=("n",),
+    )
+    # A cache entry lacking the outputs the pipeline expects
+    cache = ResultCache()
+    cache.set(pipeline.fingerprints({"n": 1})["double"], {"other": 2})
+    with pytest.raises(RuntimeError, match="x"):
+        pipeline.run({"n": 1}, cache=cache)
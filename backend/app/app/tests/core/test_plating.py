@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from app.core.plating_utils import create_plating_instructions, plating_map
+
+
+@pytest.mark.parametrize(
+    "method, well, qplate, qwell",
+    [
+        ("6-wide", "A1", "QPLATE_1", "F1"),
+        ("6-wide", "H12", "QPLATE_2", "A8"),
+        ("8-wide", "A9", "QPLATE_2", "A1"),
+        ("8-wide", "G5", "QPLATE_2", "B5"),
+        ("consecutive", "A9", "QPLATE_1", "B1"),
+        ("consecutive", "E1", "QPLATE_2", "A1"),
+        ("qpix", "E1", "QPLATE_1", "B1"),
+        ("qpix", "A4", "QPLATE_1", "A5"),
+        ("biomek", "A2", "QPLATE_1", "B1"),
+        ("biomek", "H12", "QPLATE_2", "F8"),
+    ],
+)
+def test_builtin_layouts(method: str, well: str, qplate: str, qwell: str) -> None:
+    platingMap = plating_map(method)
+    assert platingMap.shape == (96, 2)
+    assert tuple(platingMap.loc[well]) == (qplate, qwell)
+
+
+def test_custom_layout_instructions() -> None:
+    constructs = pd.DataFrame(
+        {
+            "j5_construct_id": [0, 1],
+            "name": ["a", "b"],
+            "parts": ["x", "y"],
+            "assembly_method": ["SLIC/Gibson/CPEC"] * 2,
+            "src_plate": ["gibson_plate_1"] * 2,
+            "src_well": ["A1", "B1"],
+        }
+    )
+    instructions = create_plating_instructions(
+        plating=constructs, method="A1:B1 column 3 C8:C7 row"
+    )
+    assert list(instructions["QPLATE"]) == ["gibson_plate_1_QPLATE_3"] * 2
+    assert list(instructions["QWELL"]) == ["C8", "C7"]
+
+
+def test_invalid_layouts_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        plating_map("A1:H6 row 1 A1:A8 row")
+    with pytest.raises(ValueError):
+        plating_map("12-wide")
@@ -0,0 +1,47 @@
+import pandas as pd
+import pandera as pa
+import pytest
+from pandera.typing import DataFrame, Series
+
+from app.core.validation import (
+    ValidationMode,
+    check_types,
+    validate_input,
+    validation_mode,
+)
+from app.schemas.validate import is_aa_sequence, is_dna_sequence
+
+
+class CountSchema(pa.DataFrameModel):
+    count: Series[int] = pa.Field(ge=0)
+
+    class Config:
+        coerce = True
+
+
+@check_types()
+def passthrough(df: DataFrame[CountSchema]) -> DataFrame[CountSchema]:
+    return df
+
+
+def test_check_types_only_validates_in_full_mode() -> None:
+    negative = pd.DataFrame({"count": [-1]})
+    with pytest.raises(pa.errors.SchemaError):
+        passthrough(negative)
+    with validation_mode(ValidationMode.BOUNDARY):
+        assert passthrough(negative) is negative
+
+
+def test_validate_input_coerces_when_off() -> None:
+    df = pd.DataFrame({"count": ["-1"]})
+    with validation_mode(ValidationMode.OFF):
+        coerced = validate_input(CountSchema, df)
+    assert coerced["count"].tolist() == [-1]
+    with pytest.raises(pa.errors.SchemaError):
+        validate_input(CountSchema, df)
+
+
+def test_sequence_alphabet_checks() -> None:
+    sequences = pd.Series(["ATcg", "ATXG", "", "MK*"])
+    assert is_dna_sequence(sequences).tolist() == [True, False, True, False]
+    assert is_aa_sequence(sequences).tolist() == [True, False, True, True]
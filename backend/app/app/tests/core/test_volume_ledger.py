@@ -0,0 +1,96 @@
+import pandas as pd
+
+from app.core.assembly import EchoTransferConstraints
+from app.core.volume_ledger import apply_volume_ledger
+
+
+def echo_instructions(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "Source Plate Name",
+            "Source Well",
+            "Destination Plate Name",
+            "Destination Well",
+            "Transfer Volume",
+        ],
+    )
+
+
+def test_transfers_split_across_replicates_at_dead_volume() -> None:
+    transfers = echo_instructions(
+        [("parts", "A1", "dest", f"A{i}", 10_000) for i in range(1, 5)]
+    )
+    replicates = pd.DataFrame(
+        {"PLATE": ["parts", "parts"], "WELL": ["A1", "B1"], "REPLICATE_GROUP": 0}
+    )
+    instruction_sets, report = apply_volume_ledger(
+        {"pcr": transfers}, replicates=replicates, default_volume=40.0
+    )
+    split = instruction_sets["pcr"]
+    # 25 uL can be drawn from each well, so the third transfer is split
+    assert list(split["Source Well"]) == ["A1", "A1", "A1", "B1", "B1"]
+    assert list(split["Transfer Volume"]) == [10_000, 10_000, 5_000, 5_000, 10_000]
+    assert list(split["Destination Well"]) == ["A1", "A2", "A3", "A3", "A4"]
+    assert list(report["USED_VOLUME"]) == [25.0, 15.0]
+    assert not report["OVERDRAWN"].any()
+
+
+def test_overdrawn_wells_are_reported() -> None:
+    _, report = apply_volume_ledger(
+        {
+            "quant": echo_instructions([("parts", "A1", "quant", "A1", 20_000)]),
+            "assembly": echo_instructions([("parts", "A1", "asm", "A1", 2_000)]),
+            "equimolar": echo_instructions([("parts", "A1", "asm", "A1", 8_000)]),
+        },
+        alternatives=("assembly", "equimolar"),
+    )
+    row = report.iloc[0]
+    assert row["QUANT_VOLUME"] == 20.0
+    assert row["ASSEMBLY_VOLUME"] == 2.0
+    assert row["EQUIMOLAR_VOLUME"] == 8.0
+    # Only one of the assembly sets is run
+    assert row["USED_VOLUME"] == 28.0
+    assert row["OVERDRAWN"]
+
+
+def test_split_transfers_are_rounded_to_droplets() -> None:
+    # 24.9975 uL usable rounds down to 24.995 uL, 5 nL droplet quanta
+    transfers = echo_instructions(
+        [("parts", "A1", "dest", f"A{i}", 10_000) for i in range(1, 4)]
+    )
+    replicates = pd.DataFrame(
+        {"PLATE": ["parts", "parts"], "WELL": ["A1", "B1"], "REPLICATE_GROUP": 0}
+    )
+    instruction_sets, _ = apply_volume_ledger(
+        {"pcr": transfers}, replicates=replicates, default_volume=39.9975
+    )
+    split = instruction_sets["pcr"]
+    assert list(split["Transfer Volume"]) == [10_000, 10_000, 4_995, 5_005]
+    assert (split["Transfer Volume"] % 5 == 0).all()
+
+
+def test_split_pieces_below_min_volume_are_carried() -> None:
+    transfers = echo_instructions(
+        [
+            ("parts", "A1", "dest", "A1", 24_990),
+            ("parts", "A1", "dest", "A2", 10_000),
+            ("parts", "A1", "dest", "A3", 15_020),
+        ]
+    )
+    replicates = pd.DataFrame(
+        {"PLATE": "parts", "WELL": ["A1", "B1", "C1"], "REPLICATE_GROUP": 0}
+    )
+    instruction_sets, report = apply_volume_ledger(
+        {"pcr": transfers},
+        replicates=replicates,
+        default_volume=40.0,
+        constraints=EchoTransferConstraints(min_transfer_volume=25.0),
+    )
+    split = instruction_sets["pcr"]
+    # The 10 nL left in A1 is carried to B1, and the 10 nL B1 cannot
+    # supply is topped up to 25 nL from what A3 draws from B1
+    assert list(split["Source Well"]) == ["A1", "B1", "B1", "C1"]
+    assert list(split["Transfer Volume"]) == [24_990, 10_000, 14_995, 25]
+    assert list(split["Destination Well"]) == ["A1", "A2", "A3", "A3"]
+    assert list((report["USED_VOLUME"] * 1000).round()) == [24_990, 24_995, 25]
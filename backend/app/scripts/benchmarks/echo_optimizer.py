@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Optimize 200,000 random Echo transfers and compare estimated run times
+
+Run from backend/app with: python scripts/benchmarks/echo_optimizer.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.core.echo import (  # noqa: E402
+    estimate_echo_run_time,
+    optimize_echo_instructions,
+)
+from app.core.picking import plate_wells  # noqa: E402
+from app.core.validation import ValidationMode, validation_mode  # noqa: E402
+
+N_TRANSFERS: int = 200_000
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    wells_384 = plate_wells(384)
+    wells_96 = plate_wells(96)
+    instructions = pd.DataFrame(
+        {
+            "Source Plate Name": np.char.add(
+                "parts_plate_", rng.integers(1, 20, N_TRANSFERS).astype(str)
+            ),
+            "Source Well": rng.choice(wells_384, N_TRANSFERS),
+            "Destination Plate Name": np.char.add(
+                "gibson_plate_", rng.integers(1, 40, N_TRANSFERS).astype(str)
+            ),
+            "Destination Well": rng.choice(wells_96, N_TRANSFERS),
+            "Transfer Volume": rng.integers(1, 400, N_TRANSFERS) * 5,
+        }
+    )
+    sorted_instructions = instructions.sort_values(
+        [
+            "Source Plate Name",
+            "Destination Plate Name",
+            "Source Well",
+            "Destination Well",
+        ]
+    )
+    for mode in (ValidationMode.FULL, ValidationMode.OFF):
+        with validation_mode(mode):
+            start = time.perf_counter()
+            optimized = optimize_echo_instructions(instructions)
+            elapsed = time.perf_counter() - start
+        print(
+            f"optimize_echo_instructions ({mode.value} validation):"
+            f" {elapsed:.2f} s for {N_TRANSFERS} transfers"
+        )
+    for name, transfers in (
+        ("sorted by name", sorted_instructions),
+        ("optimized", optimized),
+    ):
+        estimate = estimate_echo_run_time(transfers)
+        print(
+            f"{name}: {estimate.transfers} transfers,"
+            f" {estimate.source_plate_loads + estimate.destination_plate_loads}"
+            f" plate loads, {estimate.travel_wells:.0f} wells travelled,"
+            f" {estimate.seconds / 3600:.2f} h"
+        )
+
+
+if __name__ == "__main__":
+    main()
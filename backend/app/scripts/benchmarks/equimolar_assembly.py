@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Compare the equimolar assembly solvers on 10,000 random assemblies
+
+Run from backend/app with: python scripts/benchmarks/equimolar_assembly.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.core.assembly import (  # noqa: E402
+    optimize_equimolar_assembly_rxn,
+    solve_equimolar_assembly_rxns,
+)
+
+N_ASSEMBLIES: int = 10_000
+MAX_VOL: float = 5.0
+MAX_FMOL: float = 100.0
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    rxn = pd.Series(
+        np.repeat(np.arange(N_ASSEMBLIES), rng.integers(2, 8, size=N_ASSEMBLIES))
+    )
+    conc = pd.Series(rng.uniform(1.0, 500.0, size=rxn.size))
+
+    start: float = time.perf_counter()
+    batched: np.ndarray = solve_equimolar_assembly_rxns(
+        conc=conc, rxn=rxn, max_vol=MAX_VOL, max_fmol=MAX_FMOL
+    )
+    batched_seconds: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    per_rxn: np.ndarray = np.zeros(conc.size)
+    bounds: np.ndarray = np.flatnonzero(np.diff(rxn.to_numpy(), prepend=-1, append=-1))
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        per_rxn[begin:end] = optimize_equimolar_assembly_rxn(
+            conc=conc.to_numpy()[begin:end], max_vol=MAX_VOL, max_fmol=MAX_FMOL
+        )
+    lp_seconds: float = time.perf_counter() - start
+
+    print(f"{N_ASSEMBLIES} assemblies, {conc.size} parts")
+    print(f"closed form: {batched_seconds:.3f} s")
+    print(f"linprog per reaction: {lp_seconds:.3f} s")
+    print(f"max volume difference: {np.abs(batched - per_rxn).max():.2e} uL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Parse large synthetic j5 combinatorial CSVs and report time and peak memory
+
+Run from backend/app with: python scripts/benchmarks/j5_parse.py
+"""
+
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.core.j5 import MasterJ5, iter_sections  # noqa: E402
+
+N_ROWS: List[int] = [1_000, 10_000, 50_000]
+SEQUENCE_LENGTH: int = 300
+
+
+def random_sequences(rng: np.random.Generator, n: int, length: int) -> List[str]:
+    bases = rng.choice(np.array(list("ACGT"), dtype="S1"), size=(n, length))
+    return [row.tobytes().decode() for row in bases]
+
+
+def combinatorial_csv(n_rows: int) -> str:
+    """A j5 combinatorial CSV with n_rows parts, oligos and assemblies"""
+    rng = np.random.default_rng(0)
+    sequences = random_sequences(rng, n_rows, SEQUENCE_LENGTH)
+    oligos = random_sequences(rng, 2 * n_rows, 30)
+    lines: List[str] = ['"Synthetic benchmark design"', ""]
+    lines += [
+        '"Non-degenerate Part IDs and Sources"',
+        "Part,,Location",
+        '"ID Number",Name,"Source Plasmid","Reverse Complement",'
+        '"Start (bp)","End (bp)","Size (bp)",Sequence',
+    ]
+    lines += [
+        f"{i},part_{i},plasmid_{i % 50},FALSE,1,{SEQUENCE_LENGTH},"
+        f"{SEQUENCE_LENGTH},{sequence}"
+        for i, sequence in enumerate(sequences)
+    ]
+    lines += ["", '"Oligo Synthesis"']
+    lines += [
+        '"ID Number",Name,Length,Tm,"Tm (3\' only)",Cost,Sequence,'
+        '"Sequence (3\' only)"'
+    ]
+    lines += [
+        f"{i},oligo_{i},30,65.1,60.2,3.0,{sequence},{sequence[10:]}"
+        for i, sequence in enumerate(oligos)
+    ]
+    lines += ["", '"PCR Reactions",,,"Forward Oligo",,"Reverse Oligo"']
+    lines += [
+        '"ID Number","Primary Template","Alternate Template","ID Number",Name,'
+        '"ID Number",Name,Note,"Mean Oligo Tm","Delta Oligo Tm",'
+        '"Mean Oligo Tm (3\' only)","Delta Oligo Tm (3\' only)",Length,Sequence'
+    ]
+    lines += [
+        f"{i},plasmid_{i % 50},,{2 * i},oligo_{2 * i},{2 * i + 1},"
+        f"oligo_{2 * i + 1},PCR,65.1,1.2,60.2,1.1,{SEQUENCE_LENGTH},{sequence}"
+        for i, sequence in enumerate(sequences)
+    ]
+    lines += ["", '"Assembly Pieces (SLIC/Gibson/CPEC)"']
+    lines += [
+        '"ID Number",Type,"Type ID Number",Part(s),"Relative Overlap Position",'
+        '"Extra 5\' CPEC bps","Extra 3\' CPEC bps","CPEC Tm Next",'
+        '"Overlap with Next (bps)","Overlap with Next",'
+        '"Overlap with Next Reverse Complemenet","Sequence Length",Sequence'
+    ]
+    lines += [
+        f"{i},PCR,{i},(part_{i}),13,0,0,70.1,26,{sequence[:26]},"
+        f"{sequence[:26]},{SEQUENCE_LENGTH},{sequence}"
+        for i, sequence in enumerate(sequences)
+    ]
+    lines += ["", '"Combinations of Assembly Pieces"', 'Variant,,,"Bin 0",,"Bin 1"']
+    lines += [
+        'Number,Name,"Assembly Method",Part(s),"Assembly Piece ID Number",'
+        'Part(s),"Assembly Piece ID Number"'
+    ]
+    lines += [
+        f"{i},construct_{i},SLIC/Gibson/CPEC,(part_{i}),{i},"
+        f"(part_{(i + 1) % n_rows}),{(i + 1) % n_rows}"
+        for i in range(n_rows)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    logging.disable(logging.DEBUG)
+    for n_rows in N_ROWS:
+        master_j5_csv = combinatorial_csv(n_rows)
+        start = time.perf_counter()
+        n_sections = sum(1 for _ in iter_sections(master_j5_csv))
+        scanned = time.perf_counter() - start
+
+        start = time.perf_counter()
+        MasterJ5.parse_csv(master_j5_csv)
+        elapsed = time.perf_counter() - start
+
+        # Traced separately since tracemalloc slows parsing down
+        tracemalloc.start()
+        MasterJ5.parse_csv(master_j5_csv)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{n_rows} rows per section ({len(master_j5_csv) / 1e6:.1f} MB):"
+            f" {n_sections} sections scanned in {scanned * 1000:.1f} ms,"
+            f" parsed in {elapsed:.2f} s, peak memory {peak / 1e6:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
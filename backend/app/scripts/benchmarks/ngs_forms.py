@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Render NGS submission forms for many plates with the pooled template,
+and with the template parsed again for every plate
+
+Run from backend/app with: python scripts/benchmarks/ngs_forms.py
+"""
+
+import io
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.api.utils import ngs  # noqa: E402
+
+N_NGS_PLATES: int = 52
+WELLS = [f"{row}{column}" for column in range(1, 13) for row in "ABCDEFGH"]
+
+
+def main() -> None:
+    warnings.simplefilter("ignore", UserWarning)
+    glycerol = pd.DataFrame(
+        [
+            (f"glycerol_plate_{plate}", well, f"construct_{plate}_{well}")
+            for plate in range(1, 4 * N_NGS_PLATES + 1)
+            for well in WELLS
+        ],
+        columns=["GLYCEROL_PLATE", "GLYCEROL_WELL", "name"],
+    )
+    start = time.perf_counter()
+    ngs_worksheet, _ = ngs.setup_ngs_worksheets(
+        glycerol_stock_file=io.StringIO(glycerol.to_csv(index=False)),
+        registry_file=io.StringIO(
+            glycerol.assign(Part_ID="JPUB_000001").to_csv(index=False)
+        ),
+        username="user",
+    )
+    pooled = time.perf_counter() - start
+    plate_samples = {
+        plate: list(zip(samples["Sample_Name"], samples["Part ID"]))
+        for plate, samples in ngs_worksheet.groupby("NGS_PLATE", sort=False)
+    }
+
+    start = time.perf_counter()
+    for samples in plate_samples.values():
+        ngs.NGS_TEMPLATE_POOL.clear()
+        ngs.render_ngs_submission_excel(samples)
+    parsed = time.perf_counter() - start
+    print(
+        f"{len(plate_samples)} NGS plates: setup_ngs_worksheets {pooled:.1f} s,"
+        f" forms with the template parsed per plate {parsed:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Translate thousands of multi-kb ORFs one by one and as a batch
+
+Run from backend/app with: python scripts/benchmarks/translation.py
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.core import dna_utils  # noqa: E402
+from app.core.dna_utils import (  # noqa: E402
+    translate_dna_to_aa,
+    translate_dna_to_aa_batch,
+)
+
+N_ORFS: List[int] = [1_000, 5_000]
+ORF_LENGTH: int = 3_000
+
+
+def random_orfs(n: int, length: int) -> pd.Series:
+    rng = np.random.default_rng(0)
+    bases = rng.choice(np.array(list("ACGT"), dtype="S1"), size=(n, length))
+    return pd.Series([row.tobytes().decode() for row in bases])
+
+
+def main() -> None:
+    for n_orfs in N_ORFS:
+        orfs = random_orfs(n_orfs, ORF_LENGTH)
+        start = time.perf_counter()
+        expected = orfs.apply(translate_dna_to_aa).tolist()
+        per_row = time.perf_counter() - start
+
+        dna_utils.TRANSLATION_CACHE.clear()
+        start = time.perf_counter()
+        translations = translate_dna_to_aa_batch(orfs.tolist())
+        batch = time.perf_counter() - start
+        assert translations == expected
+
+        start = time.perf_counter()
+        translate_dna_to_aa_batch(orfs.tolist())
+        cached = time.perf_counter() - start
+        print(
+            f"{n_orfs} ORFs of {ORF_LENGTH} bp: Series.apply {per_row:.2f} s,"
+            f" batch {batch:.2f} s, cached {cached:.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
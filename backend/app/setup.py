@@ -55,6 +55,9 @@ setup(
         "tenacity",
         "typer",
     ],
+    extras_require={
+        "arrow": ["pyarrow"],
+    },
     license="Apache 2.0",
     entry_points={
         "console_scripts": [